@@ -0,0 +1,57 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def _total(model, aggregate):
+    return Coalesce(Subquery(
+        model.objects.filter(article=OuterRef('pk')).order_by()
+        .values('article').annotate(total=aggregate).values('total'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Like = apps.get_model('articles', 'Like')
+    Bookmark = apps.get_model('articles', 'Bookmark')
+    ArticleRating = apps.get_model('articles', 'ArticleRating')
+    Article.objects.update(
+        likes_count=_total(Like, Count('id')),
+        bookmarks_count=_total(Bookmark, Count('id')),
+        rating_sum=_total(ArticleRating, Sum('rating')),
+        rating_count=_total(ArticleRating, Count('id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_alter_article_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='bookmarks_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الإشارات المرجعية'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الإعجابات'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد التقييمات'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='مجموع التقييمات'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
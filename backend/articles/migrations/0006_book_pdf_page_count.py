@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_interaction_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of pages of the uploaded file, filled in by the media pipeline', verbose_name='عدد صفحات الملف'),
+        ),
+    ]
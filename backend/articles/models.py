@@ -7,6 +7,7 @@ from django.urls import reverse
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from courses.models import Tags
+from users.models import TrackedFieldsMixin
 
 User = get_user_model()
 
@@ -41,6 +42,11 @@ class Book(models.Model):
     isbn = models.CharField(max_length=20, blank=True, null=True, verbose_name="ISBN")
     language = models.CharField(max_length=50, default='العربية', verbose_name="اللغة")
     pages_count = models.PositiveIntegerField(null=True, blank=True, verbose_name="عدد الصفحات")
+    # Filled in by the pdf media job (core.pdf_pages); pages_count is the admin's own value
+    pdf_page_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="عدد صفحات الملف",
+        help_text="Number of pages of the uploaded file, filled in by the media pipeline",
+    )
 
     def __str__(self):
         return self.title
@@ -84,7 +90,9 @@ class Book(models.Model):
             return f"{self.file_size / (1024 * 1024):.1f} ميجابايت"
 
 
-class Article(models.Model):
+class Article(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('image',)
+
     STATUS_CHOICES = [
         ('draft', 'مسودة'),
         ('published', 'منشور'),
@@ -103,6 +111,12 @@ class Article(models.Model):
     image = models.ImageField(upload_to='articles/', null=True, blank=True, verbose_name='الصورة')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name='الحالة')
     views_count = models.PositiveIntegerField(default=0, verbose_name='عدد المشاهدات')
+    # Denormalized interaction counters, kept in step by the receivers in
+    # models_interaction (see core.interactions)
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الإعجابات')
+    bookmarks_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد الإشارات المرجعية')
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name='مجموع التقييمات')
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد التقييمات')
     featured = models.BooleanField(default=False, verbose_name='مميز')
     meta_description = models.CharField(max_length=160, blank=True, null=True, verbose_name='وصف SEO')
     meta_keywords = models.CharField(max_length=255, blank=True, null=True, verbose_name='كلمات مفتاحية SEO')
@@ -245,12 +259,12 @@ class Article(models.Model):
         )
     
     def get_average_rating(self):
-        """Get the average rating of the article"""
-        return self.ratings.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
+        """Get the average rating of the article (from the stored counters)"""
+        return self.rating_sum / self.rating_count if self.rating_count else 0
     
     def get_rating_count(self):
         """Get the total number of ratings"""
-        return self.ratings.count()
+        return self.rating_count
     
     def get_rating_distribution(self):
         """Get the distribution of ratings (count per star)"""
@@ -272,26 +286,13 @@ class Article(models.Model):
     
     # View tracking
     def track_view(self, request):
-        """Track a view of this article"""
-        from .models_interaction import ArticleView
-        
-        # Get the user's IP address
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        ip_address = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
-        
-        # Create the view record
-        ArticleView.objects.create(
-            article=self,
-            user=request.user if request.user.is_authenticated else None,
-            ip_address=ip_address,
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
-        
-        # Update the view count
-        self.views_count = models.F('views_count') + 1
-        self.save(update_fields=['views_count'])
-        
-        return self.views_count
+        """
+        Track a view of this article. The view is buffered and written in
+        bulk (see articles.view_buffer); returns False for a repeat view by
+        the same viewer within the dedupe window.
+        """
+        from .view_buffer import record_request_view
+        return record_request_view(self, request)
 
 
 class ArticleComment(models.Model):
@@ -316,3 +317,7 @@ class ArticleComment(models.Model):
     def is_reply(self):
         """فحص إذا كان هذا رد على تعليق آخر"""
         return self.parent is not None
+
+
+# Interaction models (and their counter receivers) live in their own module
+from .models_interaction import Like, Bookmark, ArticleRating, ArticleView  # noqa: E402,F401
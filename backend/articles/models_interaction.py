@@ -5,6 +5,11 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django.db.models import Avg, Count
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import post_delete, post_save
+
+from core.interactions import adjust_counters, cached_related
+from core.signal_registry import receiver
+from users.models import TrackedFieldsMixin
 
 class Like(models.Model):
     """
@@ -42,7 +47,7 @@ class Bookmark(models.Model):
     def __str__(self):
         return f"{self.user.username} bookmarked {self.article.title}"
 
-class ArticleRating(models.Model):
+class ArticleRating(TrackedFieldsMixin, models.Model):
     """
     Model to store user ratings for articles.
     """
@@ -64,6 +69,8 @@ class ArticleRating(models.Model):
     comment = models.TextField(blank=True, null=True, help_text='تعليق إضافي')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ('rating',)
     
     class Meta:
         unique_together = ('user', 'article')
@@ -91,3 +98,46 @@ class ArticleView(models.Model):
     
     def __str__(self):
         return f"View of {self.article.title} by {self.user.username if self.user else 'Anonymous'}"
+
+
+# Denormalized counters on Article
+def _adjust_article(instance, **deltas):
+    from .models import Article
+    adjust_counters(Article, instance.article_id, cached_related(instance, 'article'), **deltas)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        _adjust_article(instance, likes_count=1)
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    _adjust_article(instance, likes_count=-1)
+
+
+@receiver(post_save, sender=Bookmark)
+def count_bookmark(sender, instance, created, **kwargs):
+    if created:
+        _adjust_article(instance, bookmarks_count=1)
+
+
+@receiver(post_delete, sender=Bookmark)
+def uncount_bookmark(sender, instance, **kwargs):
+    _adjust_article(instance, bookmarks_count=-1)
+
+
+@receiver(post_save, sender=ArticleRating)
+def count_rating(sender, instance, created, **kwargs):
+    if created:
+        _adjust_article(instance, rating_sum=int(instance.rating), rating_count=1)
+    elif instance.has_changed('rating'):
+        # get_loaded_value() is still the stored value until save() returns
+        _adjust_article(instance, rating_sum=int(instance.rating) - int(instance.get_loaded_value('rating')))
+
+
+@receiver(post_delete, sender=ArticleRating)
+def uncount_rating(sender, instance, **kwargs):
+    rating = int(instance.get_loaded_value('rating') or instance.rating)
+    _adjust_article(instance, rating_sum=-rating, rating_count=-1)
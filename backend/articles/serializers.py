@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from core.image_variants import image_srcset
+from core.interactions import SiblingListSerializer, user_has_related
 from .models import BookCategory, Article, ArticleComment
+from .models_interaction import Bookmark, Like
 
 
 class BookCategorySerializer(serializers.ModelSerializer):
@@ -53,25 +56,43 @@ class ArticleCommentSerializer(serializers.ModelSerializer):
 class ArticleSerializer(serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    average_rating = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
+    is_bookmarked = serializers.SerializerMethodField()
     reading_time = serializers.SerializerMethodField()
     tags = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
         fields = [
             'id', 'title', 'slug', 'author', 'author_name', 
-            'content', 'summary', 'image', 'status', 'featured', 'allow_comments',
+            'content', 'summary', 'image', 'image_srcset', 'status', 'featured', 'allow_comments',
             'meta_description', 'meta_keywords', 'views_count', 'comments_count', 'likes_count',
+            'bookmarks_count', 'rating_count', 'average_rating', 'is_liked', 'is_bookmarked',
             'reading_time', 'created_at', 'updated_at', 'published_at', 'tags'
         ]
-        read_only_fields = ['author', 'slug', 'views_count', 'created_at', 'updated_at', 'published_at']
+        read_only_fields = [
+            'author', 'slug', 'views_count', 'likes_count', 'bookmarks_count', 'rating_count',
+            'created_at', 'updated_at', 'published_at'
+        ]
+        list_serializer_class = SiblingListSerializer
 
     def get_comments_count(self, obj):
         return obj.comments.filter(is_approved=True).count()
 
-    def get_likes_count(self, obj):
-        return getattr(obj, 'likes', []).count() if hasattr(obj, 'likes') else 0
+    def get_average_rating(self, obj):
+        return round(obj.get_average_rating(), 1) if obj.rating_count else None
+
+    def get_is_liked(self, obj):
+        # One query per page of articles (see core.interactions)
+        return user_has_related(self, obj, Like, 'article_id')
+
+    def get_is_bookmarked(self, obj):
+        return user_has_related(self, obj, Bookmark, 'article_id')
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.image, self.context.get('request'))
 
     def get_reading_time(self, obj):
         if obj.content:
@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from . import view_buffer
+from .models import Article
+from .models_interaction import ArticleRating, ArticleView
+
+User = get_user_model()
+
+
+@override_settings(ARTICLE_VIEW_FLUSH_SECONDS=3600, ARTICLE_VIEW_BUFFER_SIZE=1000)
+class BufferedViewTrackingTest(TestCase):
+    """Test cases for buffered, deduplicated article views"""
+
+    def setUp(self):
+        cache.clear()
+        view_buffer.flush()
+        self.articles = [
+            Article.objects.create(title=f'Article {i}', slug=f'article-{i}', content='x', status='published')
+            for i in range(2)
+        ]
+
+    def test_views_are_deduplicated_and_flushed_in_bulk(self):
+        first, second = self.articles
+        for ip in ('1.1.1.1', '2.2.2.2', '1.1.1.1'):
+            view_buffer.record_view(first.pk, ip_address=ip)
+        view_buffer.record_view(second.pk, ip_address='1.1.1.1')
+        self.assertEqual(view_buffer.pending_count(), 3)
+        self.assertEqual(ArticleView.objects.count(), 0)
+
+        # existence check, savepoint pair, bulk insert, one UPDATE per distinct
+        # increment, then the trending counters: savepoint pair and, for the hour
+        # and day buckets, one insert and one UPDATE per distinct increment
+        with self.assertNumQueries(14):
+            self.assertEqual(view_buffer.flush(), 3)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.views_count, second.views_count), (2, 1))
+        self.assertEqual(ArticleView.objects.count(), 3)
+
+    def test_process_local_cache_checks_flushed_views(self):
+        article = self.articles[0]
+        with override_settings(SHARED_CACHE=False):
+            self.assertTrue(view_buffer.record_view(article.pk, ip_address='5.5.5.5'))
+            view_buffer.flush()
+            # Another worker: its cache has not seen the viewer
+            cache.clear()
+            self.assertFalse(view_buffer.record_view(article.pk, ip_address='5.5.5.5'))
+            self.assertTrue(view_buffer.record_view(article.pk, ip_address='6.6.6.6'))
+        self.assertEqual(view_buffer.pending_count(), 1)
+
+    def test_idle_buffer_is_flushed_after_the_interval(self):
+        article = self.articles[0]
+        view_buffer.record_view(article.pk, ip_address='4.4.4.4')
+        self.assertIsNone(view_buffer._flusher[0])
+        # What the flusher thread runs on each tick
+        self.assertEqual(view_buffer.flush_if_due(), 0)
+        with override_settings(ARTICLE_VIEW_FLUSH_SECONDS=0):
+            self.assertEqual(view_buffer.flush_if_due(), 1)
+        self.assertEqual(view_buffer.pending_count(), 0)
+
+    def test_view_endpoint_accepts_and_buffers(self):
+        article = self.articles[0]
+        url = f'/api/articles/articles/{article.pk}/views/'
+        response = self.client.post(url, REMOTE_ADDR='3.3.3.3')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data['counted'])
+        self.assertFalse(self.client.post(url, REMOTE_ADDR='3.3.3.3').data['counted'])
+
+
+class InteractionCountersTest(TestCase):
+    """Test cases for denormalized like/bookmark/rating counters"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='x')
+            for i in range(2)
+        ]
+        self.articles = [
+            Article.objects.create(title=f'Counted {i}', slug=f'counted-{i}', content='x', status='published')
+            for i in range(3)
+        ]
+
+    def test_counters_follow_creates_updates_and_deletes(self):
+        article = self.articles[0]
+        first, second = self.users
+        article.like(first)
+        article.like(second)
+        article.add_to_bookmarks(first)
+        article.rate(first, 5)
+        article.rate(second, 2)
+        article.rate(second, 4)
+        article.unlike(second)
+
+        article.refresh_from_db()
+        self.assertEqual((article.likes_count, article.bookmarks_count), (1, 1))
+        self.assertEqual((article.rating_sum, article.rating_count), (9, 2))
+        self.assertEqual(article.get_average_rating(), 4.5)
+
+        ArticleRating.objects.filter(article=article).delete()
+        article.remove_from_bookmarks(first)
+        article.refresh_from_db()
+        self.assertEqual((article.bookmarks_count, article.rating_sum, article.rating_count), (0, 0, 0))
+
+    def test_liked_by_me_is_resolved_once_per_page(self):
+        from rest_framework.test import APIRequestFactory
+        from .serializers import ArticleSerializer
+
+        user = self.users[0]
+        self.articles[1].like(user)
+        request = APIRequestFactory().get('/')
+        request.user = user
+        articles = Article.objects.filter(pk__in=[a.pk for a in self.articles]).order_by('pk')
+
+        # the page, comments count and tags per article, plus one query per relation
+        with self.assertNumQueries(2 * len(self.articles) + 3):
+            data = ArticleSerializer(articles, many=True, context={'request': request}).data
+        self.assertEqual([item['is_liked'] for item in data], [False, True, False])
+        self.assertEqual([item['likes_count'] for item in data], [0, 1, 0])
+
+    def test_migration_backfills_counters(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        self.articles[2].like(self.users[0])
+        self.articles[2].rate(self.users[1], 3)
+        Article.objects.update(likes_count=0, rating_sum=0, rating_count=0)
+
+        import_module('articles.migrations.0005_interaction_counters').backfill_counters(apps, None)
+        article = Article.objects.get(pk=self.articles[2].pk)
+        self.assertEqual((article.likes_count, article.rating_sum, article.rating_count), (1, 3, 1))
@@ -0,0 +1,201 @@
+"""
+تخزين مؤقت لمشاهدات المقالات (Buffered article view tracking).
+
+``Article.track_view`` no longer writes on every hit. A view is first
+deduplicated per (article, user, ip) for ``ARTICLE_VIEW_DEDUPE_SECONDS``
+through the cache (``cache.add`` is atomic). The dedupe relies on the cache
+being shared between workers (``SHARED_CACHE``, Redis): with a per-process
+cache a miss is confirmed against the ``ArticleView`` rows of the window,
+so another worker's flushed views still count. The view is then appended
+to an in-process buffer.
+
+The buffer is flushed when it holds ``ARTICLE_VIEW_BUFFER_SIZE`` events (on
+the request that crosses the limit), by the request that finds it an
+``ARTICLE_VIEW_FLUSH_SECONDS`` interval old, and at process exit: one
+``bulk_create`` of
+``ArticleView`` rows and one ``UPDATE ... SET views_count = views_count + n``
+per distinct ``n``. A killed worker loses at most one interval of views.
+``ArticleView.created_at`` is therefore the flush time, at most one flush
+interval after the actual view. Each flush also adds its views to the
+trending counters (``extras.trending``).
+
+Web workers can set ``ARTICLE_VIEW_FLUSH_THREAD`` (off by default, so
+management commands and tests start no thread) to also flush every interval
+from a daemon thread, started with the first buffered view of the process,
+so views do not wait for more traffic.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+_buffer = []
+_lock = threading.Lock()
+_last_flush = [time.monotonic()]
+# (thread, pid): a forked worker starts its own
+_flusher = [None, None]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    return x_forwarded_for.split(',')[0].strip() if x_forwarded_for else request.META.get('REMOTE_ADDR')
+
+
+def _dedupe_key(article_id, user_id, ip_address):
+    raw = f'{article_id}:{user_id or ""}:{ip_address or ""}'
+    return 'articles:view:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _already_counted(article_id, user_id, ip_address, window):
+    if not cache.add(_dedupe_key(article_id, user_id, ip_address), 1, window):
+        return True
+    if _setting('SHARED_CACHE', True):
+        return False
+    # The cache is this process's own: another worker may have counted it
+    from django.utils import timezone
+
+    from .models_interaction import ArticleView
+
+    viewer = {'user_id': user_id} if user_id else {'user__isnull': True, 'ip_address': ip_address}
+    return ArticleView.objects.filter(
+        article_id=article_id, created_at__gte=timezone.now() - timedelta(seconds=window), **viewer
+    ).exists()
+
+
+def record_view(article_id, user_id=None, ip_address=None, user_agent=''):
+    """
+    Buffer a view. Returns False when the same viewer was already counted
+    within the dedupe window.
+    """
+    window = _setting('ARTICLE_VIEW_DEDUPE_SECONDS', 30 * 60)
+    if window and _already_counted(article_id, user_id, ip_address, window):
+        return False
+
+    with _lock:
+        _buffer.append((article_id, user_id, ip_address, user_agent or ''))
+        size = len(_buffer)
+    _ensure_flusher()
+    if size >= _setting('ARTICLE_VIEW_BUFFER_SIZE', 500):
+        flush()
+    else:
+        flush_if_due()
+    return True
+
+
+def flush_if_due():
+    """Flush when the buffer holds views and the last flush is an interval old"""
+    if pending_count() and time.monotonic() - _last_flush[0] >= _setting('ARTICLE_VIEW_FLUSH_SECONDS', 10):
+        return flush()
+    return 0
+
+
+def _ensure_flusher():
+    if not _setting('ARTICLE_VIEW_FLUSH_THREAD', False):
+        return
+    thread, pid = _flusher
+    if thread is not None and pid == os.getpid() and thread.is_alive():
+        return
+    with _lock:
+        if _flusher[0] is not thread:
+            return
+        thread = threading.Thread(target=_flush_periodically, name='article-view-flusher', daemon=True)
+        _flusher[:] = [thread, os.getpid()]
+    thread.start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(_setting('ARTICLE_VIEW_FLUSH_SECONDS', 10))
+        try:
+            flush_if_due()
+        except Exception:
+            logger.exception("Periodic article view flush failed")
+        finally:
+            # The thread's own connection; idle between ticks
+            connection.close()
+
+
+def record_request_view(article, request):
+    user = request.user if request.user.is_authenticated else None
+    return record_view(
+        article.pk,
+        user_id=user.pk if user else None,
+        ip_address=client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+def pending_count():
+    with _lock:
+        return len(_buffer)
+
+
+def flush():
+    """Write buffered views. Returns the number of views written."""
+    from .models import Article
+    from .models_interaction import ArticleView
+
+    with _lock:
+        events = _buffer[:]
+        _buffer.clear()
+        _last_flush[0] = time.monotonic()
+    if not events:
+        return 0
+
+    try:
+        # Articles deleted since the view was buffered are dropped
+        existing = set(
+            Article.objects.filter(pk__in={event[0] for event in events})
+            .values_list('pk', flat=True)
+        )
+        rows = [event for event in events if event[0] in existing]
+        by_increment = defaultdict(list)
+        for article_id, increment in Counter(event[0] for event in rows).items():
+            by_increment[increment].append(article_id)
+
+        with transaction.atomic():
+            ArticleView.objects.bulk_create(
+                [
+                    ArticleView(article_id=article_id, user_id=user_id,
+                                ip_address=ip_address, user_agent=user_agent)
+                    for article_id, user_id, ip_address, user_agent in rows
+                ],
+                batch_size=500,
+            )
+            for increment, article_ids in by_increment.items():
+                Article.objects.filter(pk__in=article_ids).update(
+                    views_count=F('views_count') + increment
+                )
+    except Exception:
+        logger.exception("Could not flush %d article views; keeping them buffered", len(events))
+        with _lock:
+            limit = _setting('ARTICLE_VIEW_BUFFER_SIZE', 500) * 10
+            _buffer[:0] = events[-limit:]
+        return 0
+
+    from extras.trending import record
+    record('article', 'view', Counter(event[0] for event in rows))
+    return len(rows)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
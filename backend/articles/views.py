@@ -3,8 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django.db.models import Q, Count
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from core.db_router import use_replica
+from extras import trending
 from .models import BookCategory, Article, ArticleComment
 from .serializers import (
     BookCategorySerializer, ArticleSerializer, 
@@ -94,14 +97,19 @@ class RecentArticlesView(generics.ListAPIView):
 
 
 class PopularArticlesView(generics.ListAPIView):
-    queryset = Article.objects.filter(status='published').select_related('author', 'author__profile').order_by('-views_count')[:10]
+    """Trending articles (decayed recent activity), padded with the most viewed"""
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        articles = Article.objects.filter(status='published').select_related('author', 'author__profile')
+        return trending.ranked(articles, 'article', 10, fallback=articles.order_by('-views_count'))
+
 
 
 
 
+@method_decorator(use_replica, name='list')
 class ArticleSearchView(generics.ListAPIView):
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -168,6 +168,8 @@ class ArticleRatingViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, mix
         """Get rating statistics for an article"""
         article = get_object_or_404(Article, pk=article_pk)
         
+        # Average and count come from the stored counters; only the
+        # per-star distribution is aggregated
         stats = {
             'average_rating': article.get_average_rating(),
             'rating_count': article.get_rating_count(),
@@ -197,10 +199,12 @@ class ArticleViewViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Track the view
-        view = article.track_view(request)
-        serializer = self.get_serializer(view)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # Track the view (buffered, written in bulk)
+        counted = article.track_view(request)
+        return Response(
+            {"article": article.pk, "counted": counted},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class UserInteractionViewSet(viewsets.GenericViewSet):
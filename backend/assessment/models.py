@@ -6,6 +6,8 @@ from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 import json
 
+from users.models import TrackedFieldsMixin
+
 User = get_user_model()
 
 
@@ -416,8 +418,9 @@ class QuestionBankTopic(models.Model):
         return self.questions.count()
 
 
-class QuestionBank(models.Model):
+class QuestionBank(TrackedFieldsMixin, models.Model):
     """Question bank for reusable questions across assessments"""
+    tracked_fields = ('image',)
     
     QUESTION_TYPES = [
         ('mcq', _('Multiple Choice Question')),
@@ -1019,8 +1022,9 @@ class FlashcardTopic(models.Model):
         return self.flashcards.count()
 
 
-class Flashcard(models.Model):
+class Flashcard(TrackedFieldsMixin, models.Model):
     """Specialized model for flashcards (optional)"""
+    tracked_fields = ('front_image', 'back_image')
     
     front_text = models.TextField(verbose_name=_('Front Text'))
     back_text = models.TextField(verbose_name=_('Back Text'))
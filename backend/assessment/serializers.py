@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from core.image_variants import image_srcset
 from .models import (
     Assessment, QuestionBank, AssessmentQuestions, 
     StudentSubmission, StudentAnswer, Flashcard, StudentFlashcardProgress,
@@ -223,6 +224,8 @@ class FlashcardSerializer(serializers.ModelSerializer):
     product_title = serializers.CharField(source='product.title', read_only=True)
     topic_title = serializers.CharField(source='topic.title', read_only=True)
     chapter_title = serializers.CharField(source='chapter.title', read_only=True)
+    front_image_srcset = serializers.SerializerMethodField()
+    back_image_srcset = serializers.SerializerMethodField()
     
     
     class Meta:
@@ -230,11 +233,17 @@ class FlashcardSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'front_text', 'back_text', 'related_question', 'related_question_text',
             'product', 'product_title', 'topic', 'topic_title', 'chapter_title',
-            'tags', 'front_image', 'back_image', 'created_by', 'created_by_name', 
-            'created_at', 'updated_at'
+            'tags', 'front_image', 'back_image', 'front_image_srcset', 'back_image_srcset',
+            'created_by', 'created_by_name', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at']
 
+    def get_front_image_srcset(self, obj):
+        return image_srcset(obj.front_image, self.context.get('request'))
+
+    def get_back_image_srcset(self, obj):
+        return image_srcset(obj.back_image, self.context.get('request'))
+
 
 class StudentFlashcardProgressSerializer(serializers.ModelSerializer):
     """Serializer for StudentFlashcardProgress model"""
@@ -1,5 +1,5 @@
 from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from core.signal_registry import receiver
 from django.utils import timezone
 from .models import Assessment, StudentSubmission, StudentAnswer
 
@@ -5,3 +5,7 @@ class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
     verbose_name = 'Content'
+
+    def ready(self):
+        """Import signals when the app is ready"""
+        import content.signals  # noqa
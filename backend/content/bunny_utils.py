@@ -1,13 +1,54 @@
 """
 Bunny CDN integration utilities for video management
+
+All API calls go through one pooled ``requests.Session`` with timeouts.
+Video metadata is cached per (library, video id): found videos for
+``VIDEO_INFO_TTL`` seconds and missing ones for ``VIDEO_INFO_MISSING_TTL``.
+``BunnyCDNClient.get_videos_info`` resolves many ids at once with a bounded
+thread pool. The optional ``BUNNY_CDN_CONFIG`` keys ``TIMEOUT``,
+``VIDEO_INFO_TTL``, ``VIDEO_INFO_MISSING_TTL``, ``MAX_WORKERS`` and
+``BASE_URL`` tune this; ``BASE_URL`` can point at a local stub server.
 """
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from typing import Optional, Dict, Any
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, Iterable
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+DEFAULT_VIDEO_INFO_TTL = 300
+DEFAULT_VIDEO_INFO_MISSING_TTL = 60
+DEFAULT_MAX_WORKERS = 8
+# Cached in place of the metadata of a video that does not exist
+MISSING = '__missing__'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide HTTP session with a connection pool sized for batch fetches"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'BUNNY_CDN_CONFIG', {}).get('MAX_WORKERS', DEFAULT_MAX_WORKERS)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 10))
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def video_info_cache_key(library_id, video_id) -> str:
+    return f'bunny:video:{library_id}:{video_id}'
+
 
 class BunnyCDNClient:
     """
@@ -15,46 +56,120 @@ class BunnyCDNClient:
     """
     
     def __init__(self):
+        config = getattr(settings, 'BUNNY_CDN_CONFIG', {})
         self.api_key = getattr(settings, 'BUNNY_CDN_API_KEY', None)
         self.library_id = getattr(settings, 'BUNNY_CDN_LIBRARY_ID', None)
         self.token_auth_key = getattr(settings, 'BUNNY_CDN_TOKEN_AUTH_KEY', None)
-        self.base_url = f"https://video.bunnycdn.com/library/{self.library_id}"
+        self.base_url = config.get('BASE_URL') or f"https://video.bunnycdn.com/library/{self.library_id}"
+        self.timeout = config.get('TIMEOUT', DEFAULT_TIMEOUT)
+        self.info_ttl = config.get('VIDEO_INFO_TTL', DEFAULT_VIDEO_INFO_TTL)
+        self.missing_ttl = config.get('VIDEO_INFO_MISSING_TTL', DEFAULT_VIDEO_INFO_MISSING_TTL)
+        self.max_workers = config.get('MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        self.session = get_session()
         self.headers = {
             'AccessKey': self.api_key,
             'Content-Type': 'application/json'
         }
     
-    def get_video_info(self, video_id: str) -> Optional[Dict[str, Any]]:
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key and self.library_id)
+    
+    def _fetch_video_info(self, video_id: str):
         """
-        Get video information from Bunny CDN
-        
-        Args:
-            video_id (str): The Bunny CDN video ID
-            
-        Returns:
-            Dict containing video information or None if not found
+        Fetch video metadata from the API.
+        Returns the metadata, ``MISSING`` for 404, or None on errors (not cached).
         """
-        if not self.api_key or not self.library_id:
-            logger.warning("Bunny CDN API key or Library ID not configured")
-            return None
-            
         try:
             url = f"{self.base_url}/videos/{video_id}"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 404:
                 logger.warning(f"Video {video_id} not found on Bunny CDN")
-                return None
+                return MISSING
             else:
                 logger.error(f"Error fetching video {video_id}: {response.status_code} - {response.text}")
                 return None
                 
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logger.error(f"Request error fetching video {video_id}: {str(e)}")
             return None
     
+    def _store(self, video_id, info):
+        if info == MISSING:
+            cache.set(video_info_cache_key(self.library_id, video_id), MISSING, self.missing_ttl)
+        elif info is not None:
+            cache.set(video_info_cache_key(self.library_id, video_id), info, self.info_ttl)
+    
+    def get_video_info(self, video_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get video information from Bunny CDN
+        
+        Args:
+            video_id (str): The Bunny CDN video ID
+            use_cache (bool): Serve from / refresh the metadata cache
+            
+        Returns:
+            Dict containing video information or None if not found
+        """
+        if not self.is_configured:
+            logger.warning("Bunny CDN API key or Library ID not configured")
+            return None
+        
+        if use_cache:
+            cached = cache.get(video_info_cache_key(self.library_id, video_id))
+            if cached is not None:
+                return None if cached == MISSING else cached
+        
+        info = self._fetch_video_info(video_id)
+        self._store(video_id, info)
+        return None if info == MISSING else info
+    
+    def get_videos_info(self, video_ids: Iterable[str], max_workers: int = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get information for many videos: cached ones with one cache round
+        trip, the rest concurrently with at most ``max_workers`` requests.
+        
+        Returns:
+            Dict mapping each video id to its information (None if not found)
+        """
+        video_ids = list(dict.fromkeys(v for v in video_ids if v))
+        if not video_ids or not self.is_configured:
+            return {video_id: None for video_id in video_ids}
+        
+        keys = {video_info_cache_key(self.library_id, v): v for v in video_ids}
+        cached = cache.get_many(list(keys))
+        results = {keys[key]: value for key, value in cached.items()}
+        misses = [v for v in video_ids if v not in results]
+        
+        if misses:
+            workers = min(max_workers or self.max_workers, len(misses))
+            if workers <= 1:
+                fetched = [self._fetch_video_info(v) for v in misses]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    fetched = list(pool.map(self._fetch_video_info, misses))
+            to_cache = {}
+            for video_id, info in zip(misses, fetched):
+                results[video_id] = info
+                if info == MISSING:
+                    self._store(video_id, MISSING)
+                elif info is not None:
+                    to_cache[video_info_cache_key(self.library_id, video_id)] = info
+            if to_cache:
+                cache.set_many(to_cache, self.info_ttl)
+        
+        return {
+            video_id: None if results.get(video_id) == MISSING else results.get(video_id)
+            for video_id in video_ids
+        }
+    
+    def invalidate_video_info(self, video_id: str):
+        """Drop cached metadata, e.g. after a video was replaced"""
+        cache.delete(video_info_cache_key(self.library_id, video_id))
+    
     def get_video_url(self, video_id: str) -> Optional[str]:
         """
         Get the streaming URL for a video
@@ -182,40 +297,14 @@ def get_bunny_private_url(video_id: str, user_id: int = None, expires_in: int =
     Args:
         video_id (str): The Bunny CDN video ID
         user_id (int): User ID for additional security (optional)
-        expires_in (int): Token expiration time in seconds (default: 1 hour)
+        expires_in (int): Minimum token lifetime in seconds (default: 1 hour);
+            the expiry is rounded up to the signing bucket, see video_signing
         
     Returns:
         Private streaming URL with token authentication
     """
-    import time
-    import hashlib
-    import hmac
-    
-    cdn_hostname = getattr(settings, 'BUNNY_CDN_CONFIG', {}).get('CDN_HOSTNAME', '')
-    token_auth_key = getattr(settings, 'BUNNY_CDN_TOKEN_AUTH_KEY', None)
-    
-    if not cdn_hostname or not token_auth_key:
-        return ""
-    
-    # Generate token
-    expires = int(time.time()) + expires_in
-    token_data = f"{video_id}:{expires}"
-    if user_id:
-        token_data += f":{user_id}"
-    
-    # Create HMAC signature
-    signature = hmac.new(
-        token_auth_key.encode('utf-8'),
-        token_data.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
-    
-    # Create token
-    token = f"{expires}:{signature}"
-    if user_id:
-        token += f":{user_id}"
-    
-    return f"https://{cdn_hostname}/{video_id}/play_720p.mp4?token={token}"
+    from .video_signing import get_signer
+    return get_signer().private_url(video_id, user_id, expires_in)
 
 
 def get_bunny_private_embed_url(video_id: str, user_id: int = None, expires_in: int = 3600, 
@@ -227,7 +316,7 @@ def get_bunny_private_embed_url(video_id: str, user_id: int = None, expires_in:
     Args:
         video_id (str): The Bunny CDN video ID
         user_id (int): User ID for additional security (optional)
-        expires_in (int): Token expiration time in seconds (default: 1 hour)
+        expires_in (int): Minimum token lifetime in seconds (default: 1 hour)
         autoplay (bool): Whether to autoplay the video
         loop (bool): Whether to loop the video
         muted (bool): Whether to start muted
@@ -236,45 +325,11 @@ def get_bunny_private_embed_url(video_id: str, user_id: int = None, expires_in:
     Returns:
         Private embed URL with token authentication
     """
-    import time
-    import hashlib
-    import hmac
-    
-    library_id = getattr(settings, 'BUNNY_CDN_LIBRARY_ID', '')
-    token_auth_key = getattr(settings, 'BUNNY_CDN_TOKEN_AUTH_KEY', None)
-    
-    if not library_id or not token_auth_key:
-        return ""
-    
-    # Generate token
-    expires = int(time.time()) + expires_in
-    token_data = f"{video_id}:{expires}"
-    if user_id:
-        token_data += f":{user_id}"
-    
-    # Create HMAC signature
-    signature = hmac.new(
-        token_auth_key.encode('utf-8'),
-        token_data.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
-    
-    # Create token
-    token = f"{expires}:{signature}"
-    if user_id:
-        token += f":{user_id}"
-    
-    params = {
-        'autoplay': str(autoplay).lower(),
-        'loop': str(loop).lower(),
-        'muted': str(muted).lower(),
-        'responsive': 'true',
-        'startTime': str(start_time),
-        'token': token
-    }
-    
-    param_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-    return f"https://iframe.mediadelivery.net/embed/{library_id}/{video_id}?{param_string}"
+    from .video_signing import get_signer
+    return get_signer().private_embed_url(
+        video_id, user_id, expires_in,
+        autoplay=autoplay, loop=loop, muted=muted, start_time=start_time
+    )
 
 
 # Model helper functions
@@ -291,7 +346,7 @@ def update_module_bunny_video(module, video_id: str) -> bool:
     """
     try:
         client = BunnyCDNClient()
-        video_info = client.get_video_info(video_id)
+        video_info = client.get_video_info(video_id, use_cache=False)
         
         if video_info:
             module.bunny_video_id = video_id
@@ -325,7 +380,7 @@ def update_lesson_bunny_video(lesson, video_id: str) -> bool:
     """
     try:
         client = BunnyCDNClient()
-        video_info = client.get_video_info(video_id)
+        video_info = client.get_video_info(video_id, use_cache=False)
         
         if video_info:
             lesson.bunny_video_id = video_id
@@ -359,7 +414,7 @@ def update_course_bunny_promotional_video(course, video_id: str) -> bool:
     """
     try:
         client = BunnyCDNClient()
-        video_info = client.get_video_info(video_id)
+        video_info = client.get_video_info(video_id, use_cache=False)
         
         if video_info:
             course.bunny_promotional_video_id = video_id
@@ -0,0 +1,286 @@
+"""
+رفع الملفات الكبيرة على دفعات قابلة للاستئناف (Resumable chunked uploads).
+
+A tus-like protocol for module videos/PDFs and lesson resource files:
+
+1. ``POST uploads/`` opens an ``UploadSession`` for a target object. The file
+   name and declared size are validated up front, the final storage name is
+   reserved and a sparse ``<name>.part`` file of the full size is created
+   next to it.
+2. ``PUT uploads/<id>/chunks/<n>/`` streams chunk ``n`` (``chunk_size`` bytes,
+   the last one shorter) straight into the ``.part`` file at its offset. An
+   ``Upload-Checksum: <sha256|sha1|md5> <base64 digest>`` header is verified
+   (mismatch: 460); the chunk is recorded only once it is written. Chunks may
+   arrive in any order, in parallel, and be retried.
+3. ``GET uploads/<id>/`` reports received / missing chunks, so a client
+   resumes after a network blip by sending only what is missing.
+4. ``POST uploads/<id>/complete/`` checks that every chunk is present and
+   renames the ``.part`` file into place (no copy) and sets the file field.
+
+The request body is read in small blocks, never buffered whole. Chunk files
+are written through ``storage.path()``, so the target storage must be on the
+local filesystem (the default ``FileSystemStorage``).
+"""
+import base64
+import hashlib
+import os
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import FileExtensionValidator
+from django.db import transaction
+from django.utils import timezone
+
+READ_BLOCK_SIZE = 1024 * 1024
+CHECKSUM_ALGORITHMS = {'sha256': hashlib.sha256, 'sha1': hashlib.sha1, 'md5': hashlib.md5}
+
+
+class UploadError(Exception):
+    """Protocol error, reported to the client with ``status``"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _target_field(target):
+    from .models import UploadSession
+    return {
+        UploadSession.Target.MODULE_VIDEO: 'video',
+        UploadSession.Target.MODULE_PDF: 'pdf',
+        UploadSession.Target.RESOURCE_FILE: 'file',
+    }[target]
+
+
+def resolve_target(target, object_id):
+    """Return ``(instance, course_id)`` for an upload target"""
+    from .models import LessonResource, Module, UploadSession
+
+    if target not in UploadSession.Target.values:
+        raise UploadError(f'Unknown upload target: {target}')
+    try:
+        if target == UploadSession.Target.RESOURCE_FILE:
+            resource = LessonResource.objects.select_related('lesson__module__course').get(pk=object_id)
+            return resource, resource.lesson.module.course_id
+        module = Module.objects.select_related('course').get(pk=object_id)
+        return module, module.course_id
+    except (LessonResource.DoesNotExist, Module.DoesNotExist, ValueError, TypeError):
+        raise UploadError('Upload target not found', status=404)
+
+
+def _part_path(field, storage_name):
+    try:
+        return field.storage.path(storage_name) + '.part'
+    except NotImplementedError:
+        raise UploadError('Chunked uploads need a local filesystem storage', status=501)
+
+
+def create_session(user, target, instance, filename, total_size, chunk_size=None):
+    """Validate the upload, reserve the storage name and create the .part file"""
+    from .models import UploadSession
+
+    field = instance._meta.get_field(_target_field(target))
+    filename = os.path.basename(str(filename or '')).strip()
+    if not filename:
+        raise UploadError('A file name is required')
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be an integer')
+    max_mb = _setting('CHUNKED_UPLOAD_MAX_MB', 2048)
+    if total_size <= 0 or total_size > max_mb * 1024 * 1024:
+        raise UploadError(f'The maximum file size that can be uploaded is {max_mb}MB', status=413)
+    for validator in field.validators:
+        if isinstance(validator, FileExtensionValidator):
+            try:
+                validator(SimpleNamespace(name=filename))
+            except ValidationError as exc:
+                raise UploadError(exc.messages[0])
+
+    default_chunk = _setting('CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+    chunk_size = int(chunk_size or default_chunk)
+    chunk_size = min(max(chunk_size, 256 * 1024), _setting('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024))
+
+    storage_name = field.storage.get_available_name(field.generate_filename(instance, filename))
+    part_path = _part_path(field, storage_name)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    with open(part_path, 'wb') as part:
+        part.truncate(total_size)  # sparse on most filesystems
+
+    return UploadSession.objects.create(
+        user=user,
+        target=target,
+        object_id=instance.pk,
+        filename=filename,
+        storage_name=storage_name,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        expires_at=timezone.now() + timedelta(hours=_setting('CHUNKED_UPLOAD_EXPIRY_HOURS', 24)),
+    )
+
+
+def _session_field(session):
+    from .models import LessonResource, Module, UploadSession
+    model = LessonResource if session.target == UploadSession.Target.RESOURCE_FILE else Module
+    return model._meta.get_field(_target_field(session.target))
+
+
+def _check_open(session):
+    if session.status != session.Status.UPLOADING:
+        raise UploadError(f'Upload is {session.status}', status=409)
+    if session.expires_at <= timezone.now():
+        raise UploadError('Upload session expired', status=410)
+
+
+def _parse_checksum(header):
+    if not header:
+        return None
+    try:
+        algorithm, digest = header.split(None, 1)
+        return algorithm.lower(), base64.b64decode(digest.strip(), validate=True)
+    except ValueError:
+        raise UploadError('Malformed Upload-Checksum header')
+
+
+def write_chunk(session, index, stream, length, checksum_header=None):
+    """
+    Stream chunk ``index`` from ``stream`` into the session's .part file.
+    Returns the ``UploadChunk``.
+    """
+    from .models import UploadChunk
+
+    _check_open(session)
+    if not 0 <= index < session.total_chunks:
+        raise UploadError(f'Chunk index out of range (0-{session.total_chunks - 1})')
+    expected = session.chunk_length(index)
+    if length != expected:
+        raise UploadError(f'Chunk {index} must be {expected} bytes, got {length}', status=413 if length > expected else 400)
+
+    checksum = _parse_checksum(checksum_header)
+    if checksum and checksum[0] not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f'Unsupported checksum algorithm: {checksum[0]}')
+    sha256 = hashlib.sha256()
+    client_hash = CHECKSUM_ALGORITHMS[checksum[0]]() if checksum and checksum[0] != 'sha256' else None
+
+    part_path = _part_path(_session_field(session), session.storage_name)
+    # The bytes at this offset are about to change: forget the old chunk
+    # until the new one has been fully received and verified
+    UploadChunk.objects.filter(session=session, index=index).delete()
+    received = 0
+    try:
+        with open(part_path, 'r+b') as part:
+            part.seek(index * session.chunk_size)
+            while received < expected:
+                block = stream.read(min(READ_BLOCK_SIZE, expected - received))
+                if not block:
+                    break
+                part.write(block)
+                sha256.update(block)
+                if client_hash is not None:
+                    client_hash.update(block)
+                received += len(block)
+    except FileNotFoundError:
+        raise UploadError('Upload data is gone; start a new upload', status=410)
+    if received != expected:
+        raise UploadError(f'Chunk {index} ended after {received} of {expected} bytes')
+
+    if checksum:
+        digest = (client_hash or sha256).digest()
+        if digest != checksum[1]:
+            # The chunk stays missing until a retry overwrites these bytes
+            raise UploadError('Checksum mismatch', status=460, chunk=index)
+
+    return UploadChunk.objects.create(
+        session=session, index=index, size=expected, checksum=sha256.hexdigest(),
+    )
+
+
+def get_progress(session):
+    """Received and missing chunks of ``session`` (one query)"""
+    if session.status == session.Status.COMPLETE:
+        received_indexes, received_bytes = list(range(session.total_chunks)), session.total_size
+    else:
+        rows = list(session.chunks.order_by('index').values_list('index', 'size'))
+        received_indexes = [index for index, _ in rows]
+        received_bytes = sum(size for _, size in rows)
+    received = set(received_indexes)
+    return {
+        'id': str(session.id),
+        'target': session.target,
+        'object_id': session.object_id,
+        'filename': session.filename,
+        'status': session.status,
+        'total_size': session.total_size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received_chunks': len(received_indexes),
+        'received_bytes': received_bytes,
+        'percent': round(received_bytes * 100 / session.total_size, 1) if session.total_size else 0,
+        'missing_chunks': [i for i in range(session.total_chunks) if i not in received],
+        'expires_at': session.expires_at,
+    }
+
+
+def complete_session(session):
+    """Move the assembled file into place and attach it to the target object"""
+    from .models import UploadSession
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return session
+        _check_open(session)
+        progress = get_progress(session)
+        if progress['missing_chunks'] or progress['received_bytes'] != session.total_size:
+            raise UploadError('Upload is incomplete', status=409,
+                              missing_chunks=progress['missing_chunks'][:100])
+
+        instance, _ = resolve_target(session.target, session.object_id)
+        field = _session_field(session)
+        name = session.storage_name
+        if field.storage.exists(name):
+            name = field.storage.get_available_name(name)
+        os.replace(_part_path(field, session.storage_name), field.storage.path(name))
+
+        setattr(instance, field.name, name)
+        instance.save(update_fields=[field.name])
+        session.storage_name = name
+        session.status = UploadSession.Status.COMPLETE
+        session.completed_at = timezone.now()
+        session.save(update_fields=['storage_name', 'status', 'completed_at', 'updated_at'])
+        session.chunks.all().delete()
+    return session
+
+
+def abort_session(session):
+    """Drop the partial data of an unfinished session"""
+    if session.status != session.Status.UPLOADING:
+        return
+    try:
+        os.remove(_part_path(_session_field(session), session.storage_name))
+    except (FileNotFoundError, UploadError):
+        pass
+    session.status = session.Status.ABORTED
+    session.save(update_fields=['status', 'updated_at'])
+    session.chunks.all().delete()
+
+
+def purge_expired(now=None):
+    """Abort every unfinished session past its expiry. Returns the count."""
+    from .models import UploadSession
+
+    expired = UploadSession.objects.filter(
+        status=UploadSession.Status.UPLOADING, expires_at__lt=now or timezone.now()
+    )
+    count = 0
+    for session in expired.iterator():
+        abort_session(session)
+        count += 1
+    return count
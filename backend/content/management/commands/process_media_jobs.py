@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from content.media_pipeline import process_pending, retry_failed
+
+
+class Command(BaseCommand):
+    help = 'Process queued media jobs (video probing, posters, HLS packaging)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=10,
+                            help='Jobs claimed per batch (default 10)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Jobs run in parallel (default MEDIA_PIPELINE_WORKERS)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the queue instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep between polls in --loop mode (default 5)')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Move all failed jobs back to the queue and exit')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            count = retry_failed()
+            self.stdout.write(self.style.SUCCESS(f'Requeued {count} failed jobs'))
+            return
+
+        total = 0
+        try:
+            while True:
+                claimed = process_pending(limit=options['batch'], workers=options['workers'])
+                total += claimed
+                if claimed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} media jobs'))
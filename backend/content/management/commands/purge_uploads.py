@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.chunked_upload import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Abort expired chunked uploads and delete their partial files (run from cron)'
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired uploads'))
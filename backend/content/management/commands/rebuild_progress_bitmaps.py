@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from content.progress_bitmap import rebuild_course_bitmaps, reset_bitmaps
+from content.sequence import rebuild_course_sequence
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user completion bitmaps (UserProgress.completed_modules / completed_lessons)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help='Only this course id (repeatable, default all courses)')
+        parser.add_argument('--lazy', action='store_true',
+                            help='Only clear the bitmaps; each one is rebuilt on its next read')
+
+    def handle(self, *args, **options):
+        course_ids = options['courses'] or list(Course.objects.values_list('id', flat=True))
+
+        if options['lazy']:
+            count = sum(reset_bitmaps(course_id) for course_id in course_ids)
+            self.stdout.write(self.style.SUCCESS(f'Cleared the bitmaps of {count} progress rows'))
+            return
+
+        total = 0
+        for course_id in course_ids:
+            # Positions first: the bitmaps are indexed by them
+            rebuild_course_sequence(course_id)
+            total += rebuild_course_bitmaps(course_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the bitmaps of {total} progress rows in {len(course_ids)} courses'
+        ))
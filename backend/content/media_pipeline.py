@@ -0,0 +1,165 @@
+"""
+خط معالجة الوسائط في الخلفية (Background media pipeline).
+
+Uploading a file that needs processing (a module video, an image, a PDF) queues a
+``MediaJob``; ``manage.py process_media_jobs`` claims due jobs and runs
+them in a bounded thread pool (``MEDIA_PIPELINE_WORKERS``). The heavy work
+happens in ffmpeg subprocesses or in Pillow, which releases the GIL while
+decoding and resampling, so threads are enough to keep several jobs busy
+without sharing state with the web workers.
+
+A job names its target by model, primary key and file field, plus the
+stored file name at queue time: when the file has been replaced since,
+the job is skipped (the new upload queued its own). Handlers raise
+``PermanentError`` for failures a retry cannot fix (missing tool, storage
+without local paths); other errors are retried with exponential backoff
+up to ``MEDIA_PIPELINE_MAX_ATTEMPTS``.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(instance, field_file) returning a JSON-serializable result
+HANDLERS = {
+    'video': 'content.video_processing.process_module_video',
+    'image': 'core.image_variants.process_image_job',
+    'pdf': 'core.pdf_pages.process_pdf_job',
+}
+
+
+class PermanentError(Exception):
+    """A job failure that retrying cannot fix"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(instance, field_name, kind):
+    """Queue ``kind`` processing of ``instance.<field_name>``; returns the job"""
+    from .models import MediaJob
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return None
+    target = {'model': instance._meta.label_lower, 'object_id': str(instance.pk), 'field_name': field_name}
+    # A queued job for an older upload of the same field is superseded
+    MediaJob.objects.filter(kind=kind, status=MediaJob.Status.PENDING, **target).delete()
+    return MediaJob.objects.create(kind=kind, source_name=field_file.name, **target)
+
+
+def release_stale(timeout=None):
+    """Put jobs stuck in ``processing`` (crashed worker) back in the queue"""
+    from .models import MediaJob
+
+    timeout = timeout or _setting('MEDIA_PIPELINE_LOCK_SECONDS', 6 * 60 * 60)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return MediaJob.objects.filter(status=MediaJob.Status.PROCESSING, started_at__lt=cutoff).update(
+        status=MediaJob.Status.PENDING
+    )
+
+
+def claim_batch(limit=10):
+    """Mark up to ``limit`` due jobs as processing and return them"""
+    from .models import MediaJob
+
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = MediaJob.objects.filter(
+            status=MediaJob.Status.PENDING, run_after__lte=now
+        ).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        jobs = list(candidates[:limit])
+        if jobs:
+            MediaJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=MediaJob.Status.PROCESSING, started_at=now
+            )
+    for job in jobs:
+        job.status, job.started_at = MediaJob.Status.PROCESSING, now
+    return jobs
+
+
+def _finish(job, **fields):
+    from .models import MediaJob
+
+    for name, value in fields.items():
+        setattr(job, name, value)
+    MediaJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    from .models import MediaJob
+
+    instance = apps.get_model(job.model).objects.filter(pk=job.object_id).first()
+    field_file = getattr(instance, job.field_name, None) if instance is not None else None
+    if not field_file or field_file.name != job.source_name:
+        _finish(job, status=MediaJob.Status.DONE, finished_at=timezone.now(),
+                result={'skipped': 'file removed or replaced'})
+        return True
+
+    try:
+        result = import_string(HANDLERS[job.kind])(instance, field_file)
+    except Exception as exc:
+        attempts = job.attempts + 1
+        error = f'{type(exc).__name__}: {exc}'[:4000]
+        if isinstance(exc, PermanentError) or attempts >= _setting('MEDIA_PIPELINE_MAX_ATTEMPTS', 3):
+            logger.error("Media job %s failed: %s", job.pk, error)
+            _finish(job, status=MediaJob.Status.FAILED, attempts=attempts, last_error=error,
+                    finished_at=timezone.now())
+        else:
+            logger.warning("Media job %s failed (attempt %d), retrying: %s", job.pk, attempts, error)
+            delay = _setting('MEDIA_PIPELINE_BACKOFF_SECONDS', 60) * 2 ** (attempts - 1)
+            _finish(job, status=MediaJob.Status.PENDING, attempts=attempts, last_error=error,
+                    run_after=timezone.now() + timedelta(seconds=delay))
+        return False
+
+    _finish(job, status=MediaJob.Status.DONE, result=result or {}, last_error='',
+            finished_at=timezone.now())
+    return True
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        # The pool thread's own connection: close it, or every batch leaks one
+        connection.close()
+
+
+def process_pending(limit=10, workers=None):
+    """
+    Claim and run one batch of due jobs, at most ``workers`` at a time.
+    Returns the number of jobs claimed.
+    """
+    release_stale()
+    jobs = claim_batch(limit)
+    if not jobs:
+        return 0
+    workers = workers or _setting('MEDIA_PIPELINE_WORKERS', 2)
+    if workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            run_job(job)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_run_in_thread, jobs))
+    return len(jobs)
+
+
+def retry_failed(ids=None):
+    """Move failed jobs (all, or the given ids) back to the queue"""
+    from .models import MediaJob
+
+    queryset = MediaJob.objects.filter(status=MediaJob.Status.FAILED)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.update(status=MediaJob.Status.PENDING, attempts=0, run_after=timezone.now())
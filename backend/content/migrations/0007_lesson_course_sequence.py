@@ -0,0 +1,69 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_lesson_sequences(apps, schema_editor):
+    """
+    Compute the course-wide lesson sequence for existing courses.
+
+    A frozen copy of the ordering of ``content.sequence`` at this point, so
+    later changes to that module do not change what this migration does.
+    """
+    Module = apps.get_model('content', 'Module')
+    Lesson = apps.get_model('content', 'Lesson')
+    for course_id in Module.objects.values_list('course_id', flat=True).distinct():
+        modules = Module.objects.filter(course_id=course_id, is_active=True).values_list('id', 'submodule_id', 'order')
+        children = {}
+        module_ids = set()
+        for module_id, parent_id, order in modules:
+            module_ids.add(module_id)
+            children.setdefault(parent_id, []).append((order, module_id))
+        # Modules whose parent is missing/inactive are treated as top level
+        stack = sorted((m for parent, items in children.items()
+                        if parent is None or parent not in module_ids for m in items), reverse=True)
+        lessons_by_module = {}
+        for lesson_id, module_id, order in Lesson.objects.filter(
+            module__course_id=course_id, is_active=True
+        ).values_list('id', 'module_id', 'order'):
+            lessons_by_module.setdefault(module_id, []).append((order, lesson_id))
+
+        sequence = []
+        while stack:
+            _, module_id = stack.pop()
+            sequence.extend(lesson_id for _, lesson_id in sorted(lessons_by_module.get(module_id, [])))
+            stack.extend(sorted(children.get(module_id, []), reverse=True))
+
+        for position, lesson_id in enumerate(sequence):
+            Lesson.objects.filter(pk=lesson_id).update(
+                course_position=position,
+                previous_in_course_id=sequence[position - 1] if position > 0 else None,
+                next_in_course_id=sequence[position + 1] if position + 1 < len(sequence) else None,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_remove_lesson_slug_global_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='course_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Position of the lesson in the course-wide lesson sequence', null=True, verbose_name='position in course'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='next_in_course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='content.lesson', verbose_name='next lesson in course'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='previous_in_course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='content.lesson', verbose_name='previous lesson in course'),
+        ),
+        migrations.RunPython(build_lesson_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('content', '0007_lesson_course_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('module_video', 'Module video'), ('module_pdf', 'Module PDF'), ('resource_file', 'Lesson resource file')], max_length=20, verbose_name='target')),
+                ('object_id', models.PositiveIntegerField(verbose_name='object id')),
+                ('filename', models.CharField(max_length=255, verbose_name='file name')),
+                ('storage_name', models.CharField(help_text='Final path in the media storage; chunks go to <path>.part', max_length=500, verbose_name='storage name')),
+                ('total_size', models.BigIntegerField(verbose_name='total size (bytes)')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='chunk size (bytes)')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete'), ('aborted', 'Aborted')], default='uploading', max_length=20, verbose_name='status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('expires_at', models.DateTimeField(verbose_name='expires at')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='completed at')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'upload session',
+                'verbose_name_plural': 'upload sessions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='index')),
+                ('size', models.PositiveIntegerField(verbose_name='size (bytes)')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('received_at', models.DateTimeField(auto_now=True, verbose_name='received at')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='content.uploadsession', verbose_name='upload session')),
+            ],
+            options={
+                'verbose_name': 'upload chunk',
+                'verbose_name_plural': 'upload chunks',
+                'ordering': ['session', 'index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'expires_at'], name='content_upl_status_eb088c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='unique_upload_chunk'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:11
+
+import content.models
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='hls_manifest',
+            field=models.CharField(blank=True, default='', help_text='Storage path of the HLS master playlist of the uploaded video', max_length=500, verbose_name='HLS manifest'),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='video_codec',
+            field=models.CharField(blank=True, default='', help_text='Codec of the uploaded video, as probed by ffprobe', max_length=50, verbose_name='video codec'),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='video_height',
+            field=models.PositiveIntegerField(default=0, help_text='Height of the uploaded video in pixels', verbose_name='video height'),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='video_poster',
+            field=models.ImageField(blank=True, help_text='Frame extracted from the uploaded video', null=True, upload_to=content.models.module_poster_upload_path, verbose_name='video poster'),
+        ),
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('video', 'Video processing')], max_length=20, verbose_name='kind')),
+                ('model', models.CharField(help_text='app_label.ModelName of the target', max_length=100, verbose_name='model')),
+                ('object_id', models.PositiveIntegerField(verbose_name='object id')),
+                ('field_name', models.CharField(max_length=50, verbose_name='field name')),
+                ('source_name', models.CharField(help_text='Stored file name when the job was queued; a newer upload supersedes the job', max_length=500, verbose_name='source file')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='run after')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='last error')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='result')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+            ],
+            options={
+                'verbose_name': 'media job',
+                'verbose_name_plural': 'media jobs',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='content_med_status_f92224_idx'), models.Index(fields=['model', 'object_id', 'field_name'], name='content_med_model_fbebc1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_media_pipeline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('video', 'Video processing'), ('image', 'Image variants')], max_length=20, verbose_name='kind'),
+        ),
+        migrations.AlterField(
+            model_name='mediajob',
+            name='object_id',
+            field=models.CharField(max_length=64, verbose_name='object id'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_media_job_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of pages of the uploaded PDF, filled in by the media pipeline', verbose_name='PDF page count'),
+        ),
+        migrations.AlterField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('video', 'Video processing'), ('image', 'Image variants'), ('pdf', 'PDF pages')], max_length=20, verbose_name='kind'),
+        ),
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.modelname of the document', max_length=100, verbose_name='model')),
+                ('object_id', models.CharField(max_length=64, verbose_name='object id')),
+                ('source_name', models.CharField(help_text='Stored name of the PDF the page was extracted from', max_length=500, verbose_name='source file')),
+                ('number', models.PositiveIntegerField(verbose_name='page number')),
+                ('text', models.TextField(blank=True, default='', verbose_name='text')),
+                ('image', models.CharField(blank=True, default='', help_text='Storage path of the rendered page; empty until rendered', max_length=500, verbose_name='preview image')),
+                ('width', models.PositiveIntegerField(default=0, verbose_name='width')),
+                ('height', models.PositiveIntegerField(default=0, verbose_name='height')),
+            ],
+            options={
+                'verbose_name': 'document page',
+                'verbose_name_plural': 'document pages',
+                'ordering': ['model', 'object_id', 'number'],
+                'unique_together': {('model', 'object_id', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:47
+
+from django.db import migrations, models
+
+
+def build_module_positions(apps, schema_editor):
+    """
+    Number the modules of existing courses; bitmaps are filled on first read.
+
+    A frozen copy of the module ordering of ``content.sequence``, using
+    only the historical model.
+    """
+    Module = apps.get_model('content', 'Module')
+    for course_id in Module.objects.values_list('course_id', flat=True).distinct():
+        children = {}
+        module_ids = set()
+        for module_id, parent_id, order in Module.objects.filter(
+            course_id=course_id, is_active=True
+        ).values_list('id', 'submodule_id', 'order'):
+            module_ids.add(module_id)
+            children.setdefault(parent_id, []).append((order, module_id))
+        # Modules whose parent is missing/inactive are treated as top level
+        stack = sorted((m for parent, items in children.items()
+                        if parent is None or parent not in module_ids for m in items), reverse=True)
+        position = 0
+        while stack:
+            _, module_id = stack.pop()
+            Module.objects.filter(pk=module_id).update(course_position=position)
+            position += 1
+            stack.extend(sorted(children.get(module_id, []), reverse=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_document_pages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='course_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Position of the module in the course-wide module sequence', null=True, verbose_name='position in course'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='completed_lessons',
+            field=models.BinaryField(help_text='Bitmap of completed lessons by position in the course', null=True, verbose_name='completed lessons'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='completed_modules',
+            field=models.BinaryField(help_text='Bitmap of completed modules by position in the course', null=True, verbose_name='completed modules'),
+        ),
+        migrations.RunPython(build_module_positions, migrations.RunPython.noop),
+    ]
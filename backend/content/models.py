@@ -3,7 +3,7 @@ from django.db.models import Max
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from core.signal_registry import receiver
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.conf import settings
 from django.utils.text import slugify
@@ -11,8 +11,12 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 import os
+import uuid
 from urllib.parse import urlparse
 
+from users.models import TrackedFieldsMixin
+from .sequence import SequenceFieldsMixin
+
 User = get_user_model()
 
 def validate_file_size(value):
@@ -30,12 +34,19 @@ def module_pdf_upload_path(instance, filename):
     """Generate upload path for module PDFs"""
     return f'courses/{instance.course.id}/modules/{instance.id}/pdfs/{filename}'
 
+def module_poster_upload_path(instance, filename):
+    """Generate upload path for posters extracted from module videos"""
+    return f'courses/{instance.course.id}/modules/{instance.id}/posters/{filename}'
+
 
-class Module(models.Model):
+class Module(SequenceFieldsMixin, TrackedFieldsMixin, models.Model):
     """
     Represents a learning module within a course.
     Each module can contain multiple lessons and resources.
     """
+    tracked_fields = ('course_id', 'order', 'submodule_id', 'is_active', 'video', 'pdf')
+    sequence_fields = ('course_position',)
+
     class ModuleStatus(models.TextChoices):
         DRAFT = 'draft', _('Draft')
         PUBLISHED = 'published', _('Published')
@@ -83,6 +94,33 @@ class Module(models.Model):
         default=0,
         help_text=_('Duration of the video in seconds')
     )
+    # Filled in by the media pipeline (content.media_pipeline) after an upload
+    video_codec = models.CharField(
+        _('video codec'),
+        max_length=50,
+        blank=True,
+        default='',
+        help_text=_('Codec of the uploaded video, as probed by ffprobe')
+    )
+    video_height = models.PositiveIntegerField(
+        _('video height'),
+        default=0,
+        help_text=_('Height of the uploaded video in pixels')
+    )
+    video_poster = models.ImageField(
+        _('video poster'),
+        upload_to=module_poster_upload_path,
+        null=True,
+        blank=True,
+        help_text=_('Frame extracted from the uploaded video')
+    )
+    hls_manifest = models.CharField(
+        _('HLS manifest'),
+        max_length=500,
+        blank=True,
+        default='',
+        help_text=_('Storage path of the HLS master playlist of the uploaded video')
+    )
     # Bunny CDN integration fields
     bunny_video_id = models.CharField(
         _('Bunny video ID'),
@@ -108,6 +146,11 @@ class Module(models.Model):
         ],
         help_text=_('Upload a PDF file (max 100MB)')
     )
+    pdf_page_count = models.PositiveIntegerField(
+        _('PDF page count'),
+        default=0,
+        help_text=_('Number of pages of the uploaded PDF, filled in by the media pipeline')
+    )
     note = models.TextField(
         _('instructor notes'),
         blank=True,
@@ -131,6 +174,14 @@ class Module(models.Model):
         default=0,
         help_text=_('The order in which the module appears in the course')
     )
+    # Maintained by content.sequence, indexes UserProgress.completed_modules
+    course_position = models.PositiveIntegerField(
+        _('position in course'),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Position of the module in the course-wide module sequence')
+    )
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     published_at = models.DateTimeField(_('published at'), null=True, blank=True)
@@ -202,7 +253,7 @@ class Module(models.Model):
         else:
             self.full_clean()
         super().save(*args, **kwargs)
-        
+
         # Update course's updated_at timestamp
         from django.utils import timezone
         self.course.updated_at = timezone.now()
@@ -263,15 +314,19 @@ class Module(models.Model):
             from content.bunny_utils import get_bunny_embed_url
             return get_bunny_embed_url(self.bunny_video_id)
         elif self.video:
-            return self.video.url
+            from core.protected_media import protected_url
+            return protected_url('module-video', self)
         return None
 
 
-class Lesson(models.Model):
+class Lesson(SequenceFieldsMixin, TrackedFieldsMixin, models.Model):
     """
     Represents a single lesson within a module.
     Lessons are the primary content units that students interact with.
     """
+    tracked_fields = ('order', 'module_id', 'is_active')
+    sequence_fields = ('course_position', 'previous_in_course', 'next_in_course')
+
     class LessonType(models.TextChoices):
         VIDEO = 'video', _('Video')
         ARTICLE = 'article', _('Article')
@@ -376,6 +431,32 @@ class Lesson(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     published_at = models.DateTimeField(_('published at'), null=True, blank=True)
+    # Precomputed course-wide navigation, maintained by content.sequence
+    course_position = models.PositiveIntegerField(
+        _('position in course'),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Position of the lesson in the course-wide lesson sequence')
+    )
+    previous_in_course = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('previous lesson in course')
+    )
+    next_in_course = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('next lesson in course')
+    )
     resources = models.ManyToManyField(
         'LessonResource',
         blank=True,
@@ -456,21 +537,13 @@ class Lesson(models.Model):
     
     @property
     def next_lesson(self):
-        """Get the next lesson in the module, if any"""
-        return Lesson.objects.filter(
-            module=self.module,
-            order__gt=self.order,
-            is_active=True
-        ).order_by('order').first()
+        """Get the next active lesson in the course (across modules), if any"""
+        return self.next_in_course
     
     @property
     def previous_lesson(self):
-        """Get the previous lesson in the module, if any"""
-        return Lesson.objects.filter(
-            module=self.module,
-            order__lt=self.order,
-            is_active=True
-        ).order_by('-order').first()
+        """Get the previous active lesson in the course (across modules), if any"""
+        return self.previous_in_course
     
     @property
     def has_bunny_video(self):
@@ -577,6 +650,20 @@ class UserProgress(models.Model):
         null=True,
         help_text=_('User notes for this course')
     )
+    # Completion bitmaps (see content.progress_bitmap): bit N is set when the
+    # module / lesson at course_position N is completed. NULL = not computed
+    completed_modules = models.BinaryField(
+        _('completed modules'),
+        null=True,
+        editable=False,
+        help_text=_('Bitmap of completed modules by position in the course')
+    )
+    completed_lessons = models.BinaryField(
+        _('completed lessons'),
+        null=True,
+        editable=False,
+        help_text=_('Bitmap of completed lessons by position in the course')
+    )
 
     class Meta:
         verbose_name = _('user progress')
@@ -637,25 +724,25 @@ class UserProgress(models.Model):
         Returns:
             float: The updated progress percentage
         """
-        from django.db.models import Count, Case, When, FloatField
-        
+        from .progress_bitmap import set_completed_modules
+
         # Calculate progress based on completed modules
-        module_progress = ModuleProgress.objects.filter(
+        module_progress = list(ModuleProgress.objects.filter(
             user=self.user,
             module__course=self.course
-        ).aggregate(
-            total=Count('id'),
-            completed=Count(Case(
-                When(is_completed=True, then=1),
-                output_field=FloatField()
-            ))
-        )
+        ).values_list('is_completed', 'module__course_position'))
+        completed = [position for is_completed, position in module_progress if is_completed]
         
-        if module_progress['total'] > 0:
-            self.overall_progress = (module_progress['completed'] / module_progress['total']) * 100
+        if module_progress:
+            self.overall_progress = (len(completed) / len(module_progress)) * 100
         else:
             self.overall_progress = 0
         
+        # The lesson bitmap is only recomputed on a completion transition
+        bitmaps_changed = set_completed_modules(
+            self, [position for position in completed if position is not None]
+        )
+        
         # Update status based on progress
         if self.overall_progress >= 100:
             self.status = self.CompletionStatus.COMPLETED
@@ -674,7 +761,7 @@ class UserProgress(models.Model):
                 'status', 
                 'completed_at', 
                 'started_at'
-            ])
+            ] + (['completed_modules', 'completed_lessons'] if bitmaps_changed else []))
         
         return self.overall_progress
     
@@ -1199,6 +1286,181 @@ class LessonResource(models.Model):
         return icon_map.get(self.resource_type, 'file')
 
 
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a module video/PDF or a lesson resource
+    file (see content.chunked_upload).
+    """
+    class Target(models.TextChoices):
+        MODULE_VIDEO = 'module_video', _('Module video')
+        MODULE_PDF = 'module_pdf', _('Module PDF')
+        RESOURCE_FILE = 'resource_file', _('Lesson resource file')
+
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', _('Uploading')
+        COMPLETE = 'complete', _('Complete')
+        ABORTED = 'aborted', _('Aborted')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name=_('user')
+    )
+    target = models.CharField(_('target'), max_length=20, choices=Target.choices)
+    object_id = models.PositiveIntegerField(_('object id'))
+    filename = models.CharField(_('file name'), max_length=255)
+    storage_name = models.CharField(
+        _('storage name'),
+        max_length=500,
+        help_text=_('Final path in the media storage; chunks go to <path>.part')
+    )
+    total_size = models.BigIntegerField(_('total size (bytes)'))
+    chunk_size = models.PositiveIntegerField(_('chunk size (bytes)'))
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.UPLOADING
+    )
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    expires_at = models.DateTimeField(_('expires at'))
+    completed_at = models.DateTimeField(_('completed at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_target_display()} #{self.object_id})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Expected size of chunk ``index`` (the last one may be shorter)"""
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+
+class UploadChunk(models.Model):
+    """A chunk of an ``UploadSession`` that was written and verified"""
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name=_('upload session')
+    )
+    index = models.PositiveIntegerField(_('index'))
+    size = models.PositiveIntegerField(_('size (bytes)'))
+    checksum = models.CharField(_('SHA-256'), max_length=64)
+    received_at = models.DateTimeField(_('received at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('upload chunk')
+        verbose_name_plural = _('upload chunks')
+        ordering = ['session', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id} #{self.index}"
+
+class MediaJob(models.Model):
+    """
+    A background processing job for an uploaded file (see
+    content.media_pipeline), e.g. probing and HLS packaging of a module video
+    or the responsive variants of an image.
+    """
+    class Kind(models.TextChoices):
+        VIDEO = 'video', _('Video processing')
+        IMAGE = 'image', _('Image variants')
+        PDF = 'pdf', _('PDF pages')
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices)
+    model = models.CharField(_('model'), max_length=100, help_text=_('app_label.ModelName of the target'))
+    object_id = models.CharField(_('object id'), max_length=64)
+    field_name = models.CharField(_('field name'), max_length=50)
+    source_name = models.CharField(
+        _('source file'),
+        max_length=500,
+        help_text=_('Stored file name when the job was queued; a newer upload supersedes the job')
+    )
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    run_after = models.DateTimeField(_('run after'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True, default='')
+    result = models.JSONField(_('result'), default=dict, blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    started_at = models.DateTimeField(_('started at'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('media job')
+        verbose_name_plural = _('media jobs')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['model', 'object_id', 'field_name']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.model}#{self.object_id}.{self.field_name} ({self.status})"
+
+
+class DocumentPage(models.Model):
+    """
+    One page of an uploaded PDF (module PDF or book, see core.pdf_pages):
+    its extracted text, used by content search, and a pre-rendered preview
+    image so readers can show a page without downloading the whole file.
+    """
+    model = models.CharField(_('model'), max_length=100, help_text=_('app_label.modelname of the document'))
+    object_id = models.CharField(_('object id'), max_length=64)
+    source_name = models.CharField(
+        _('source file'),
+        max_length=500,
+        help_text=_('Stored name of the PDF the page was extracted from')
+    )
+    number = models.PositiveIntegerField(_('page number'))
+    text = models.TextField(_('text'), blank=True, default='')
+    image = models.CharField(
+        _('preview image'),
+        max_length=500,
+        blank=True,
+        default='',
+        help_text=_('Storage path of the rendered page; empty until rendered')
+    )
+    width = models.PositiveIntegerField(_('width'), default=0)
+    height = models.PositiveIntegerField(_('height'), default=0)
+
+    class Meta:
+        verbose_name = _('document page')
+        verbose_name_plural = _('document pages')
+        ordering = ['model', 'object_id', 'number']
+        unique_together = ('model', 'object_id', 'number')
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} p.{self.number}"
+
+
 # Signals
 @receiver(post_save, sender=UserProgress)
 def create_initial_module_progress(sender, instance, created, **kwargs):
@@ -0,0 +1,172 @@
+"""
+مخطط الدورة المجمّع (Compiled course outline).
+
+The outline of a course (active modules, submodules and lessons with formatted
+durations) is the same for every user, so it is built once per course version
+and kept in the cache. Per-user state (``locked`` / ``is_completed``) is laid
+over the cached blob from the user's completion bitmaps
+(``content.progress_bitmap``), matched on ``course_position``.
+
+Each course is a scope of the ``outline`` cache namespace
+(``core.tiered_cache``); its version is bumped by the signals in
+``content.signals`` whenever a course, module or lesson changes, which makes
+older blobs unreachable.
+"""
+import hashlib
+
+from core.tiered_cache import cache_ns
+
+
+OUTLINE_CACHE_TIMEOUT = 60 * 60 * 24
+# Part of the cache key: change it when the shape of the blob changes
+OUTLINE_FORMAT = 2
+
+
+def get_outline_version(course_id):
+    """Current outline version of a course"""
+    return cache_ns('outline', course_id).version()
+
+
+def bump_outline_version(course_id):
+    """Invalidate the compiled outline of a course"""
+    if course_id:
+        cache_ns('outline', course_id).bump()
+
+
+def format_duration(duration_minutes):
+    """Format minutes as '1س 30د' / '1س' / '45د' (empty for 0)"""
+    if not duration_minutes or duration_minutes <= 0:
+        return ""
+    hours = duration_minutes // 60
+    minutes = duration_minutes % 60
+    if hours > 0:
+        return f"{hours}س {minutes}د" if minutes > 0 else f"{hours}س"
+    return f"{minutes}د"
+
+
+def build_outline(course):
+    """Build the user-independent outline of ``course`` with two queries"""
+    from .models import Module, Lesson
+
+    modules = list(
+        Module.objects.filter(course=course, is_active=True)
+        .order_by('order')
+        .values('id', 'name', 'description', 'order', 'video_duration', 'submodule_id',
+                'course_position')
+    )
+    lessons_by_module = {}
+    lessons = (
+        Lesson.objects.filter(module__course=course, module__is_active=True, is_active=True)
+        .order_by('order')
+        .values('id', 'module_id', 'title', 'lesson_type', 'duration_minutes',
+                'order', 'is_free', 'description', 'course_position',
+                'previous_in_course_id', 'next_in_course_id', 'bunny_video_id')
+    )
+    for lesson in lessons:
+        lessons_by_module.setdefault(lesson['module_id'], []).append(lesson)
+
+    modules_data = []
+    for module in modules:
+        modules_data.append({
+            'id': module['id'],
+            'title': module['name'],
+            'description': module['description'],
+            'order': module['order'],
+            'video_duration': module['video_duration'],
+            'submodule': module['submodule_id'],
+            'course_position': module['course_position'],
+            'lessons': [
+                {
+                    'id': lesson['id'],
+                    'title': lesson['title'],
+                    'lesson_type': lesson['lesson_type'],
+                    'duration': format_duration(lesson['duration_minutes']),
+                    'duration_minutes': lesson['duration_minutes'],
+                    'order': lesson['order'],
+                    'is_preview': lesson['is_free'] or False,
+                    'is_free': lesson['is_free'] or False,
+                    'module_name': module['name'],
+                    'module_id': module['id'],
+                    'description': lesson['description'] or '',
+                    'course_position': lesson['course_position'],
+                    'previous_lesson_id': lesson['previous_in_course_id'],
+                    'next_lesson_id': lesson['next_in_course_id'],
+                    'bunny_video_id': lesson['bunny_video_id'] or None,
+                }
+                for lesson in lessons_by_module.get(module['id'], [])
+            ],
+        })
+
+    return {
+        'modules': modules_data,
+        'course': {
+            'id': course.id,
+            'title': course.title,
+            'description': course.description,
+        },
+    }
+
+
+def get_compiled_outline(course):
+    """
+    Return ``(version, outline)`` for ``course``, building and caching the
+    outline on a miss.
+    """
+    namespace = cache_ns('outline', course.id)
+    version = namespace.version()
+    outline = namespace.get_or_set(f'compiled:{OUTLINE_FORMAT}', lambda: build_outline(course), OUTLINE_CACHE_TIMEOUT,
+                                   version=version)
+    return version, outline
+
+
+def outline_etag(version, is_enrolled, is_instructor_or_admin, completion,
+                 user_id=None, signed_until=None):
+    """
+    Strong ETag covering the outline version, the user overlay and, when
+    signed video URLs are included, the user and token expiry bucket
+    """
+    raw = f'{version}|{int(is_enrolled)}|{int(is_instructor_or_admin)}|{completion.key}'
+    if user_id is not None:
+        raw += f'|{user_id}|{signed_until}'
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def overlay_user_state(outline, is_enrolled, is_instructor_or_admin, completion,
+                       user_id=None):
+    """
+    Copy of the outline modules with ``locked`` and ``is_completed`` filled in
+    from the ``completion`` bitmaps (``content.progress_bitmap.Completion``).
+    Locked lessons have their ``bunny_video_id`` blanked. For an authenticated ``user_id`` unlocked Bunny lessons also get a
+    ``private_video_url``, all signed in one pass.
+    """
+    has_access = is_enrolled or is_instructor_or_admin
+    signed = {}
+    if user_id is not None:
+        from .video_signing import sign_many
+        signed = sign_many(
+            (
+                lesson['bunny_video_id']
+                for module in outline['modules'] for lesson in module['lessons']
+                if lesson.get('bunny_video_id') and (has_access or lesson['is_free'])
+            ),
+            user_id=user_id,
+        )
+    modules = []
+    for module in outline['modules']:
+        lessons = []
+        for lesson in module['lessons']:
+            locked = not (has_access or lesson['is_free'])
+            lessons.append(dict(
+                lesson,
+                is_completed=completion.lesson_completed(lesson['course_position']),
+                locked=locked,
+                # The cached blob holds the raw id; a locked lesson must not expose it
+                bunny_video_id=None if locked else lesson.get('bunny_video_id'),
+                private_video_url=None if locked else signed.get(lesson.get('bunny_video_id')) or None,
+            ))
+        modules.append(dict(
+            module,
+            is_completed=completion.module_completed(module['course_position']),
+            lessons=lessons,
+        ))
+    return modules
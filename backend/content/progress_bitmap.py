@@ -0,0 +1,262 @@
+"""
+خرائط بتات الإكمال لكل مستخدم (Per-user completion bitmaps).
+
+``UserProgress.completed_modules`` / ``completed_lessons`` hold one bit per
+module / lesson of the course, indexed by its ``course_position`` (see
+``content.sequence``): bit N is set when the item at position N is
+completed. A lesson counts as completed when its module is, so the lesson
+bitmap is derived from the module bitmap and the course layout.
+
+Writers:
+
+* ``UserProgress.update_progress()`` (run on every ``ModuleProgress`` save)
+  recomputes the module bitmap from the progress rows it already reads, and
+  the lesson bitmap only when the module bitmap changed;
+* ``rebuild_course_sequence()`` clears, when modules or lessons move, the
+  bitmaps of the users who completed a module at or after the first moved
+  position (``invalidate_course_bitmaps()``).
+
+Readers call ``get_completion(user, course)`` (``get_completions()`` for
+lists of courses): one column read that is intersected with the cached
+outline in memory, instead of a scan of the user's ``ModuleProgress`` rows.
+NULL bitmaps (rows created before this existed, cleared after a move, or
+reset by ``manage.py rebuild_progress_bitmaps``) are computed on first read.
+"""
+from collections import namedtuple
+
+EMPTY = b''
+
+
+def to_bitmap(positions):
+    """Bitmap with the bits at ``positions`` set"""
+    positions = list(positions)
+    if not positions:
+        return EMPTY
+    bits = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bits[position // 8] |= 1 << (position % 8)
+    return bytes(bits)
+
+
+def has_position(bitmap, position):
+    """Whether the bit at ``position`` is set (False for None)"""
+    if position is None or not bitmap:
+        return False
+    index = position // 8
+    return index < len(bitmap) and bool(bitmap[index] & (1 << (position % 8)))
+
+
+def iter_positions(bitmap):
+    """Positions of the set bits, in order"""
+    for index, byte in enumerate(bitmap or EMPTY):
+        while byte:
+            low = byte & -byte
+            yield index * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def count_positions(bitmap):
+    return sum(bin(byte).count('1') for byte in bitmap or EMPTY)
+
+
+def _bytes(value):
+    # BinaryField reads back as memoryview on PostgreSQL
+    return None if value is None else bytes(value)
+
+
+def course_layout(course_id):
+    """``{module position: [lesson positions]}`` of the course sequence"""
+    from .models import Lesson
+
+    layout = {}
+    for module_position, lesson_position in Lesson.objects.filter(
+        module__course_id=course_id, course_position__isnull=False,
+        module__course_position__isnull=False,
+    ).values_list('module__course_position', 'course_position'):
+        layout.setdefault(module_position, []).append(lesson_position)
+    return layout
+
+
+def lesson_bitmap(module_positions, layout):
+    """Lesson bitmap for the completed ``module_positions``"""
+    return to_bitmap(
+        lesson_position
+        for module_position in module_positions
+        for lesson_position in layout.get(module_position, ())
+    )
+
+
+def set_completed_modules(user_progress, module_positions, layout=None):
+    """
+    Store the bitmaps of ``user_progress`` for the completed
+    ``module_positions`` (not saved). Returns whether they changed.
+    """
+    modules = to_bitmap(module_positions)
+    if modules == _bytes(user_progress.completed_modules) and user_progress.completed_lessons is not None:
+        return False
+    if layout is None:
+        layout = course_layout(user_progress.course_id)
+    user_progress.completed_modules = modules
+    user_progress.completed_lessons = lesson_bitmap(module_positions, layout)
+    return True
+
+
+def completed_module_positions(user_id, course_id):
+    """Positions of the modules the user has completed, from ``ModuleProgress``"""
+    from .models import ModuleProgress
+
+    return list(ModuleProgress.objects.filter(
+        user_id=user_id, module__course_id=course_id, is_completed=True,
+        module__course_position__isnull=False,
+    ).values_list('module__course_position', flat=True))
+
+
+class Completion(namedtuple('Completion', 'modules lessons')):
+    """The completion bitmaps of one user in one course"""
+    __slots__ = ()
+
+    def module_completed(self, position):
+        return has_position(self.modules, position)
+
+    def lesson_completed(self, position):
+        return has_position(self.lessons, position)
+
+    @property
+    def key(self):
+        """Short string identifying the state, for ETags"""
+        return f'{self.modules.hex()}:{self.lessons.hex()}'
+
+
+NO_COMPLETION = Completion(EMPTY, EMPTY)
+
+
+def _has_bitmaps(user_progress):
+    return user_progress.completed_modules is not None and user_progress.completed_lessons is not None
+
+
+def _completion(user_progress, course_id, positions):
+    """
+    Completion of one ``UserProgress`` row (or None), computing and storing
+    missing bitmaps from the completed module ``positions``.
+    """
+    from .models import UserProgress
+
+    if user_progress is None:
+        # Progress rows may exist without a UserProgress row
+        if not positions:
+            return NO_COMPLETION
+        return Completion(to_bitmap(positions), lesson_bitmap(positions, course_layout(course_id)))
+
+    if not _has_bitmaps(user_progress):
+        set_completed_modules(user_progress, positions)
+        UserProgress.objects.filter(pk=user_progress.pk).update(
+            completed_modules=user_progress.completed_modules,
+            completed_lessons=user_progress.completed_lessons,
+        )
+    return Completion(_bytes(user_progress.completed_modules), _bytes(user_progress.completed_lessons))
+
+
+def get_completion(user, course, user_progress=None):
+    """
+    Completion bitmaps of ``user`` in ``course`` (one query, none when the
+    ``UserProgress`` row is passed in).
+    """
+    from .models import UserProgress
+
+    if user is None:
+        return NO_COMPLETION
+    course_id = getattr(course, 'pk', course)
+    if user_progress is None:
+        user_progress = UserProgress.objects.filter(user=user, course_id=course_id).only(
+            'id', 'course_id', 'completed_modules', 'completed_lessons'
+        ).first()
+
+    positions = None
+    if user_progress is None or not _has_bitmaps(user_progress):
+        positions = completed_module_positions(user.pk, course_id)
+    return _completion(user_progress, course_id, positions)
+
+
+def get_completions(user, course_ids, user_progress=None):
+    """
+    ``{course id: Completion}`` of ``user`` in several courses, for lists:
+    one query for the ``UserProgress`` rows (none when ``user_progress``,
+    ``{course id: row}``, is passed in) and one for the courses without
+    bitmaps.
+    """
+    from .models import ModuleProgress, UserProgress
+
+    course_ids = list(course_ids)
+    if user is None:
+        return dict.fromkeys(course_ids, NO_COMPLETION)
+    if user_progress is None:
+        user_progress = {
+            row.course_id: row
+            for row in UserProgress.objects.filter(user=user, course_id__in=course_ids).only(
+                'id', 'course_id', 'completed_modules', 'completed_lessons'
+            )
+        }
+
+    pending = [
+        course_id for course_id in course_ids
+        if course_id not in user_progress or not _has_bitmaps(user_progress[course_id])
+    ]
+    positions = {}
+    if pending:
+        for course_id, position in ModuleProgress.objects.filter(
+            user_id=user.pk, module__course_id__in=pending, is_completed=True,
+            module__course_position__isnull=False,
+        ).values_list('module__course_id', 'module__course_position'):
+            positions.setdefault(course_id, []).append(position)
+
+    return {
+        course_id: _completion(user_progress.get(course_id), course_id, positions.get(course_id, []))
+        for course_id in course_ids
+    }
+
+
+def invalidate_course_bitmaps(course_id, first_position=0):
+    """
+    Mark as not computed the bitmaps of a course that have a module bit in
+    the byte of ``first_position`` or later (one UPDATE on the bitmap
+    length, no row is read). Users without completed modules keep their
+    empty bitmaps: nothing can move in them.
+    """
+    from django.db.models.functions import Length
+
+    from .models import UserProgress
+
+    return UserProgress.objects.filter(course_id=course_id).alias(
+        size=Length('completed_modules')
+    ).filter(size__gt=first_position // 8).update(completed_modules=None, completed_lessons=None)
+
+
+def rebuild_course_bitmaps(course_id, batch_size=500):
+    """Recompute every user's bitmaps of a course from ``ModuleProgress``"""
+    from .models import ModuleProgress, UserProgress
+
+    layout = course_layout(course_id)
+    positions_by_user = {}
+    for user_id, position in ModuleProgress.objects.filter(
+        module__course_id=course_id, is_completed=True, module__course_position__isnull=False,
+    ).values_list('user_id', 'module__course_position'):
+        positions_by_user.setdefault(user_id, []).append(position)
+
+    rows = []
+    for user_progress in UserProgress.objects.filter(course_id=course_id).only('id', 'user_id'):
+        positions = positions_by_user.get(user_progress.user_id, [])
+        user_progress.completed_modules = to_bitmap(positions)
+        user_progress.completed_lessons = lesson_bitmap(positions, layout)
+        rows.append(user_progress)
+    UserProgress.objects.bulk_update(rows, ['completed_modules', 'completed_lessons'], batch_size=batch_size)
+    return len(rows)
+
+
+def reset_bitmaps(course_id=None):
+    """Mark bitmaps as not computed: they are rebuilt on their next read"""
+    from .models import UserProgress
+
+    rows = UserProgress.objects.all()
+    if course_id is not None:
+        rows = rows.filter(course_id=course_id)
+    return rows.update(completed_modules=None, completed_lessons=None)
@@ -0,0 +1,181 @@
+"""
+تسلسل الدروس على مستوى الدورة (Course-wide lesson sequence).
+
+Every active lesson of a course gets a ``course_position`` and links to the
+previous/next active lesson, crossing module and submodule boundaries. The
+links are stored on the lesson rows so "continue to next lesson" is a column
+read. ``content.signals`` rebuilds the sequence whenever modules or lessons
+are created, deleted, reordered or (de)activated.
+
+Order: top-level modules by ``order``; inside a module its own lessons by
+``order`` first, then its submodules (recursively) by ``order``.
+
+Active modules get a ``course_position`` in the same order. Both positions
+index the per-user completion bitmaps (``content.progress_bitmap``):
+``rebuild_course_sequence()`` clears the bitmaps that index a moved
+position, and they are recomputed on their next read.
+
+These columns are only written here, with queryset ``update()`` /
+``bulk_update()``; ``SequenceFieldsMixin`` keeps ``save()`` from writing
+them back.
+"""
+from django.db import transaction
+
+
+class SequenceFieldsMixin:
+    """
+    Model mixin for the columns maintained by this module
+    (``sequence_fields``): ``save()`` never writes them, so an instance loaded
+    before a rebuild (admin form, serializer) cannot restore stale positions.
+    """
+    sequence_fields = ()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        values = [value for value in values if value[0].name not in self.sequence_fields]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+
+def module_order(modules):
+    """
+    Return module ids in course order.
+
+    ``modules`` is an iterable of ``(id, submodule_id, order)`` for active
+    modules.
+    """
+    children = {}
+    module_ids = set()
+    for module_id, parent_id, order in modules:
+        module_ids.add(module_id)
+        children.setdefault(parent_id, []).append((order, module_id))
+
+    ordered = []
+    # Modules whose parent is missing/inactive are treated as top level
+    roots = [m for parent, items in children.items()
+             if parent is None or parent not in module_ids for m in items]
+    stack = sorted(roots, reverse=True)
+    while stack:
+        _, module_id = stack.pop()
+        ordered.append(module_id)
+        stack.extend(sorted(children.get(module_id, []), reverse=True))
+    return ordered
+
+
+def linearize(modules, lessons):
+    """
+    Return lesson ids in course order.
+
+    ``modules`` is an iterable of ``(id, submodule_id, order)`` for active
+    modules, ``lessons`` an iterable of ``(id, module_id, order)`` for active
+    lessons.
+    """
+    lessons_by_module = {}
+    for lesson_id, module_id, order in lessons:
+        lessons_by_module.setdefault(module_id, []).append((order, lesson_id))
+
+    sequence = []
+    for module_id in module_order(modules):
+        sequence.extend(lesson_id for _, lesson_id in sorted(lessons_by_module.get(module_id, [])))
+    return sequence
+
+
+def rebuild_lesson_sequence(course_id, module_model=None, lesson_model=None):
+    """
+    Recompute ``course_position`` / ``previous_in_course`` / ``next_in_course``
+    for one course. Only rows whose links changed are written. Returns the
+    ids of the modules of those lessons.
+    """
+    if module_model is None or lesson_model is None:
+        from .models import Module, Lesson
+        module_model, lesson_model = Module, Lesson
+
+    modules = module_model.objects.filter(
+        course_id=course_id, is_active=True
+    ).values_list('id', 'submodule_id', 'order')
+    lessons = list(lesson_model.objects.filter(module__course_id=course_id).values_list(
+        'id', 'module_id', 'order', 'is_active',
+        'course_position', 'previous_in_course_id', 'next_in_course_id'
+    ))
+    sequence = linearize(
+        modules, ((lid, mid, order) for lid, mid, order, active, *_ in lessons if active)
+    )
+
+    wanted = {}
+    for position, lesson_id in enumerate(sequence):
+        wanted[lesson_id] = (
+            position,
+            sequence[position - 1] if position > 0 else None,
+            sequence[position + 1] if position + 1 < len(sequence) else None,
+        )
+
+    changed = []
+    changed_modules = set()
+    for lesson_id, module_id, _, _, position, previous_id, next_id in lessons:
+        target = wanted.get(lesson_id, (None, None, None))
+        if (position, previous_id, next_id) != target:
+            lesson = lesson_model(id=lesson_id)
+            lesson.course_position, lesson.previous_in_course_id, lesson.next_in_course_id = target
+            changed.append(lesson)
+            changed_modules.add(module_id)
+
+    if changed:
+        with transaction.atomic():
+            lesson_model.objects.bulk_update(
+                changed, ['course_position', 'previous_in_course', 'next_in_course'], batch_size=500
+            )
+    return changed_modules
+
+
+def rebuild_module_positions(course_id, module_model=None):
+    """
+    Recompute the modules' ``course_position`` for one course. Returns
+    ``{old position: new position}`` for the modules that moved (the new
+    position is None for a module that left the sequence).
+    """
+    if module_model is None:
+        from .models import Module
+        module_model = Module
+
+    modules = list(module_model.objects.filter(course_id=course_id).values_list(
+        'id', 'submodule_id', 'order', 'is_active', 'course_position'
+    ))
+    wanted = {
+        module_id: position
+        for position, module_id in enumerate(module_order(
+            (mid, parent_id, order) for mid, parent_id, order, active, _ in modules if active
+        ))
+    }
+
+    changed = []
+    moves = {}
+    for module_id, _, _, _, position in modules:
+        target = wanted.get(module_id)
+        if position != target:
+            changed.append(module_model(id=module_id, course_position=target))
+            if position is not None:
+                moves[position] = target
+
+    if changed:
+        with transaction.atomic():
+            module_model.objects.bulk_update(changed, ['course_position'], batch_size=500)
+    return moves if changed else None
+
+
+def rebuild_course_sequence(course_id):
+    """
+    Rebuild the lesson sequence and the module positions of one course.
+
+    Bits below the first module position that moved or whose lessons moved
+    are unchanged: only the users with a completed module from there on (to
+    the byte) get their bitmaps cleared, to be recomputed on their next read.
+    """
+    from .models import Module
+    from .progress_bitmap import invalidate_course_bitmaps
+
+    changed_modules = rebuild_lesson_sequence(course_id)
+    # Positions before the rebuild: the stored bitmaps index those
+    affected = set(Module.objects.filter(
+        pk__in=changed_modules, course_position__isnull=False
+    ).values_list('course_position', flat=True)) if changed_modules else set()
+    affected.update(rebuild_module_positions(course_id) or ())
+    if affected:
+        invalidate_course_bitmaps(course_id, min(affected))
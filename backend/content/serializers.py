@@ -2,9 +2,15 @@ from rest_framework import serializers
 from django.db.models import Count, Avg, Sum, Max
 from django.db import models
 from django.utils import timezone
+from django.urls import reverse
 from courses.models import Course, Enrollment
 from content.models import Module, UserProgress, ModuleProgress, Lesson, LessonResource
 from users.models import User
+from users.principal import get_principal
+from content.progress_bitmap import get_completion
+from core.interactions import SiblingListSerializer, sibling_instances
+from core.protected_media import ProtectedFileField, hls_url
+from content.video_signing import get_request_signer
 
 
 class ModuleProgressSerializer(serializers.ModelSerializer):
@@ -36,10 +42,11 @@ class ModuleProgressSerializer(serializers.ModelSerializer):
     
     def get_completed_lessons(self, obj):
         """Get number of completed lessons in the module"""
-        return obj.module.lessons.filter(
-            userprogress__user_id=obj.user.id,
-            userprogress__is_completed=True
-        ).count()
+        completion = get_completion(obj.user, obj.module.course_id)
+        positions = obj.module.lessons.filter(
+            is_active=True, course_position__isnull=False
+        ).values_list('course_position', flat=True)
+        return sum(completion.lesson_completed(position) for position in positions)
     
     def get_progress_percentage(self, obj):
         """Calculate progress percentage"""
@@ -127,7 +134,33 @@ class ModuleBasicSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'course_name', 'submodule_name', 'is_submodule', 'submodules_count']
 
 
-class ModuleDetailSerializer(serializers.ModelSerializer):
+class PrivateVideoURLMixin:
+    """
+    Adds ``private_video_url``: the token-signed Bunny embed URL for the
+    requesting user, if they may watch the video (free lesson, enrolled, or
+    managing the course). All videos of the serialized list are signed
+    together the first time one of them is rendered; serializers using it set
+    ``Meta.list_serializer_class = SiblingListSerializer``.
+    """
+
+    def _can_watch(self, obj):
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        if getattr(obj, 'is_free', False):
+            return True
+        course_id = obj.module.course_id if isinstance(obj, Lesson) else obj.course_id
+        principal = get_principal(request)
+        return principal.is_enrolled(course_id) or principal.can_manage_course(course_id)
+
+    def get_private_video_url(self, obj):
+        if not obj.bunny_video_id or not self._can_watch(obj):
+            return None
+        siblings = [getattr(item, 'bunny_video_id', None) for item in sibling_instances(self)]
+        return get_request_signer(self.context).url_for(obj.bunny_video_id, siblings)
+
+
+class ModuleDetailSerializer(PrivateVideoURLMixin, serializers.ModelSerializer):
     """Detailed serializer for Module model with user progress"""
     course_name = serializers.CharField(source='course.title', read_only=True)
     submodule_name = serializers.CharField(source='submodule.name', read_only=True)
@@ -136,9 +169,16 @@ class ModuleDetailSerializer(serializers.ModelSerializer):
     submodules = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
     lessons = serializers.SerializerMethodField()
+    private_video_url = serializers.SerializerMethodField()
     # Expose file fields so edit form can load/show existing uploads and allow updating
-    video = serializers.FileField(use_url=True, required=False, allow_null=True)
-    pdf = serializers.FileField(use_url=True, required=False, allow_null=True)
+    # Rendered as access-checked URLs (core.protected_media), not MEDIA_URL
+    video = ProtectedFileField('module-video', required=False, allow_null=True)
+    pdf = ProtectedFileField('module-pdf', required=False, allow_null=True)
+    # Filled in by the media pipeline once an uploaded video is processed
+    video_poster = ProtectedFileField('module-poster', read_only=True)
+    hls_url = serializers.SerializerMethodField()
+    # Page previews of the uploaded PDF (core.pdf_pages)
+    pdf_pages_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Module
@@ -146,9 +186,23 @@ class ModuleDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'course', 'course_name', 'submodule', 'submodule_name',
             'order', 'status', 'is_active', 'created_at', 'updated_at', 'user_progress',
             'lessons', 'video_duration', 'video', 'pdf', 'bunny_video_id', 'bunny_video_url',
+            'private_video_url', 'video_poster', 'hls_url', 'pdf_page_count', 'pdf_pages_url',
             'is_submodule', 'submodules_count', 'submodules'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'submodule_name', 'is_submodule', 'submodules_count', 'submodules']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'submodule_name', 'pdf_page_count',
+                            'is_submodule', 'submodules_count', 'submodules']
+        list_serializer_class = SiblingListSerializer
+
+    def get_pdf_pages_url(self, obj):
+        if not obj.pdf:
+            return None
+        url = reverse('document-pages', args=['module-pdf', obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_hls_url(self, obj):
+        """URL of the HLS master playlist of the uploaded video, if packaged"""
+        return hls_url(obj, self.context.get('request'))
 
     def update(self, instance, validated_data):
         """
@@ -234,34 +288,45 @@ class LessonBasicSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(PrivateVideoURLMixin, serializers.ModelSerializer):
     """Serializer used for embedding lessons inside ModuleDetailSerializer"""
+    previous_lesson_id = serializers.IntegerField(source='previous_in_course_id', read_only=True)
+    next_lesson_id = serializers.IntegerField(source='next_in_course_id', read_only=True)
+    private_video_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = Lesson
         fields = [
             'id', 'title', 'lesson_type', 'duration_minutes', 'order',
             'content', 'is_free', 'video_url', 'bunny_video_id', 'bunny_video_url',
-            'is_active', 'created_at', 'updated_at'
+            'private_video_url', 'is_active', 'created_at', 'updated_at',
+            'course_position', 'previous_lesson_id', 'next_lesson_id'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'course_position']
+        list_serializer_class = SiblingListSerializer
 
 
-class LessonDetailSerializer(serializers.ModelSerializer):
+class LessonDetailSerializer(PrivateVideoURLMixin, serializers.ModelSerializer):
     """Detailed serializer for Lesson model with content and progress"""
     module_title = serializers.CharField(source='module.title', read_only=True)
     course_id = serializers.IntegerField(source='module.course_id', read_only=True)
     course_title = serializers.CharField(source='module.course.title', read_only=True)
     user_progress = serializers.SerializerMethodField()
+    previous_lesson_id = serializers.IntegerField(source='previous_in_course_id', read_only=True)
+    next_lesson_id = serializers.IntegerField(source='next_in_course_id', read_only=True)
+    private_video_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Lesson
         fields = [
             'id', 'title', 'description', 'module', 'module_title', 'order',
             'is_active', 'created_at', 'updated_at', 'duration_minutes',
-            'video_url', 'bunny_video_id', 'bunny_video_url', 'content', 'resources', 'course_id',
-            'course_title', 'user_progress'
+            'video_url', 'bunny_video_id', 'bunny_video_url', 'private_video_url', 'content',
+            'resources', 'course_id', 'course_title', 'user_progress',
+            'course_position', 'previous_lesson_id', 'next_lesson_id'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'course_position']
+        list_serializer_class = SiblingListSerializer
     
     def get_user_progress(self, obj):
         request = self.context.get('request')
@@ -500,7 +565,7 @@ class ModuleSearchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Module
         fields = [
-            'id', 'title', 'description', 'course', 'course_title',
+            'id', 'name', 'description', 'course', 'course_title',
             'created_at', 'updated_at', 'content_type'
         ]
         read_only_fields = ['content_type']
@@ -511,7 +576,7 @@ class ModuleSearchSerializer(serializers.ModelSerializer):
 
 class LessonSearchSerializer(serializers.ModelSerializer):
     """Serializer for lesson search results"""
-    module_title = serializers.CharField(source='module.title', read_only=True)
+    module_title = serializers.CharField(source='module.name', read_only=True)
     course_title = serializers.CharField(source='module.course.title', read_only=True)
     content_type = serializers.SerializerMethodField()
     
@@ -530,7 +595,7 @@ class LessonSearchSerializer(serializers.ModelSerializer):
 class ResourceSearchSerializer(serializers.ModelSerializer):
     """Serializer for resource search results"""
     lesson_title = serializers.CharField(source='lesson.title', read_only=True)
-    module_title = serializers.CharField(source='lesson.module.title', read_only=True)
+    module_title = serializers.CharField(source='lesson.module.name', read_only=True)
     course_title = serializers.CharField(source='lesson.module.course.title', read_only=True)
     content_type = serializers.SerializerMethodField()
     
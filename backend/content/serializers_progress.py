@@ -71,28 +71,13 @@ class UserProgressSerializer(serializers.ModelSerializer):
 
     def get_next_lesson(self, obj):
         # Find the next lesson the user should complete
-        last_completed = obj.last_lesson_completed
-        if not last_completed:
-            # If no lessons completed yet, return first lesson of first module
-            first_module = obj.course.modules.first()
-            if first_module:
-                return first_module.lessons.first().id if first_module.lessons.exists() else None
-            return None
+        if obj.last_lesson_completed_id:
+            # Precomputed course-wide sequence (crosses module boundaries)
+            return Lesson.objects.filter(
+                pk=obj.last_lesson_completed_id
+            ).values_list('next_in_course_id', flat=True).first()
         
-        # Find next lesson in the same module
-        next_lesson = last_completed.module.lessons.filter(
-            order__gt=last_completed.order
-        ).order_by('order').first()
-        
-        if next_lesson:
-            return next_lesson.id
-        
-        # If no more lessons in this module, find first lesson in next module
-        next_module = obj.course.modules.filter(
-            order__gt=last_completed.module.order
-        ).order_by('order').first()
-        
-        if next_module and next_module.lessons.exists():
-            return next_module.lessons.order_by('order').first().id
-        
-        return None
+        # If no lessons completed yet, return the first lesson of the course
+        return Lesson.objects.filter(
+            module__course_id=obj.course_id, course_position=0
+        ).values_list('id', flat=True).first()
@@ -0,0 +1,107 @@
+"""
+Signals for the content app.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from core.signal_registry import receiver
+
+from core.pdf_pages import queue_pages
+from courses.models import Course
+from .models import Module, Lesson
+from .media_pipeline import enqueue as enqueue_media_job
+from .outline import bump_outline_version
+from .progress_bitmap import invalidate_course_bitmaps
+from .sequence import rebuild_course_sequence
+
+
+def _deleted_via(origin, model):
+    """
+    Whether a delete() started from ``model`` (instance or queryset).
+
+    Used to skip per-row work in cascades: when a module is deleted its
+    own handler covers all of its lessons, and nothing is left to rebuild
+    when the whole course is deleted.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def _lesson_course_id(lesson):
+    if 'module' in lesson._state.fields_cache:
+        return lesson.module.course_id
+    return Module.objects.filter(pk=lesson.module_id).values_list('course_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_outline_on_course_change(sender, instance, **kwargs):
+    bump_outline_version(instance.pk)
+
+
+# Module fields that move its lessons within the course sequence
+MODULE_SEQUENCE_FIELDS = ('course_id', 'order', 'submodule_id', 'is_active')
+
+
+@receiver(post_save, sender=Module)
+def module_saved(sender, instance, created, **kwargs):
+    bump_outline_version(instance.course_id)
+    if instance.has_changed('course_id'):
+        # Moved to another course: its lessons leave the old sequence too
+        old_course_id = instance.get_loaded_value('course_id')
+        bump_outline_version(old_course_id)
+        rebuild_course_sequence(old_course_id)
+        if instance.course_position is not None:
+            # Nothing may shift into its old position, but its bit is there
+            invalidate_course_bitmaps(old_course_id, instance.course_position)
+    # A new module needs a position; otherwise only moves and (de)activation matter
+    if created or any(instance.has_changed(field) for field in MODULE_SEQUENCE_FIELDS):
+        rebuild_course_sequence(instance.course_id)
+    # A new local video gets probed, a poster and HLS renditions in the background
+    if instance.video and (created or instance.has_changed('video')):
+        enqueue_media_job(instance, 'video', 'video')
+    # A new PDF is split into page previews and searchable text
+    if instance.pdf and (created or instance.has_changed('pdf')):
+        queue_pages(instance, 'pdf')
+
+
+@receiver(post_save, sender='articles.Book')
+def book_saved(sender, instance, update_fields=None, **kwargs):
+    # Counter updates save only their own field
+    if update_fields is not None and 'book_file' not in update_fields:
+        return
+    # Book has no tracked fields: queue_pages() skips files already split
+    queue_pages(instance, 'book_file')
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_via(origin, Course):
+        return
+    bump_outline_version(instance.course_id)
+    rebuild_course_sequence(instance.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    course_id = _lesson_course_id(instance)
+    bump_outline_version(course_id)
+    if instance.has_changed('module_id'):
+        old_course_id = Module.objects.filter(
+            pk=instance.get_loaded_value('module_id')
+        ).values_list('course_id', flat=True).first()
+        if old_course_id is not None and old_course_id != course_id:
+            # Moved to a module of another course: it leaves the old sequence
+            bump_outline_version(old_course_id)
+            rebuild_course_sequence(old_course_id)
+    if created or any(instance.has_changed(field) for field in Lesson.tracked_fields):
+        rebuild_course_sequence(course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    if origin is not None and not _deleted_via(origin, Lesson):
+        return
+    course_id = _lesson_course_id(instance)
+    bump_outline_version(course_id)
+    rebuild_course_sequence(course_id)
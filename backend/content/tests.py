@@ -0,0 +1,735 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from courses.models import Course, Enrollment
+from .bunny_utils import BunnyCDNClient
+from .models import Module, Lesson, ModuleProgress, UserProgress
+from .progress_bitmap import get_completion, iter_positions
+
+User = get_user_model()
+
+
+class CourseOutlineTest(TestCase):
+    """Test cases for the compiled course outline endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='student', password='testpass123')
+        self.course = Course.objects.create(title='Test Course', description='Test', price=10)
+        self.modules = [
+            Module.objects.create(course=self.course, name=f'Module {i}', order=i)
+            for i in range(1, 4)
+        ]
+        for module in self.modules:
+            for j in range(1, 3):
+                Lesson.objects.create(module=module, title=f'{module.name} L{j}', order=j, duration_minutes=75)
+        self.url = f'/api/content/course/{self.course.id}/modules-with-lessons/'
+
+    def test_outline_payload(self):
+        Enrollment.objects.create(student=self.user, course=self.course)
+        ModuleProgress.objects.create(user=self.user, module=self.modules[0], is_completed=True, status='completed')
+        self.client.force_authenticate(self.user)
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['modules']), 3)
+        first = data['modules'][0]['lessons'][0]
+        self.assertEqual(first['duration'], '1س 15د')
+        self.assertTrue(first['is_completed'])
+        self.assertFalse(first['locked'])
+        self.assertFalse(data['modules'][1]['lessons'][0]['is_completed'])
+
+    def test_outline_is_cached_per_version(self):
+        self.client.get(self.url)
+        # Only the course lookup; modules and lessons come from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertTrue(all(lesson['locked'] for lesson in response.json()['modules'][0]['lessons']))
+
+        Lesson.objects.create(module=self.modules[0], title='New lesson', order=3)
+        lessons = self.client.get(self.url).json()['modules'][0]['lessons']
+        self.assertEqual(len(lessons), 3)
+
+    def test_locked_lessons_hide_the_video_id(self):
+        Lesson.objects.filter(module=self.modules[0]).update(bunny_video_id='paid-video')
+        Lesson.objects.filter(pk=self.modules[0].lessons.order_by('order')[0].pk).update(
+            bunny_video_id='free-video', is_free=True)
+        self.modules[0].save()  # bump the outline version
+
+        for user in (None, self.user):
+            self.client.force_authenticate(user)
+            lessons = self.client.get(self.url).json()['modules'][0]['lessons']
+            self.assertEqual([lesson['bunny_video_id'] for lesson in lessons], ['free-video', None])
+            self.assertNotIn('paid-video', str(lessons))
+
+        Enrollment.objects.create(student=self.user, course=self.course)
+        lessons = self.client.get(self.url).json()['modules'][0]['lessons']
+        self.assertEqual(lessons[1]['bunny_video_id'], 'paid-video')
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.modules[1].name = 'Renamed'
+        self.modules[1].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class LessonSequenceTest(TestCase):
+    """Test cases for the precomputed course-wide lesson sequence"""
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Test Course', description='Test', price=10)
+        self.first = Module.objects.create(course=self.course, name='First', order=1)
+        self.second = Module.objects.create(course=self.course, name='Second', order=2)
+        self.child = Module.objects.create(course=self.course, name='Child', order=3, submodule=self.first)
+        self.a = Lesson.objects.create(module=self.first, title='A', order=1)
+        self.b = Lesson.objects.create(module=self.second, title='B', order=1)
+        self.c = Lesson.objects.create(module=self.child, title='C', order=1)
+        self.d = Lesson.objects.create(module=self.first, title='D', order=2)
+
+    def sequence(self):
+        return list(
+            Lesson.objects.filter(module__course=self.course, course_position__isnull=False)
+            .order_by('course_position').values_list('title', flat=True)
+        )
+
+    def test_sequence_crosses_module_boundaries(self):
+        # Parent module lessons, then its submodules, then the next module
+        self.assertEqual(self.sequence(), ['A', 'D', 'C', 'B'])
+        lesson = Lesson.objects.get(pk=self.c.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(lesson.next_in_course_id, self.b.id)
+            self.assertEqual(lesson.previous_in_course_id, self.d.id)
+
+    def test_sequence_rebuilt_on_reorder_and_delete(self):
+        self.first.order = 5
+        self.first.save()
+        self.assertEqual(self.sequence(), ['B', 'A', 'D', 'C'])
+
+        self.d.delete()
+        self.assertEqual(self.sequence(), ['B', 'A', 'C'])
+        self.assertEqual(Lesson.objects.get(pk=self.a.pk).next_in_course_id, self.c.id)
+
+        self.a.is_active = False
+        self.a.save()
+        self.assertEqual(self.sequence(), ['B', 'C'])
+
+    def test_saving_a_stale_instance_keeps_the_sequence(self):
+        module = Module.objects.get(pk=self.second.pk)
+        lesson = Lesson.objects.get(pk=self.b.pk)
+        self.d.delete()
+        # Full saves of instances loaded before the rebuild
+        module.name = 'Renamed'
+        module.save()
+        lesson.title = 'Renamed'
+        lesson.save()
+        self.assertEqual(self.sequence(), ['A', 'C', 'Renamed'])
+        self.assertEqual(
+            Lesson.objects.filter(pk=self.b.pk).values_list('course_position', 'previous_in_course_id').get(),
+            (2, self.c.id),
+        )
+        self.assertEqual(Module.objects.get(pk=self.second.pk).course_position, 2)
+
+
+    def test_moves_across_courses_rebuild_both_sequences(self):
+        other = Course.objects.create(title='Other Course', description='Test', price=10)
+        target = Module.objects.create(course=other, name='Target', order=1)
+
+        module = Module.objects.get(pk=self.second.pk)
+        module.course = other
+        module.save()
+        self.assertEqual(self.sequence(), ['A', 'D', 'C'])
+        self.assertIsNone(Lesson.objects.get(pk=self.c.pk).next_in_course_id)
+        self.assertEqual(Module.objects.get(pk=self.second.pk).course_position, 1)
+
+        lesson = Lesson.objects.get(pk=self.c.pk)
+        lesson.module = target
+        lesson.save()
+        self.assertEqual(self.sequence(), ['A', 'D'])
+        self.assertEqual(
+            list(Lesson.objects.filter(module__course=other).order_by('course_position')
+                 .values_list('title', flat=True)),
+            ['C', 'B'],
+        )
+        self.assertEqual(Lesson.objects.get(pk=self.b.pk).previous_in_course_id, self.c.id)
+
+
+class ProgressBitmapTest(TestCase):
+    """Test cases for the per-user completion bitmaps on UserProgress"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='testpass123')
+        self.course = Course.objects.create(title='Test Course', description='Test', price=10)
+        self.modules = [
+            Module.objects.create(course=self.course, name=f'Module {i}', order=i)
+            for i in range(1, 4)
+        ]
+        for module in self.modules:
+            for j in range(1, 3):
+                Lesson.objects.create(module=module, title=f'{module.name} L{j}', order=j)
+        self.progress = UserProgress.objects.create(user=self.user, course=self.course)
+
+    def complete(self, module, is_completed=True):
+        # UserProgress creation already made a progress row per module
+        progress = ModuleProgress.objects.get(user=self.user, module=module)
+        progress.is_completed = is_completed
+        progress.save()
+
+    def test_completion_transition_sets_bits(self):
+        self.complete(self.modules[1])
+        completion = get_completion(self.user, self.course)
+        self.assertEqual(list(iter_positions(completion.modules)), [1])
+        self.assertEqual(list(iter_positions(completion.lessons)), [2, 3])
+
+        self.complete(self.modules[1], is_completed=False)
+        self.assertEqual(get_completion(self.user, self.course).modules, b'')
+
+    def test_bits_follow_reorder(self):
+        self.complete(self.modules[0])
+        self.modules[0].order = 10
+        self.modules[0].save()
+        completion = get_completion(self.user, self.course)
+        self.assertEqual(list(iter_positions(completion.modules)), [2])
+        self.assertEqual(list(iter_positions(completion.lessons)), [4, 5])
+
+    def test_moves_clear_only_the_bitmaps_they_shift(self):
+        extra = [Module.objects.create(course=self.course, name=f'Extra {i}', order=i) for i in range(4, 12)]
+        other = User.objects.create_user(username='other', password='testpass123')
+        UserProgress.objects.create(user=other, course=self.course)
+        self.complete(self.modules[0])
+        progress, _ = ModuleProgress.objects.get_or_create(user=other, module=extra[-1])
+        progress.is_completed = True
+        progress.save()
+
+        # Positions 9 and 10 swap: a bitmap without bits past position 7 is kept
+        extra[-2].order = 20
+        extra[-2].save()
+        bitmaps = dict(UserProgress.objects.values_list('user_id', 'completed_modules'))
+        self.assertEqual((bytes(bitmaps[self.user.pk]), bitmaps[other.pk]), (b'\x01', None))
+        self.assertEqual(list(iter_positions(get_completion(other, self.course).modules)), [9])
+
+    def test_outline_overlay_reads_one_column(self):
+        Enrollment.objects.create(student=self.user, course=self.course)
+        self.complete(self.modules[2])
+        UserProgress.objects.filter(pk=self.progress.pk).update(completed_modules=None, completed_lessons=None)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/content/course/{self.course.id}/modules-with-lessons/'
+        # The first read computes the missing bitmaps
+        modules = client.get(url).json()['modules']
+        self.assertEqual([m['is_completed'] for m in modules], [False, False, True])
+        self.assertTrue(all(lesson['is_completed'] for lesson in modules[2]['lessons']))
+
+        progress = UserProgress.objects.get(pk=self.progress.pk)
+        with self.assertNumQueries(0):
+            completion = get_completion(self.user, self.course, user_progress=progress)
+        self.assertTrue(completion.module_completed(2))
+
+
+class _StubBunnyHandler(BaseHTTPRequestHandler):
+    """Serves /videos/<id>: 200 for ids starting with 'ok', 404 otherwise"""
+    requests_seen = []
+
+    def do_GET(self):
+        video_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+        self.requests_seen.append(video_id)
+        if video_id.startswith('ok'):
+            body = json.dumps({'guid': video_id, 'length': 90, 'playableUrl': f'https://cdn/{video_id}'})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body.encode())
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class BunnyClientTest(TestCase):
+    """Test cases for the pooled, cached Bunny API client (local stub server)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubBunnyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(BUNNY_CDN_CONFIG={
+            'BASE_URL': f'http://127.0.0.1:{cls.server.server_port}/library/1',
+            'TIMEOUT': 2,
+        })
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        _StubBunnyHandler.requests_seen.clear()
+
+    def test_video_info_and_negative_results_are_cached(self):
+        client = BunnyCDNClient()
+        self.assertEqual(client.get_video_info('ok-1')['length'], 90)
+        self.assertIsNone(client.get_video_info('gone'))
+        self.assertEqual(client.get_video_url('ok-1'), 'https://cdn/ok-1')
+        self.assertFalse(client.validate_video_id('gone'))
+        self.assertEqual(_StubBunnyHandler.requests_seen, ['ok-1', 'gone'])
+
+    def test_batch_fetch_only_requests_misses(self):
+        client = BunnyCDNClient()
+        client.get_video_info('ok-0')
+        ids = [f'ok-{i}' for i in range(20)] + ['gone', 'ok-0']
+        videos = client.get_videos_info(ids, max_workers=4)
+        self.assertEqual(len(videos), 21)
+        self.assertIsNone(videos['gone'])
+        self.assertEqual(videos['ok-19']['guid'], 'ok-19')
+        self.assertEqual(len(_StubBunnyHandler.requests_seen), 21)
+        self.assertNotIn('ok-0', _StubBunnyHandler.requests_seen[1:])
+
+
+@override_settings(
+    BUNNY_CDN_TOKEN_AUTH_KEY='test-key', BUNNY_CDN_LIBRARY_ID='42',
+    BUNNY_CDN_CONFIG={'CDN_HOSTNAME': 'cdn.test', 'SIGNING_BUCKET_SECONDS': 300},
+)
+class VideoSigningTest(TestCase):
+    """Test cases for bucketed, memoized private video URL signing"""
+
+    def test_tokens_are_stable_within_a_bucket(self):
+        from .video_signing import get_signer
+        signer = get_signer()
+        expires = signer.expires_at(3600, now=1000)
+        self.assertEqual(expires % 300, 0)
+        self.assertGreaterEqual(expires, 1000 + 3600)
+        self.assertEqual(expires, signer.expires_at(3600, now=1100))
+        self.assertEqual(signer.token('vid', 7, expires), signer.token('vid', 7, expires))
+        self.assertNotEqual(signer.token('vid', 7, expires), signer.token('vid', 8, expires))
+
+    def test_legacy_helpers_match_sign_many(self):
+        from .bunny_utils import get_bunny_private_embed_url
+        from .video_signing import sign_many
+        urls = sign_many(['a', 'b', 'a', None], user_id=3)
+        self.assertEqual(list(urls), ['a', 'b'])
+        self.assertEqual(urls['a'], get_bunny_private_embed_url('a', user_id=3))
+        self.assertIn('/42/a?', urls['a'])
+
+    def test_lesson_serializer_signs_only_watchable_lessons(self):
+        from rest_framework.test import APIRequestFactory
+        from .serializers import LessonSerializer
+        user = User.objects.create_user(username='viewer', password='testpass123')
+        course = Course.objects.create(title='Signed', description='d', price=10)
+        module = Module.objects.create(course=course, name='M', order=1)
+        Lesson.objects.create(module=module, title='Free', order=1, is_free=True, bunny_video_id='free-vid')
+        Lesson.objects.create(module=module, title='Paid', order=2, bunny_video_id='paid-vid')
+
+        request = APIRequestFactory().get('/')
+        request.user = user
+        lessons = list(Lesson.objects.filter(module=module).order_by('order'))
+        data = LessonSerializer(lessons, many=True, context={'request': request}).data
+        self.assertIn('token=', data[0]['private_video_url'])
+        self.assertIsNone(data[1]['private_video_url'])
+
+        # A queryset is evaluated once and its videos signed together
+        Enrollment.objects.create(student=user, course=course)
+        from unittest import mock
+        from . import video_signing
+        request = APIRequestFactory().get('/')
+        request.user = user
+        with mock.patch.object(video_signing, 'sign_many', wraps=video_signing.sign_many) as sign_many:
+            data = LessonSerializer(Lesson.objects.filter(module=module).order_by('order'),
+                                    many=True, context={'request': request}).data
+        self.assertEqual(sign_many.call_count, 1)
+        self.assertIn('token=', data[1]['private_video_url'])
+
+
+class ChunkedUploadTest(TestCase):
+    """Test cases for resumable chunked module uploads"""
+
+    def setUp(self):
+        import tempfile
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username='uploader', password='testpass123', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        course = Course.objects.create(title='Uploads', description='d', price=10)
+        self.module = Module.objects.create(course=course, name='M', order=1)
+
+    def _put_chunk(self, session_id, index, data, checksum=None):
+        import base64
+        import hashlib
+        headers = {'HTTP_UPLOAD_CHECKSUM': 'sha256 ' + base64.b64encode(
+            checksum or hashlib.sha256(data).digest()).decode()}
+        return self.client.put(f'/api/content/uploads/{session_id}/chunks/{index}/', data,
+                               content_type='application/octet-stream', **headers)
+
+    def test_out_of_order_upload_is_resumed_and_completed(self):
+        import os
+        payload = os.urandom(256 * 1024 * 2 + 1000)
+        response = self.client.post('/api/content/uploads/', {
+            'target': 'module_pdf', 'object_id': self.module.id,
+            'filename': 'notes.pdf', 'size': len(payload), 'chunk_size': 256 * 1024,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        session_id = response.json()['id']
+        self.assertEqual(response.json()['total_chunks'], 3)
+
+        chunks = [payload[i:i + 256 * 1024] for i in range(0, len(payload), 256 * 1024)]
+        self.assertEqual(self._put_chunk(session_id, 2, chunks[2]).status_code, 200)
+        self.assertEqual(self._put_chunk(session_id, 0, chunks[0], checksum=b'x' * 32).status_code, 460)
+        self.assertEqual(self._put_chunk(session_id, 0, chunks[0]).status_code, 200)
+
+        progress = self.client.get(f'/api/content/uploads/{session_id}/').json()
+        self.assertEqual(progress['missing_chunks'], [1])
+        self.assertEqual(self.client.post(f'/api/content/uploads/{session_id}/complete/').status_code, 409)
+
+        # A corrupt retry of a received chunk makes it missing again
+        self.assertEqual(self._put_chunk(session_id, 1, chunks[1]).status_code, 200)
+        self.assertEqual(self._put_chunk(session_id, 1, chunks[1], checksum=b'x' * 32).status_code, 460)
+        self.assertEqual(self.client.post(f'/api/content/uploads/{session_id}/complete/').status_code, 409)
+
+        self.assertEqual(self._put_chunk(session_id, 1, chunks[1]).status_code, 200)
+        response = self.client.post(f'/api/content/uploads/{session_id}/complete/')
+        self.assertEqual(response.json()['status'], 'complete')
+        self.module.refresh_from_db()
+        with self.module.pdf.open('rb') as uploaded:
+            self.assertEqual(uploaded.read(), payload)
+
+    def test_rejects_bad_extension_and_foreign_course(self):
+        response = self.client.post('/api/content/uploads/', {
+            'target': 'module_video', 'object_id': self.module.id, 'filename': 'run.exe', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username='student', password='testpass123'))
+        response = self.client.post('/api/content/uploads/', {
+            'target': 'module_video', 'object_id': self.module.id, 'filename': 'a.mp4', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class ProtectedMediaTest(TestCase):
+    """Test cases for access-checked, range-aware media streaming"""
+
+    def setUp(self):
+        import tempfile
+        from django.core.files.base import ContentFile
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='student', password='testpass123')
+        course = Course.objects.create(title='Media', description='d', price=10)
+        self.module = Module.objects.create(course=course, name='M', order=1)
+        self.payload = bytes(range(256)) * 40
+        self.module.video.save('lecture.mp4', ContentFile(self.payload))
+        Enrollment.objects.create(student=self.student, course=course)
+        self.url = f'/api/media/module-video/{self.module.id}/'
+
+    def test_range_requests(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-1099')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1099/{len(self.payload)}')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[1000:1100])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[-10:])
+
+        # A stale If-Range validator gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response['Content-Length']), len(self.payload))
+        response.close()
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_access_and_proxy_handoff(self):
+        self.client.force_authenticate(User.objects.create_user(username='other', password='testpass123'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_authenticate(self.student)
+        with override_settings(PROTECTED_MEDIA_BACKEND='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.module.video.name)
+        self.assertEqual(response.content, b'')
+
+
+    def test_serializers_link_to_the_protected_endpoint(self):
+        from django.core.files.base import ContentFile
+        from .serializers import ModuleDetailSerializer
+
+        hls_dir = f'courses/{self.module.course_id}/modules/{self.module.pk}/hls/abc'
+        self.module.video.storage.save(f'{hls_dir}/master.m3u8', ContentFile(b'#EXTM3U\n'))
+        Module.objects.filter(pk=self.module.pk).update(hls_manifest=f'{hls_dir}/master.m3u8')
+        self.module.refresh_from_db()
+
+        data = ModuleDetailSerializer(self.module).data
+        self.assertEqual(data['video'], self.url)
+        self.assertIsNone(data['pdf'])
+        self.assertEqual(data['hls_url'], f'/api/media/module-hls/{self.module.id}/master.m3u8')
+
+        self.client.force_authenticate(self.student)
+        response = self.client.get(data['hls_url'])
+        self.assertEqual(b''.join(response.streaming_content), b'#EXTM3U\n')
+        self.assertEqual(self.client.get(f'/api/media/module-hls/{self.module.id}/../videos/lecture.mp4').status_code, 404)
+
+    def test_serialized_urls_play_without_credentials(self):
+        from django.core.files.base import ContentFile
+        from rest_framework.test import APIRequestFactory
+        from core.protected_media import media_token
+        from .serializers import ModuleDetailSerializer
+
+        hls_dir = f'courses/{self.module.course_id}/modules/{self.module.pk}/hls/abc'
+        self.module.video.storage.save(f'{hls_dir}/720p/index.m3u8', ContentFile(b'#EXTM3U\n#720p\n'))
+        Module.objects.filter(pk=self.module.pk).update(hls_manifest=f'{hls_dir}/master.m3u8')
+        self.module.refresh_from_db()
+
+        request = APIRequestFactory().get('/')
+        request.user = self.student
+        data = ModuleDetailSerializer(self.module, context={'request': request}).data
+
+        # A <video src> / HLS player sends no Authorization header
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        response = self.client.get(data['video'], HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.payload[:10])
+        # Relative playlist URIs resolve under the signed path
+        playlist = data['hls_url'].replace('master.m3u8', '720p/index.m3u8')
+        self.assertEqual(b''.join(self.client.get(playlist).streaming_content), b'#EXTM3U\n#720p\n')
+
+        # The token is bound to its file and expires
+        other = Module.objects.create(course=self.module.course, name='N', order=2)
+        other.video.save('other.mp4', ContentFile(b'other'))
+        token = data['video'].split('token=')[1]
+        self.assertEqual(self.client.get(f'/api/media/module-video/{other.id}/?token={token}').status_code, 401)
+        expired = media_token('module-video', self.module.pk, self.student.pk, now=0)
+        self.assertEqual(self.client.get(f'{self.url}?token={expired}').status_code, 401)
+
+
+class MediaPipelineTest(TestCase):
+    """Test cases for the background video processing queue"""
+
+    def setUp(self):
+        import tempfile
+        from django.core.files.base import ContentFile
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        course = Course.objects.create(title='Media', description='d', price=10)
+        self.module = Module.objects.create(course=course, name='M', order=1)
+        self.module.video.save('lecture.mp4', ContentFile(b'not really a video'))
+
+    def test_upload_queues_one_job_and_replaced_files_are_skipped(self):
+        from django.core.files.base import ContentFile
+        from .media_pipeline import claim_batch, run_job
+        from .models import MediaJob
+
+        job = MediaJob.objects.get()
+        self.assertEqual((job.kind, job.field_name, job.source_name), ('video', 'video', self.module.video.name))
+
+        self.module.name = 'Renamed'
+        self.module.save()
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+        claimed = claim_batch()
+        self.module.video.save('other.mp4', ContentFile(b'newer upload'))
+        self.assertTrue(run_job(claimed[0]))
+        self.assertIn('skipped', MediaJob.objects.get(pk=job.pk).result)
+        self.assertEqual(MediaJob.objects.filter(status='pending').count(), 1)
+
+    @override_settings(FFMPEG_BINARY='/nonexistent/ffmpeg', FFPROBE_BINARY='/nonexistent/ffprobe')
+    def test_missing_ffmpeg_fails_without_retry(self):
+        from .media_pipeline import process_pending
+        from .models import MediaJob
+
+        self.assertEqual(process_pending(), 1)
+        job = MediaJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('MediaToolMissing', job.last_error)
+
+    def test_probe_parsing_and_master_playlist(self):
+        from .video_processing import master_playlist, parse_ffmpeg_banner, select_renditions
+        info = parse_ffmpeg_banner(
+            "  Duration: 00:12:03.48, start: 0.000000, bitrate: 2121 kb/s\n"
+            "  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(tv, bt709), "
+            "1920x1080 [SAR 1:1 DAR 16:9], 1990 kb/s, 30 fps\n"
+            "  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 48000 Hz, stereo, fltp, 127 kb/s\n"
+        )
+        self.assertEqual(info['codec'], 'h264')
+        self.assertEqual((info['width'], info['height'], info['audio_codec']), (1920, 1080, 'aac'))
+        self.assertAlmostEqual(info['duration'], 723.48)
+
+        renditions = select_renditions(info['height'])
+        playlist = master_playlist(renditions, info['width'], info['height'])
+        self.assertIn('BANDWIDTH=896000,RESOLUTION=640x360\n360p.m3u8', playlist)
+        self.assertIn('RESOLUTION=1280x720\n720p.m3u8', playlist)
+        self.assertEqual([r['height'] for r in select_renditions(240)], [240])
+
+
+@override_settings(POPPLER_PATH='/nonexistent/poppler')
+class DocumentPagesTest(TestCase):
+    """Test cases for PDF page previews and searchable PDF text"""
+
+    def setUp(self):
+        import tempfile
+        from django.core.files.base import ContentFile
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='student', password='testpass123')
+        self.course = Course.objects.create(title='Docs', description='d', price=10)
+        self.module = Module.objects.create(course=self.course, name='M', order=1)
+        self.module.pdf.save('notes.pdf', ContentFile(b'%PDF-1.4 not really a pdf'))
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def _split(self, texts):
+        """Store pages as the pdf job would, with a rendered first page"""
+        import io
+        from django.core.files.base import ContentFile
+        from PIL import Image
+        from core.pdf_pages import pages_directory
+        from .models import DocumentPage
+
+        storage = self.module.pdf.storage
+        image = f'{pages_directory(self.module, self.module.pdf.name)}/1.jpg'
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 60), 'white').save(buffer, 'JPEG')
+        storage.save(image, ContentFile(buffer.getvalue()))
+        Module.objects.filter(pk=self.module.pk).update(pdf_page_count=len(texts))
+        for number, text in enumerate(texts, start=1):
+            DocumentPage.objects.create(
+                model='content.module', object_id=str(self.module.pk), source_name=self.module.pdf.name,
+                number=number, text=text, image=image if number == 1 else '',
+                width=40 if number == 1 else 0, height=60 if number == 1 else 0,
+            )
+
+    def test_uploads_queue_one_pdf_job(self):
+        from django.core.files.base import ContentFile
+        from articles.models import Book
+        from .media_pipeline import process_pending
+        from .models import MediaJob
+
+        jobs = MediaJob.objects.filter(kind='pdf')
+        self.assertEqual(list(jobs.values_list('model', 'field_name')), [('content.module', 'pdf')])
+
+        book = Book(title='B', author_name='A')
+        book.book_file.save('book.pdf', ContentFile(b'%PDF-1.4'))
+        self.assertEqual(jobs.count(), 2)
+        book.increment_views()
+        book.save()
+        self.assertEqual(jobs.count(), 2)
+
+        # Neither PyMuPDF nor poppler is available: no retries
+        MediaJob.objects.exclude(kind='pdf').delete()
+        process_pending(limit=10, workers=1)
+        self.assertEqual(set(jobs.values_list('status', 'attempts')), {('failed', 1)})
+        self.assertIn('PdfToolMissing', jobs.first().last_error)
+
+    def test_page_endpoints(self):
+        self._split(['first page', 'second page'])
+        url = f'/api/media/module-pdf/{self.module.id}/pages/'
+
+        self.client.force_authenticate(User.objects.create_user(username='other', password='testpass123'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(self.student)
+        data = self.client.get(url).json()
+        self.assertEqual((data['page_count'], data['ready']), (2, True))
+        self.assertEqual((data['pages'][0]['width'], data['pages'][0]['height']), (40, 60))
+
+        response = self.client.get(f'{url}1/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('max-age=604800', response['Cache-Control'])
+        response.close()
+        self.assertEqual(self.client.get(f'{url}3/').status_code, 404)
+        # Page 2 is rendered on demand, which needs the PDF tools
+        self.assertEqual(self.client.get(f'{url}2/').status_code, 503)
+
+    def test_pages_rendered_before_the_split_do_not_cap_the_count(self):
+        from unittest import mock
+        from PIL import Image
+
+        def render(path, out_dir, first, last, width=None):
+            os.makedirs(out_dir, exist_ok=True)
+            Image.new('RGB', (40, 60), 'white').save(os.path.join(out_dir, f'{first}.jpg'), 'JPEG')
+            return {first: (f'{first}.jpg', 40, 60)}
+
+        url = f'/api/media/module-pdf/{self.module.id}/pages/'
+        self.client.force_authenticate(self.student)
+        with mock.patch('core.pdf_pages.page_count', return_value=3), \
+                mock.patch('core.pdf_pages.render_pages', side_effect=render):
+            for number in (1, 2):
+                response = self.client.get(f'{url}{number}/')
+                self.assertEqual(response.status_code, 200)
+                response.close()
+            self.assertEqual(self.client.get(f'{url}4/').status_code, 404)
+            data = self.client.get(url).json()
+        self.assertEqual((data['page_count'], data['ready']), (3, False))
+
+    def test_book_pages_use_the_extracted_count(self):
+        from unittest import mock
+        from django.core.files.base import ContentFile
+        from articles.models import Book
+
+        book = Book(title='B', author_name='A', pages_count=500)
+        book.book_file.save('book.pdf', ContentFile(b'%PDF-1.4'))
+        url = f'/api/media/book/{book.id}/pages/'
+        self.client.force_authenticate(self.student)
+        with mock.patch('core.pdf_pages.page_count', return_value=3), \
+                mock.patch('core.pdf_pages.render_pages', return_value={}):
+            self.assertEqual(self.client.get(url).json()['page_count'], 3)
+            self.assertEqual(self.client.get(f'{url}10/').status_code, 404)
+            # Counted but not renderable: still a 404, not a 500
+            self.assertEqual(self.client.get(f'{url}2/').status_code, 404)
+        book.refresh_from_db()
+        self.assertEqual(book.pages_count, 500)
+
+    def test_pdf_text_feeds_content_search(self):
+        from core.pdf_pages import parse_pdfinfo, split_pages
+        self._split(['Introduction', 'Thermodynamics and entropy'])
+        self.client.force_authenticate(self.student)
+
+        data = self.client.get('/api/content/search/', {'q': 'entropy', 'type': 'modules'}).json()
+        self.assertEqual([module['id'] for module in data['modules']], [self.module.id])
+
+        data = self.client.get('/api/content/search/', {'q': 'entropy'}).json()
+        self.assertEqual(data['documents'][0]['kind'], 'module-pdf')
+        self.assertEqual(data['documents'][0]['pages'], [{'number': 2, 'snippet': 'Thermodynamics and entropy'}])
+
+        self.assertEqual(parse_pdfinfo('Title:   x\nPages:          12\nEncrypted:  no\n'), 12)
+        self.assertEqual(split_pages('one\ftwo\f', 3), ['one', 'two', ''])
@@ -4,6 +4,7 @@ from . import views
 from .views_progress import ProgressViewSet
 from .views_search import ContentSearchView
 from . import views_bunny
+from . import views_uploads
 
 # Create a router for the ModuleViewSet
 router = DefaultRouter()
@@ -51,10 +52,17 @@ urlpatterns = [
     # Bunny CDN integration endpoints
     path('bunny/validate/', views_bunny.validate_bunny_video, name='validate-bunny-video'),
     path('bunny/video/<str:video_id>/', views_bunny.get_bunny_video_info, name='bunny-video-info'),
+    path('bunny/videos/', views_bunny.get_bunny_videos_info, name='bunny-videos-info'),
     path('bunny/embed/<str:video_id>/', views_bunny.get_bunny_embed_url_view, name='bunny-embed-url'),
     path('bunny/private/<str:video_id>/', views_bunny.get_bunny_private_url_view, name='bunny-private-url'),
     path('bunny/private-embed/<str:video_id>/', views_bunny.get_bunny_private_embed_url_view, name='bunny-private-embed-url'),
     path('modules/<int:module_id>/bunny-video/', views_bunny.update_module_bunny_video_view, name='module-bunny-video'),
     path('lessons/<int:lesson_id>/bunny-video/', views_bunny.update_lesson_bunny_video_view, name='lesson-bunny-video'),
     path('courses/<int:course_id>/bunny-promotional-video/', views_bunny.update_course_bunny_promotional_video_view, name='course-bunny-promotional-video'),
+
+    # Resumable chunked uploads
+    path('uploads/', views_uploads.create_upload, name='upload-create'),
+    path('uploads/<uuid:session_id>/', views_uploads.upload_detail, name='upload-detail'),
+    path('uploads/<uuid:session_id>/chunks/<int:index>/', views_uploads.upload_chunk, name='upload-chunk'),
+    path('uploads/<uuid:session_id>/complete/', views_uploads.complete_upload, name='upload-complete'),
 ]
@@ -0,0 +1,229 @@
+"""
+معالجة فيديو الوحدات محلياً (Local module video processing with ffmpeg).
+
+``process_module_video`` is the ``video`` handler of the media pipeline. For
+an uploaded ``Module.video`` it:
+
+1. probes duration, codec and size (``ffprobe``; ``ffmpeg -i`` when ffprobe
+   is missing, e.g. with the binary shipped by ``imageio-ffmpeg``);
+2. extracts a poster frame (JPEG, at most 1280px wide);
+3. packages HLS renditions (``MEDIA_HLS_RENDITIONS``, never above the source
+   height) with 6s segments, plus a master playlist, under
+   ``courses/<course>/modules/<module>/hls/<digest>/``;
+4. stores ``video_duration`` / ``video_codec`` / ``video_height`` /
+   ``video_poster`` / ``hls_manifest`` with one ``UPDATE`` that only
+   applies if the module still has the same video.
+
+Outputs are written through ``storage.path()`` (local filesystem storage).
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+
+from django.conf import settings
+
+from .media_pipeline import PermanentError
+
+DEFAULT_RENDITIONS = [
+    {'name': '360p', 'height': 360, 'video_bitrate': '800k', 'audio_bitrate': '96k'},
+    {'name': '720p', 'height': 720, 'video_bitrate': '2800k', 'audio_bitrate': '128k'},
+]
+HLS_SEGMENT_SECONDS = 6
+
+DURATION_RE = re.compile(r'Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+VIDEO_STREAM_RE = re.compile(r'Stream #\S+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})')
+AUDIO_STREAM_RE = re.compile(r'Stream #\S+.*?: Audio: (\w+)')
+
+
+class MediaToolMissing(PermanentError):
+    """ffmpeg is not installed"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def ffmpeg_binary():
+    """Configured ``FFMPEG_BINARY``, ffmpeg on PATH, or the imageio-ffmpeg binary"""
+    configured = _setting('FFMPEG_BINARY', None)
+    if configured:
+        return configured
+    found = shutil.which('ffmpeg')
+    if found:
+        return found
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        raise MediaToolMissing('ffmpeg not found: install ffmpeg or imageio-ffmpeg, or set FFMPEG_BINARY')
+
+
+def ffprobe_binary():
+    return _setting('FFPROBE_BINARY', None) or shutil.which('ffprobe')
+
+
+def _run(args, check=True):
+    try:
+        completed = subprocess.run(
+            args, capture_output=True, timeout=_setting('FFMPEG_TIMEOUT_SECONDS', 3 * 60 * 60)
+        )
+    except FileNotFoundError:
+        raise MediaToolMissing(f'{args[0]} not found')
+    if check and completed.returncode != 0:
+        tail = completed.stderr.decode('utf-8', 'replace').strip().splitlines()[-5:]
+        raise RuntimeError(f'{os.path.basename(args[0])} exited with {completed.returncode}: ' + ' | '.join(tail))
+    return completed
+
+
+def parse_probe(data):
+    """Media info from ``ffprobe -print_format json -show_format -show_streams``"""
+    streams = data.get('streams') or []
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    duration = (data.get('format') or {}).get('duration') or video.get('duration') or 0
+    return {
+        'duration': float(duration),
+        'codec': video.get('codec_name', ''),
+        'width': int(video.get('width') or 0),
+        'height': int(video.get('height') or 0),
+        'audio_codec': audio.get('codec_name', '') if audio else '',
+    }
+
+
+def parse_ffmpeg_banner(text):
+    """Media info from the stream summary ``ffmpeg -i`` prints on stderr"""
+    info = {'duration': 0.0, 'codec': '', 'width': 0, 'height': 0, 'audio_codec': ''}
+    match = DURATION_RE.search(text)
+    if match:
+        hours, minutes, seconds = match.groups()
+        info['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = VIDEO_STREAM_RE.search(text)
+    if match:
+        info['codec'], info['width'], info['height'] = match.group(1), int(match.group(2)), int(match.group(3))
+    match = AUDIO_STREAM_RE.search(text)
+    if match:
+        info['audio_codec'] = match.group(1)
+    return info
+
+
+def probe(path):
+    ffprobe = ffprobe_binary()
+    if ffprobe:
+        completed = _run([ffprobe, '-v', 'error', '-print_format', 'json',
+                          '-show_format', '-show_streams', path])
+        return parse_probe(json.loads(completed.stdout or b'{}'))
+    # Without an output file ffmpeg exits with 1 after printing the summary
+    completed = _run([ffmpeg_binary(), '-hide_banner', '-i', path], check=False)
+    return parse_ffmpeg_banner(completed.stderr.decode('utf-8', 'replace'))
+
+
+def extract_poster(path, output, at=0.0):
+    _run([ffmpeg_binary(), '-y', '-loglevel', 'error', '-ss', f'{at:.2f}', '-i', path,
+          '-frames:v', '1', '-vf', "scale='min(1280,iw)':-2", '-q:v', '3', output])
+
+
+def _bits(rate):
+    rate = str(rate).lower()
+    factor = {'k': 1000, 'm': 1000 * 1000}.get(rate[-1:], 1)
+    return int(float(rate.rstrip('km')) * factor)
+
+
+def select_renditions(source_height):
+    """Renditions not taller than the source; the smallest one at least"""
+    renditions = sorted(_setting('MEDIA_HLS_RENDITIONS', DEFAULT_RENDITIONS), key=lambda r: r['height'])
+    selected = [r for r in renditions if not source_height or r['height'] <= source_height]
+    if not selected and renditions:
+        smallest = dict(renditions[0])
+        smallest['height'] = source_height - source_height % 2
+        selected = [smallest]
+    return selected
+
+
+def master_playlist(renditions, width, height):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for rendition in renditions:
+        bandwidth = _bits(rendition['video_bitrate']) + _bits(rendition['audio_bitrate'])
+        resolution = ''
+        if width and height:
+            scaled_width = round(width * rendition['height'] / height / 2) * 2
+            resolution = f',RESOLUTION={scaled_width}x{rendition["height"]}'
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth}{resolution}')
+        lines.append(f'{rendition["name"]}.m3u8')
+    return '\n'.join(lines) + '\n'
+
+
+def package_hls(path, out_dir, renditions, has_audio=True):
+    """One ffmpeg run per rendition, aligned keyframes every segment"""
+    ffmpeg = ffmpeg_binary()
+    for rendition in renditions:
+        video_bits = _bits(rendition['video_bitrate'])
+        args = [ffmpeg, '-y', '-loglevel', 'error', '-i', path, '-map', '0:v:0']
+        if has_audio:
+            args += ['-map', '0:a:0']
+        args += [
+            '-vf', f'scale=-2:{rendition["height"]}',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-crf', '22',
+            '-maxrate', str(video_bits), '-bufsize', str(video_bits * 2),
+            '-force_key_frames', f'expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})', '-sc_threshold', '0',
+        ]
+        if has_audio:
+            args += ['-c:a', 'aac', '-b:a', rendition['audio_bitrate'], '-ac', '2']
+        args += [
+            '-f', 'hls', '-hls_time', str(HLS_SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(out_dir, f'{rendition["name"]}_%04d.ts'),
+            os.path.join(out_dir, f'{rendition["name"]}.m3u8'),
+        ]
+        _run(args)
+
+
+def process_module_video(module, field_file):
+    from .models import Module, module_poster_upload_path
+    from .outline import bump_outline_version
+
+    storage = field_file.storage
+    try:
+        source = field_file.path
+    except NotImplementedError:
+        raise PermanentError('Video processing needs a local filesystem storage')
+
+    info = probe(source)
+    digest = hashlib.sha1(field_file.name.encode()).hexdigest()[:12]
+
+    poster_name = module_poster_upload_path(module, f'{digest}.jpg')
+    os.makedirs(os.path.dirname(storage.path(poster_name)), exist_ok=True)
+    extract_poster(source, storage.path(poster_name), at=min(info['duration'] * 0.1, 10.0))
+
+    hls_dir = f'courses/{module.course_id}/modules/{module.pk}/hls/{digest}'
+    out_dir = storage.path(hls_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    renditions = select_renditions(info['height'])
+    package_hls(source, out_dir, renditions, has_audio=bool(info['audio_codec']))
+    manifest_name = f'{hls_dir}/master.m3u8'
+    with open(storage.path(manifest_name), 'w') as manifest:
+        manifest.write(master_playlist(renditions, info['width'], info['height']))
+
+    updated = Module.objects.filter(pk=module.pk, video=field_file.name).update(
+        video_duration=round(info['duration']),
+        video_codec=info['codec'][:50],
+        video_height=info['height'],
+        video_poster=poster_name,
+        hls_manifest=manifest_name,
+    )
+    if updated:
+        bump_outline_version(module.course_id)
+        # Outputs of the previous upload are no longer referenced
+        previous = os.path.dirname(module.hls_manifest) if module.hls_manifest else ''
+        if previous and previous != hls_dir:
+            shutil.rmtree(storage.path(previous), ignore_errors=True)
+        if module.video_poster and module.video_poster.name != poster_name:
+            module.video_poster.storage.delete(module.video_poster.name)
+
+    return {
+        **info,
+        'poster': poster_name,
+        'manifest': manifest_name,
+        'renditions': [rendition['name'] for rendition in renditions],
+    }
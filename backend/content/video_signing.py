@@ -0,0 +1,148 @@
+"""
+توقيع روابط الفيديو الخاصة (Signed Bunny playback URLs).
+
+Expiry times are rounded up to ``BUNNY_CDN_CONFIG['SIGNING_BUCKET_SECONDS']``
+(default 5 minutes), so every request for the same (video, user, expiry) in
+a window produces the same token. Tokens are memoized in a bounded
+in-process LRU, and the settings are read once per ``VideoURLSigner``.
+
+``sign_many`` signs all the videos of a response in one pass; the module,
+lesson and outline serializers use it through the request-scoped signer
+returned by ``get_request_signer``. Token format is unchanged from the
+original ``get_bunny_private_url``: ``<expires>:<hmac>[:<user_id>]``.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+
+DEFAULT_BUCKET_SECONDS = 300
+DEFAULT_EXPIRES_IN = 3600
+TOKEN_CACHE_SIZE = 10000
+
+_tokens = OrderedDict()
+_tokens_lock = threading.Lock()
+_default_signer = None
+
+
+class VideoURLSigner:
+    """Builds private stream / embed URLs for Bunny videos"""
+
+    def __init__(self):
+        config = getattr(settings, 'BUNNY_CDN_CONFIG', {})
+        key = getattr(settings, 'BUNNY_CDN_TOKEN_AUTH_KEY', None)
+        self.key = key.encode('utf-8') if key else None
+        self.library_id = getattr(settings, 'BUNNY_CDN_LIBRARY_ID', '')
+        self.cdn_hostname = config.get('CDN_HOSTNAME', '')
+        self.embed_base = config.get('EMBED_BASE_URL') or 'https://iframe.mediadelivery.net/embed'
+        self.bucket = max(1, int(config.get('SIGNING_BUCKET_SECONDS', DEFAULT_BUCKET_SECONDS)))
+
+    def expires_at(self, expires_in=DEFAULT_EXPIRES_IN, now=None):
+        """Expiry rounded up to the bucket, so it is never earlier than asked"""
+        target = int(now if now is not None else time.time()) + expires_in
+        return -(-target // self.bucket) * self.bucket
+
+    def token(self, video_id, user_id=None, expires=None):
+        cache_key = (self.key, video_id, user_id, expires)
+        with _tokens_lock:
+            token = _tokens.get(cache_key)
+            if token is not None:
+                _tokens.move_to_end(cache_key)
+                return token
+
+        token_data = f"{video_id}:{expires}"
+        if user_id:
+            token_data += f":{user_id}"
+        signature = hmac.new(self.key, token_data.encode('utf-8'), hashlib.sha256).hexdigest()
+        token = f"{expires}:{signature}"
+        if user_id:
+            token += f":{user_id}"
+
+        with _tokens_lock:
+            _tokens[cache_key] = token
+            if len(_tokens) > TOKEN_CACHE_SIZE:
+                _tokens.popitem(last=False)
+        return token
+
+    def private_url(self, video_id, user_id=None, expires_in=DEFAULT_EXPIRES_IN):
+        if not self.cdn_hostname or not self.key or not video_id:
+            return ""
+        token = self.token(video_id, user_id, self.expires_at(expires_in))
+        return f"https://{self.cdn_hostname}/{video_id}/play_720p.mp4?token={token}"
+
+    def private_embed_url(self, video_id, user_id=None, expires_in=DEFAULT_EXPIRES_IN,
+                          autoplay=False, loop=False, muted=False, start_time=0):
+        if not self.library_id or not self.key or not video_id:
+            return ""
+        token = self.token(video_id, user_id, self.expires_at(expires_in))
+        return (
+            f"{self.embed_base}/{self.library_id}/{video_id}"
+            f"?autoplay={str(autoplay).lower()}&loop={str(loop).lower()}"
+            f"&muted={str(muted).lower()}&responsive=true&startTime={start_time}&token={token}"
+        )
+
+    def sign_many(self, video_ids, user_id=None, expires_in=DEFAULT_EXPIRES_IN, embed=True):
+        """Map each video id to its private embed (or stream) URL"""
+        build = self.private_embed_url if embed else self.private_url
+        return {
+            video_id: build(video_id, user_id, expires_in)
+            for video_id in dict.fromkeys(v for v in video_ids if v)
+        }
+
+
+def get_signer():
+    """Process-wide signer, rebuilt when the Bunny settings change"""
+    global _default_signer
+    if _default_signer is None:
+        _default_signer = VideoURLSigner()
+    return _default_signer
+
+
+def _reset_signer(setting, **kwargs):
+    global _default_signer
+    if setting.startswith('BUNNY_CDN'):
+        _default_signer = None
+        with _tokens_lock:
+            _tokens.clear()
+
+
+setting_changed.connect(_reset_signer)
+
+
+def sign_many(video_ids, user_id=None, expires_in=DEFAULT_EXPIRES_IN, embed=True):
+    return get_signer().sign_many(video_ids, user_id, expires_in, embed)
+
+
+class RequestSigner:
+    """
+    Per-response signing memo kept in the serializer context: the first
+    lookup signs every video of the serialized instances in one pass.
+    """
+
+    def __init__(self, user_id=None, expires_in=DEFAULT_EXPIRES_IN):
+        self.user_id = user_id
+        self.expires_in = expires_in
+        self.urls = {}
+
+    def url_for(self, video_id, siblings=()):
+        if not video_id:
+            return None
+        if video_id not in self.urls:
+            ids = [video_id, *(v for v in siblings if v and v not in self.urls)]
+            self.urls.update(sign_many(ids, self.user_id, self.expires_in))
+        return self.urls[video_id] or None
+
+
+def get_request_signer(context):
+    """The ``RequestSigner`` stored in a serializer context (created on demand)"""
+    signer = context.get('_video_signer')
+    if signer is None:
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        user_id = user.id if user is not None and user.is_authenticated else None
+        signer = context['_video_signer'] = RequestSigner(user_id)
+    return signer
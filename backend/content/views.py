@@ -6,9 +6,15 @@ from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils.http import parse_etags
 
 from courses.models import Course, Enrollment
-from users.models import Profile
+from users.principal import get_principal
+from content.outline import (
+    get_compiled_outline, outline_etag, overlay_user_state
+)
+from content.progress_bitmap import get_completion
+from content.video_signing import get_signer
 from content.models import Module, ModuleProgress, UserProgress, Lesson, LessonResource
 from content.serializers import (
     ModuleDetailSerializer, ModuleCreateSerializer, ProgressUpdateSerializer,
@@ -103,19 +109,9 @@ class ModuleViewSet(ModelViewSet):
         print(f"Debug - Module ID: {module.id}, Course ID: {course.id}, User: {user.id}")
         
         # Check permissions: enrolled student or instructor/admin
-        is_enrolled = course.enrollments.filter(student=user, status__in=['active', 'completed']).exists()
-        is_instructor_or_admin = False
-        
-        try:
-            profile = user.profile
-            if profile.status == 'Admin' or user.is_staff:
-                is_instructor_or_admin = True
-            elif profile.status == 'Instructor':
-                instructor = profile.get_instructor_object()
-                if instructor and instructor in course.instructors.all():
-                    is_instructor_or_admin = True
-        except Profile.DoesNotExist:
-            pass
+        principal = get_principal(request)
+        is_enrolled = principal.is_enrolled(course.id)
+        is_instructor_or_admin = principal.can_manage_course(course.id)
         
         print(f"Debug - is_enrolled: {is_enrolled}, is_instructor_or_admin: {is_instructor_or_admin}")
         
@@ -136,7 +132,7 @@ class ModuleViewSet(ModelViewSet):
         course = module.course
         
         # Check if user is enrolled
-        if not course.enrollments.filter(student=request.user, status__in=['active', 'completed']).exists():
+        if not get_principal(request).is_enrolled(course.id):
             return Response({
                 'error': 'يجب أن تكون مسجلاً في الدورة'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -169,7 +165,7 @@ class ModuleViewSet(ModelViewSet):
         course = module.course
         
         # Check if user is enrolled
-        if not course.enrollments.filter(student=request.user, status__in=['active', 'completed']).exists():
+        if not get_principal(request).is_enrolled(course.id):
             return Response({
                 'error': 'يجب أن تكون مسجلاً في الدورة'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -262,22 +258,11 @@ class CourseProgressMixin:
     def modules(self, request, pk=None):
         """جلب وحدات الدورة"""
         course = self.get_object()
-        user = request.user
         
         # Check if user is enrolled or is the instructor/admin
-        is_enrolled = course.enrollments.filter(student=user, status__in=['active', 'completed']).exists()
-        is_instructor_or_admin = False
-        
-        try:
-            profile = user.profile
-            if profile.status == 'Admin' or user.is_staff:
-                is_instructor_or_admin = True
-            elif profile.status == 'Instructor':
-                instructor = profile.get_instructor_object()
-                if instructor and instructor in course.instructors.all():
-                    is_instructor_or_admin = True
-        except Profile.DoesNotExist:
-            pass
+        principal = get_principal(request)
+        is_enrolled = principal.is_enrolled(course.id)
+        is_instructor_or_admin = principal.can_manage_course(course.id)
         
         if not is_enrolled and not is_instructor_or_admin:
             return Response({
@@ -474,79 +459,43 @@ class CourseModulesWithLessonsViewSet(ModelViewSet):
             is_instructor_or_admin = False
             
             if user:
-                is_enrolled = course.enrollments.filter(student=user, status__in=['active', 'completed']).exists()
-                try:
-                    profile = user.profile
-                    is_instructor_or_admin = (
-                        profile.role in ['instructor', 'admin'] or 
-                        course.instructor == user
-                    )
-                except:
-                    pass
+                principal = get_principal(request)
+                is_enrolled = principal.is_enrolled(course.id)
+                is_instructor_or_admin = principal.can_manage_course(course.id)
             
-            # Get modules with lessons (including submodules)
-            modules = Module.objects.filter(course=course, is_active=True).prefetch_related('lessons', 'submodules').order_by('order')
+            # Compiled outline (cached per course version) + the completion bitmaps
+            version, outline = get_compiled_outline(course)
+            completion = get_completion(user, course)
+            user_id = user.id if user else None
+            signed_until = get_signer().expires_at() if user else None
+            etag = outline_etag(
+                version, is_enrolled, is_instructor_or_admin, completion,
+                user_id=user_id, signed_until=signed_until
+            )
             
-            modules_data = []
-            for module in modules:
-                module_data = {
-                    'id': module.id,
-                    'title': module.name,
-                    'description': module.description,
-                    'order': module.order,
-                    'video_duration': module.video_duration,
-                    'submodule': module.submodule.id if module.submodule else None,
-                    'lessons': []
-                }
-                
-                # Get lessons for this module
-                lessons = module.lessons.filter(is_active=True).order_by('order')
-                for lesson in lessons:
-                    # Format duration
-                    duration_text = ""
-                    if lesson.duration_minutes > 0:
-                        hours = lesson.duration_minutes // 60
-                        minutes = lesson.duration_minutes % 60
-                        if hours > 0:
-                            duration_text = f"{hours}س {minutes}د" if minutes > 0 else f"{hours}س"
-                        else:
-                            duration_text = f"{minutes}د"
-                    
-                    # Check if lesson is accessible (enrolled users or free lessons)
-                    is_accessible = is_enrolled or is_instructor_or_admin or lesson.is_free
-                    
-                    lesson_data = {
-                        'id': lesson.id,
-                        'title': lesson.title,
-                        'lesson_type': lesson.lesson_type,
-                        'duration': duration_text,
-                        'duration_minutes': lesson.duration_minutes,
-                        'order': lesson.order,
-                        'is_completed': False,  # This should be calculated based on user progress
-                        'is_preview': lesson.is_free or False,
-                        'is_free': lesson.is_free or False,
-                        'locked': not is_accessible,
-                        'module_name': module.name,
-                        'module_id': module.id,
-                        'description': lesson.description or ''
-                    }
-                    module_data['lessons'].append(lesson_data)
-                
-                modules_data.append(module_data)
+            if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
             
-            return Response({
+            modules_data = overlay_user_state(
+                outline, is_enrolled, is_instructor_or_admin, completion,
+                user_id=user_id
+            )
+            
+            response = Response({
                 'modules': modules_data,
-                'course': {
-                    'id': course.id,
-                    'title': course.title,
-                    'description': course.description
-                },
+                'course': outline['course'],
                 'user_info': {
                     'is_authenticated': user is not None,
                     'is_enrolled': is_enrolled,
                     'is_instructor_or_admin': is_instructor_or_admin
                 }
             })
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
             
         except Course.DoesNotExist:
             return Response({
@@ -569,18 +518,9 @@ class CourseQuestionBankViewSet(ModelViewSet):
             course = get_object_or_404(Course, id=course_id)
             
             # Check if user is enrolled or is instructor/admin
-            user = request.user
-            is_enrolled = course.enrollments.filter(student=user, status__in=['active', 'completed']).exists()
-            is_instructor_or_admin = False
-            
-            try:
-                profile = user.profile
-                is_instructor_or_admin = (
-                    profile.role in ['instructor', 'admin'] or 
-                    course.instructor == user
-                )
-            except:
-                pass
+            principal = get_principal(request)
+            is_enrolled = principal.is_enrolled(course.id)
+            is_instructor_or_admin = principal.can_manage_course(course.id)
             
             if not (is_enrolled or is_instructor_or_admin):
                 return Response({
@@ -667,18 +607,9 @@ class CourseFlashcardsViewSet(ModelViewSet):
             course = get_object_or_404(Course, id=course_id)
             
             # Check if user is enrolled or is instructor/admin
-            user = request.user
-            is_enrolled = course.enrollments.filter(student=user, status__in=['active', 'completed']).exists()
-            is_instructor_or_admin = False
-            
-            try:
-                profile = user.profile
-                is_instructor_or_admin = (
-                    profile.role in ['instructor', 'admin'] or 
-                    course.instructor == user
-                )
-            except:
-                pass
+            principal = get_principal(request)
+            is_enrolled = principal.is_enrolled(course.id)
+            is_instructor_or_admin = principal.can_manage_course(course.id)
             
             if not (is_enrolled or is_instructor_or_admin):
                 return Response({
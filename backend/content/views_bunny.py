@@ -197,7 +197,7 @@ def get_bunny_video_info(request, video_id):
                     'length': video_info.get('length', 0),
                     'playable_url': video_info.get('playableUrl', ''),
                     'embed_url': get_bunny_embed_url(video_id),
-                    'direct_url': get_bunny_video_url(video_id),
+                    'direct_url': video_info.get('playableUrl'),
                     'thumbnail': video_info.get('thumbnailFileName', ''),
                     'status': video_info.get('status', ''),
                     'created_at': video_info.get('dateCreated', ''),
@@ -215,6 +215,44 @@ def get_bunny_video_info(request, video_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def get_bunny_videos_info(request):
+    """
+    Get Bunny CDN information for several videos at once
+    
+    POST /api/content/bunny/videos/
+    {
+        "video_ids": ["id-1", "id-2"]
+    }
+    """
+    video_ids = request.data.get('video_ids')
+    if not isinstance(video_ids, list) or not video_ids:
+        return Response({
+            'error': _('video_ids must be a non-empty list')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(video_ids) > 100:
+        return Response({
+            'error': _('At most 100 video ids per request')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    videos = BunnyCDNClient().get_videos_info(str(v) for v in video_ids)
+    return Response({
+        'videos': {
+            video_id: {
+                'id': info.get('guid'),
+                'title': info.get('title', ''),
+                'length': info.get('length', 0),
+                'playable_url': info.get('playableUrl', ''),
+                'embed_url': get_bunny_embed_url(video_id),
+                'thumbnail': info.get('thumbnailFileName', ''),
+                'status': info.get('status', ''),
+            } if info else None
+            for video_id, info in videos.items()
+        }
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_bunny_embed_url_view(request, video_id):
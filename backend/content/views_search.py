@@ -1,6 +1,10 @@
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django.db.models import Q
+from django.utils.decorators import method_decorator
+from core.db_router import use_replica
+from core.pdf_pages import module_ids_matching, search_documents
 from .models import Module, Lesson, LessonResource
 from .serializers import (
     ModuleSearchSerializer,
@@ -8,6 +12,7 @@ from .serializers import (
     ResourceSearchSerializer
 )
 
+@method_decorator(use_replica, name='list')
 class ContentSearchView(generics.ListAPIView):
     """Search across modules, lessons, and resources"""
     permission_classes = [IsAuthenticated]
@@ -35,8 +40,9 @@ class ContentSearchView(generics.ListAPIView):
         # Apply search query if provided
         if query:
             modules = modules.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query)
+                Q(name__icontains=query) |
+                Q(description__icontains=query) |
+                Q(pk__in=module_ids_matching(query))  # text of the module PDF
             )
             
             lessons = lessons.filter(
@@ -56,10 +62,18 @@ class ContentSearchView(generics.ListAPIView):
             return lessons
         elif content_type == 'resources':
             return resources
+        elif content_type == 'documents':
+            return []  # see search_documents() in list()
         else:
             # Return all content types
             return list(modules) + list(lessons) + list(resources)
     
+    def filter_queryset(self, queryset):
+        # Mixed results are a list, already filtered in get_queryset()
+        if isinstance(queryset, list):
+            return queryset
+        return super().filter_queryset(queryset)
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         
@@ -94,11 +108,18 @@ class ContentSearchView(generics.ListAPIView):
                     'count': len(resources_serializer.data)
                 })
         
+        # Pages of module PDFs and books matching the query
+        query = self.request.query_params.get('q', '')
+        documents = search_documents(request, query, self.request.query_params.get('course_id')) if query else []
+        if content_type == 'documents':
+            return Response({'documents': documents, 'count': len(documents)})
+
         # If no specific type or mixed results
         return Response({
             'modules': modules_serializer.data if 'modules_serializer' in locals() else [],
             'lessons': lessons_serializer.data if 'lessons_serializer' in locals() else [],
             'resources': resources_serializer.data if 'resources_serializer' in locals() else [],
+            'documents': documents,
             'count': (
                 len(modules_serializer.data if 'modules_serializer' in locals() else []) +
                 len(lessons_serializer.data if 'lessons_serializer' in locals() else []) +
@@ -0,0 +1,107 @@
+"""
+Resumable chunked upload views (see content.chunked_upload)
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+
+from users.principal import get_principal
+from .models import UploadSession
+from . import chunked_upload
+
+
+def _error_response(exc):
+    response = Response({'error': str(exc), **exc.extra}, status=exc.status)
+    if exc.status == 460:
+        response.reason_phrase = 'Checksum Mismatch'
+    return response
+
+
+def _get_session(request, session_id):
+    return get_object_or_404(UploadSession, pk=session_id, user=request.user)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload(request):
+    """
+    Start a resumable upload
+
+    POST /api/content/uploads/
+    {
+        "target": "module_video" | "module_pdf" | "resource_file",
+        "object_id": 12,
+        "filename": "lecture-1.mp4",
+        "size": 734003200,
+        "chunk_size": 8388608   (optional)
+    }
+    """
+    target = request.data.get('target')
+    try:
+        instance, course_id = chunked_upload.resolve_target(target, request.data.get('object_id'))
+        if not get_principal(request).can_manage_course(course_id):
+            return Response({
+                'error': _('You do not have permission to upload files to this course')
+            }, status=status.HTTP_403_FORBIDDEN)
+        session = chunked_upload.create_session(
+            request.user, target, instance,
+            request.data.get('filename'), request.data.get('size'),
+            request.data.get('chunk_size'),
+        )
+    except chunked_upload.UploadError as exc:
+        return _error_response(exc)
+    return Response(chunked_upload.get_progress(session), status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_detail(request, session_id):
+    """
+    GET: received / missing chunks, to resume an interrupted upload
+    DELETE: abort the upload and drop its partial data
+    """
+    session = _get_session(request, session_id)
+    if request.method == 'DELETE':
+        chunked_upload.abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(chunked_upload.get_progress(session))
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, session_id, index):
+    """
+    Upload one chunk; the raw request body is the chunk data
+
+    PUT /api/content/uploads/<id>/chunks/<index>/
+    Content-Type: application/octet-stream
+    Upload-Checksum: sha256 <base64 digest>   (optional)
+    """
+    session = _get_session(request, session_id)
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    try:
+        chunk = chunked_upload.write_chunk(
+            session, index, request.stream, length,
+            request.META.get('HTTP_UPLOAD_CHECKSUM'),
+        )
+    except chunked_upload.UploadError as exc:
+        return _error_response(exc)
+    return Response({'index': chunk.index, 'size': chunk.size, 'checksum': chunk.checksum})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload(request, session_id):
+    """Assemble the uploaded chunks and attach the file to its target"""
+    session = _get_session(request, session_id)
+    try:
+        session = chunked_upload.complete_session(session)
+    except chunked_upload.UploadError as exc:
+        return _error_response(exc)
+    return Response(chunked_upload.get_progress(session))
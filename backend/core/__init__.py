@@ -0,0 +1,7 @@
+try:
+    # celery is only needed by the 'celery' payment event backend
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
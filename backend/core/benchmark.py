@@ -0,0 +1,610 @@
+"""
+قياس أداء المسارات الساخنة (Benchmarks of the API hot paths).
+
+``seed(scale)`` bulk-creates a dataset of ``FULL_SCALE`` × ``scale`` rows:
+at ``scale=1`` 100k students, 2k published courses (taught by 200
+instructors), 50k modules and 50k
+lessons, 5M ``ModuleProgress`` rows, 1M ``StudentAnswer`` rows and 10M
+notifications, plus enrollments, assessments and meeting chats. Rows are
+written with ``bulk_create`` in batches (students through
+``users.provisioning``) and generated lazily, so memory stays flat whatever
+the volume. Every seeded row hangs off a ``bench_user_<n>`` student, a
+``bench_instructor_<n>`` or a ``bench-course-<n>`` course, and ``flush()`` removes them again.
+
+``run()`` replays the hot endpoints (``CASES``) in process, through the full
+middleware stack, with a fixed random seed: catalog, outline, tracking, lesson
+progress, submit_assessment, unread_count and meeting chat. Requests that
+write run in a rolled-back transaction, so the dataset stays the same between
+runs. Each case reports latency and query-count percentiles and any N+1
+pattern (``core.query_budget``); ``compare()`` diffs two result files, e.g.
+one per commit.
+
+Driven by ``manage.py seed_benchmark_data`` and ``manage.py run_benchmarks``.
+"""
+import itertools
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext, redirect_stdout
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.query_budget import QueryRecorder, n_plus_one, percentile, wrap_connections
+
+USER_PREFIX = 'bench_user_'
+INSTRUCTOR_PREFIX = 'bench_instructor_'
+COURSE_SLUG_PREFIX = 'bench-course-'
+MEETING_PREFIX = 'Bench meeting '
+
+FULL_SCALE = {
+    'users': 100_000,
+    'courses': 2_000,
+    'modules': 50_000,
+    'lessons': 50_000,
+    'module_progress': 5_000_000,
+    'student_answers': 1_000_000,
+    'notifications': 10_000_000,
+    'meetings': 500,
+    'chat_messages': 100_000,
+}
+QUESTIONS_PER_ASSESSMENT = 10
+PARTICIPANTS_PER_MEETING = 50
+DEFAULT_BATCH_SIZE = 5000
+
+
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in FULL_SCALE.items()}
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _bulk(model, rows, batch_size):
+    """Insert the ``rows`` generator in committed batches; returns the count"""
+    created = 0
+    for batch in _batches(rows, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+    return created
+
+
+# Logging millions of INSERTs (DEBUG) would cost more than the inserts
+@override_settings(DEBUG=False)
+def seed(scale=1.0, batch_size=DEFAULT_BATCH_SIZE, seed_value=0, log=print):
+    """
+    Create the benchmark dataset; returns ``{table: rows created}``.
+
+    Signals are not sent for bulk inserts, so derived data (lesson sequence,
+    enrollment totals, completion bitmaps) is computed here.
+    """
+    from assessment.models import Assessment, AssessmentQuestions, QuestionBank, StudentAnswer, StudentSubmission
+    from content.models import Lesson, Module, ModuleProgress, UserProgress
+    from content.progress_bitmap import rebuild_course_bitmaps
+    from content.sequence import rebuild_course_sequence
+    from courses.models import Category, Course, Enrollment
+    from django.contrib.auth.models import User
+    from meetings.models import Meeting, MeetingChat, Participant
+    from notifications.models import Notification
+    from users.models import Instructor, Profile, Student
+    from users.provisioning import provision_students
+
+    if User.objects.filter(Q(username__startswith=USER_PREFIX) | Q(username__startswith=INSTRUCTOR_PREFIX)).exists():
+        raise ValueError('Benchmark data already exists; flush it first')
+
+    counts = scaled_counts(scale)
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    created = {}
+
+    def step(name, count):
+        created[name] = count
+        log(f'{name}: {count}')
+
+    # Students (User, Profile, Student, AccountFreeze)
+    result = provision_students(
+        [{'email': f'{USER_PREFIX}{n}@bench.invalid', 'username': f'{USER_PREFIX}{n}',
+          'first_name': 'Bench', 'last_name': str(n)} for n in range(counts['users'])],
+        chunk_size=batch_size,
+    )
+    if result['errors']:
+        raise ValueError(f"Could not create students: {result['errors'][0]['error']}")
+    user_ids = list(User.objects.filter(username__startswith=USER_PREFIX).order_by('id').values_list('id', flat=True))
+    step('users', len(user_ids))
+
+    # Catalog
+    category, _ = Category.objects.get_or_create(slug='bench-category', defaults={'name': 'Bench category'})
+    # Instructor accounts are students promoted the way the admin does it
+    provision_students(
+        [{'email': f'{INSTRUCTOR_PREFIX}{n}@bench.invalid', 'username': f'{INSTRUCTOR_PREFIX}{n}',
+          'first_name': 'Instructor', 'last_name': str(n)} for n in range(max(1, counts['courses'] // 10))],
+        chunk_size=batch_size,
+    )
+    profiles = Profile.objects.filter(user__username__startswith=INSTRUCTOR_PREFIX)
+    Student.objects.filter(profile__in=profiles).delete()
+    profiles.update(status='Instructor')
+    Instructor.objects.bulk_create([
+        Instructor(profile_id=profile_id, name=name) for profile_id, name in profiles.values_list('id', 'name')
+    ])
+    instructor_ids = list(Instructor.objects.filter(profile__in=profiles).values_list('id', flat=True))
+    levels = [choice for choice, _ in Course.LEVEL_CHOICES]
+    step('courses', _bulk(Course, (
+        Course(
+            title=f'Bench course {n}', slug=f'{COURSE_SLUG_PREFIX}{n}', category=category,
+            description='<p>' + 'Benchmark course description. ' * 20 + '</p>',
+            short_description='Benchmark course', level=rng.choice(levels),
+            price=rng.choice([0, 49, 99, 199]), status='published', is_active=True,
+            published_at=now - timedelta(days=rng.randint(0, 720)),
+        )
+        for n in range(counts['courses'])
+    ), batch_size))
+    course_ids = list(Course.objects.filter(slug__startswith=COURSE_SLUG_PREFIX).order_by('id').values_list('id', flat=True))
+    Course.instructors.through.objects.bulk_create([
+        Course.instructors.through(course_id=course_id, instructor_id=rng.choice(instructor_ids))
+        for course_id in course_ids
+    ], batch_size=batch_size)
+
+    modules_per_course = max(1, counts['modules'] // len(course_ids))
+    step('modules', _bulk(Module, (
+        Module(course_id=course_id, name=f'Module {order}', order=order,
+               status=Module.ModuleStatus.PUBLISHED, is_active=True, published_at=now)
+        for course_id in course_ids for order in range(1, modules_per_course + 1)
+    ), batch_size))
+    modules_by_course = defaultdict(list)
+    for module_id, course_id in Module.objects.filter(
+        course_id__in=course_ids
+    ).order_by('course_id', 'order').values_list('id', 'course_id').iterator(chunk_size=batch_size):
+        modules_by_course[course_id].append(module_id)
+
+    lessons_per_module = max(1, counts['lessons'] // (len(course_ids) * modules_per_course))
+    step('lessons', _bulk(Lesson, (
+        Lesson(module_id=module_id, title=f'Lesson {order}', slug=f'lesson-{order}', order=order,
+               duration_minutes=rng.randint(3, 45), is_active=True, is_free=order == 1, published_at=now)
+        for module_ids in modules_by_course.values() for module_id in module_ids
+        for order in range(1, lessons_per_module + 1)
+    ), batch_size))
+    for course_id in course_ids:
+        rebuild_course_sequence(course_id)
+
+    # Enrollments and progress: each student follows a few courses, with the
+    # first modules of each one completed
+    per_user = min(len(course_ids), max(1, math.ceil(
+        counts['module_progress'] / (len(user_ids) * modules_per_course)
+    )))
+    enrolled = {user_id: rng.sample(course_ids, per_user) for user_id in user_ids}
+    completed = {
+        (user_id, course_id): rng.randint(0, modules_per_course)
+        for user_id, courses in enrolled.items() for course_id in courses
+    }
+    step('enrollments', _bulk(Enrollment, (
+        Enrollment(student_id=user_id, course_id=course_id, status='active',
+                   progress=round(100 * done / modules_per_course, 1))
+        for (user_id, course_id), done in completed.items()
+    ), batch_size))
+    step('user_progress', _bulk(UserProgress, (
+        UserProgress(user_id=user_id, course_id=course_id, started_at=now,
+                     status=UserProgress.CompletionStatus.IN_PROGRESS,
+                     overall_progress=round(100 * done / modules_per_course, 1))
+        for (user_id, course_id), done in completed.items()
+    ), batch_size))
+    totals = Counter(course_id for _, course_id in completed)
+    Course.objects.bulk_update(
+        [Course(id=course_id, total_enrollments=total) for course_id, total in totals.items()],
+        ['total_enrollments'], batch_size=batch_size,
+    )
+
+    def module_progress():
+        for (user_id, course_id), done in completed.items():
+            for position, module_id in enumerate(modules_by_course[course_id]):
+                is_completed = position < done
+                yield ModuleProgress(
+                    user_id=user_id, module_id=module_id, is_completed=is_completed,
+                    status='completed' if is_completed else 'in_progress',
+                    started_at=now, completed_at=now if is_completed else None,
+                    video_watched=is_completed, video_progress=100 if is_completed else rng.randint(0, 90),
+                )
+    step('module_progress', _bulk(
+        ModuleProgress, itertools.islice(module_progress(), counts['module_progress']), batch_size
+    ))
+    for course_id in course_ids:
+        rebuild_course_bitmaps(course_id, batch_size=batch_size)
+
+    # Assessments: one quiz per course, answered by enrolled students
+    author_id = user_ids[0]
+    _bulk(Assessment, (
+        Assessment(title=f'Bench quiz {course_id}', type='quiz', status='published', course_id=course_id,
+                   created_by_id=author_id, start_date=now - timedelta(days=30),
+                   total_marks=QUESTIONS_PER_ASSESSMENT, passing_marks=QUESTIONS_PER_ASSESSMENT // 2)
+        for course_id in course_ids
+    ), batch_size)
+    assessment_by_course = dict(
+        Assessment.objects.filter(course_id__in=course_ids).values_list('course_id', 'id')
+    )
+    _bulk(QuestionBank, (
+        QuestionBank(question_text=f'Bench question {assessment_id}-{n}', question_type='mcq',
+                     options=['A', 'B', 'C', 'D'], correct_answer='[0]', created_by_id=author_id)
+        for assessment_id in assessment_by_course.values() for n in range(QUESTIONS_PER_ASSESSMENT)
+    ), batch_size)
+    # Ids follow insertion order, so each assessment gets the questions generated for it
+    question_ids = list(QuestionBank.objects.filter(
+        created_by_id=author_id, question_text__startswith='Bench question '
+    ).order_by('id').values_list('id', flat=True))
+    questions = {
+        assessment_id: question_ids[index * QUESTIONS_PER_ASSESSMENT:(index + 1) * QUESTIONS_PER_ASSESSMENT]
+        for index, assessment_id in enumerate(assessment_by_course.values())
+    }
+    _bulk(AssessmentQuestions, (
+        AssessmentQuestions(assessment_id=assessment_id, question_id=question_id, order=order)
+        for assessment_id, ids in questions.items() for order, question_id in enumerate(ids)
+    ), batch_size)
+
+    attempts = Counter()
+    submissions = []
+    for n in range(max(1, counts['student_answers'] // QUESTIONS_PER_ASSESSMENT)):
+        user_id = user_ids[n % len(user_ids)]
+        assessment_id = assessment_by_course[rng.choice(enrolled[user_id])]
+        attempts[user_id, assessment_id] += 1
+        submissions.append((user_id, assessment_id, attempts[user_id, assessment_id], rng.randint(0, QUESTIONS_PER_ASSESSMENT)))
+    _bulk(StudentSubmission, (
+        StudentSubmission(student_id=user_id, assessment_id=assessment_id, attempt_number=attempt,
+                          status='graded', submitted_at=now, total_score=score,
+                          percentage=100 * score / QUESTIONS_PER_ASSESSMENT,
+                          is_passed=score >= QUESTIONS_PER_ASSESSMENT // 2)
+        for user_id, assessment_id, attempt, score in submissions
+    ), batch_size)
+    submission_ids = {
+        (user_id, assessment_id, attempt): pk
+        for pk, user_id, assessment_id, attempt in StudentSubmission.objects.filter(
+            student__username__startswith=USER_PREFIX
+        ).values_list('id', 'student_id', 'assessment_id', 'attempt_number').iterator(chunk_size=batch_size)
+    }
+    step('student_answers', _bulk(StudentAnswer, (
+        StudentAnswer(submission_id=submission_ids[user_id, assessment_id, attempt], question_id=question_id,
+                      selected_options=[0 if index < score else 1], is_correct=index < score,
+                      marks_obtained=1 if index < score else 0, is_auto_graded=True)
+        for user_id, assessment_id, attempt, score in submissions
+        for index, question_id in enumerate(questions[assessment_id])
+    ), batch_size))
+
+    # Notifications, most of them read
+    per_recipient = max(1, counts['notifications'] // len(user_ids))
+    types = [choice for choice, _ in Notification.NOTIFICATION_TYPES]
+    step('notifications', _bulk(Notification, itertools.islice((
+        Notification(recipient_id=user_id, title=f'Bench notification {n}', message='Benchmark notification body',
+                     notification_type=rng.choice(types), is_read=rng.random() < 0.8)
+        for n in range(per_recipient) for user_id in user_ids
+    ), counts['notifications']), batch_size))
+
+    # Live meetings with their chat
+    _bulk(Meeting, (
+        Meeting(title=f'{MEETING_PREFIX}{n}', description='Benchmark meeting', meeting_type='LIVE',
+                creator_id=rng.choice(user_ids), start_time=now - timedelta(hours=1), is_live_started=True)
+        for n in range(counts['meetings'])
+    ), batch_size)
+    meeting_ids = list(Meeting.objects.filter(title__startswith=MEETING_PREFIX).order_by('id').values_list('id', flat=True))
+    participants = {
+        meeting_id: rng.sample(user_ids, min(PARTICIPANTS_PER_MEETING, len(user_ids)))
+        for meeting_id in meeting_ids
+    }
+    _bulk(Participant, (
+        Participant(meeting_id=meeting_id, user_id=user_id, is_attending=True, attendance_status='present')
+        for meeting_id, ids in participants.items() for user_id in ids
+    ), batch_size)
+    per_meeting = max(1, counts['chat_messages'] // len(meeting_ids))
+    step('chat_messages', _bulk(MeetingChat, (
+        MeetingChat(meeting_id=meeting_id, user_id=rng.choice(ids), message=f'Bench message {n}')
+        for meeting_id, ids in participants.items() for n in range(per_meeting)
+    ), batch_size))
+    return created
+
+
+@override_settings(DEBUG=False)
+def flush(log=print):
+    """
+    Delete the benchmark dataset. The large tables go first with single
+    DELETE statements (their rows have no dependants and no delete receivers
+    need to run for a dataset that is being dropped); users, courses and
+    meetings then go through the ORM so every other relation is cascaded.
+    """
+    from assessment.models import Assessment, AssessmentQuestions, QuestionBank, StudentAnswer, StudentSubmission
+    from content.models import Lesson, Module, ModuleProgress, UserProgress
+    from courses.models import Category, Course, Enrollment
+    from django.contrib.auth.models import User
+    from meetings.models import Meeting, MeetingChat, Participant
+    from notifications.models import Notification
+
+    raw = [
+        Notification.objects.filter(recipient__username__startswith=USER_PREFIX),
+        MeetingChat.objects.filter(meeting__title__startswith=MEETING_PREFIX),
+        Participant.objects.filter(meeting__title__startswith=MEETING_PREFIX),
+        StudentAnswer.objects.filter(submission__assessment__course__slug__startswith=COURSE_SLUG_PREFIX),
+        StudentSubmission.objects.filter(assessment__course__slug__startswith=COURSE_SLUG_PREFIX),
+        AssessmentQuestions.objects.filter(assessment__course__slug__startswith=COURSE_SLUG_PREFIX),
+        ModuleProgress.objects.filter(module__course__slug__startswith=COURSE_SLUG_PREFIX),
+        UserProgress.objects.filter(course__slug__startswith=COURSE_SLUG_PREFIX),
+        Enrollment.objects.filter(course__slug__startswith=COURSE_SLUG_PREFIX),
+        Lesson.objects.filter(module__course__slug__startswith=COURSE_SLUG_PREFIX),
+        Module.objects.filter(course__slug__startswith=COURSE_SLUG_PREFIX),
+    ]
+    for queryset in raw:
+        deleted = 0
+        # By id batches: a DELETE must not read the table it deletes from
+        while batch := list(queryset.values_list('id', flat=True)[:DEFAULT_BATCH_SIZE]):
+            with transaction.atomic():
+                deleted += queryset.model.objects.filter(id__in=batch)._raw_delete(connection.alias)
+        log(f'{queryset.model._meta.label}: {deleted}')
+
+    orm = [
+        Assessment.objects.filter(course__slug__startswith=COURSE_SLUG_PREFIX),
+        QuestionBank.objects.filter(question_text__startswith='Bench question ', created_by__username__startswith=USER_PREFIX),
+        Meeting.objects.filter(title__startswith=MEETING_PREFIX),
+        Course.objects.filter(slug__startswith=COURSE_SLUG_PREFIX),
+        Category.objects.filter(slug='bench-category'),
+    ]
+    for queryset in orm:
+        deleted, _ = queryset.delete()
+        log(f'{queryset.model._meta.label}: {deleted}')
+    user_ids = User.objects.filter(
+        Q(username__startswith=USER_PREFIX) | Q(username__startswith=INSTRUCTOR_PREFIX)
+    ).values_list('id', flat=True)
+    deleted = 0
+    for batch in _batches(list(user_ids), DEFAULT_BATCH_SIZE):
+        deleted += User.objects.filter(id__in=batch).delete()[0]
+    log(f'auth.User (with profiles and instructors): {deleted}')
+
+
+class BenchmarkContext:
+    """Seeded ids the cases draw their requests from"""
+
+    def __init__(self, rng, sample_size=200):
+        from assessment.models import Assessment, AssessmentQuestions
+        from content.models import Lesson
+        from courses.models import Course, Enrollment
+        from django.contrib.auth.models import User
+        from meetings.models import Participant
+
+        user_ids = list(User.objects.filter(username__startswith=USER_PREFIX).values_list('id', flat=True))
+        if not user_ids:
+            raise ValueError('No benchmark data; run manage.py seed_benchmark_data first')
+        sample = rng.sample(user_ids, min(sample_size, len(user_ids)))
+        self.course_count = Course.objects.filter(slug__startswith=COURSE_SLUG_PREFIX).count()
+        self.enrollments = list(Enrollment.objects.filter(student_id__in=sample).values_list('student_id', 'course_id'))
+        courses = {course_id for _, course_id in self.enrollments}
+        self.lessons = defaultdict(list)
+        for lesson_id, course_id in Lesson.objects.filter(module__course_id__in=courses).values_list('id', 'module__course_id'):
+            self.lessons[course_id].append(lesson_id)
+        self.assessments = dict(Assessment.objects.filter(course_id__in=courses).values_list('course_id', 'id'))
+        self.questions = defaultdict(list)
+        for assessment_id, question_id in AssessmentQuestions.objects.filter(
+            assessment_id__in=self.assessments.values()
+        ).values_list('assessment_id', 'question_id'):
+            self.questions[assessment_id].append(question_id)
+        self.participants = list(Participant.objects.filter(
+            meeting__title__startswith=MEETING_PREFIX
+        ).order_by('meeting_id', 'id').values_list('meeting_id', 'user_id')[:sample_size])
+        self.users = User.objects.in_bulk(
+            set(sample) | {user_id for _, user_id in self.participants}
+        )
+
+
+def _catalog(ctx, rng):
+    pages = max(1, ctx.course_count // 12)
+    return {'path': '/api/courses/public/', 'data': {'page': rng.randint(1, min(pages, 20))}}
+
+
+def _outline(ctx, rng):
+    user_id, course_id = rng.choice(ctx.enrollments)
+    return {'path': f'/api/content/course/{course_id}/modules-with-lessons/', 'user': user_id}
+
+
+def _tracking(ctx, rng):
+    user_id, course_id = rng.choice(ctx.enrollments)
+    return {'path': f'/api/courses/course-tracking/{course_id}/', 'user': user_id}
+
+
+def _track_progress(ctx, rng):
+    user_id, course_id = rng.choice(ctx.enrollments)
+    return {
+        'method': 'post', 'path': f'/api/content/progress/course/{course_id}/track/', 'user': user_id,
+        'data': {'lesson_id': rng.choice(ctx.lessons[course_id]), 'video_progress': rng.randint(10, 100)},
+    }
+
+
+def _submit_assessment(ctx, rng):
+    from assessment.models import StudentSubmission
+
+    user_id, course_id = rng.choice(ctx.enrollments)
+    assessment_id = ctx.assessments[course_id]
+    # Created inside the rolled-back transaction, outside the timing
+    submission = StudentSubmission.objects.create(
+        student_id=user_id, assessment_id=assessment_id, attempt_number=10_000 + rng.randint(0, 10_000)
+    )
+    return {
+        'method': 'post', 'path': f'/api/assessment/submissions/{submission.pk}/submit_assessment/', 'user': user_id,
+        'data': {'answers': [
+            {'question_id': question_id, 'selected_options': [rng.randint(0, 3)], 'marks_obtained': 1}
+            for question_id in ctx.questions[assessment_id]
+        ]},
+    }
+
+
+def _unread_count(ctx, rng):
+    user_id, _ = rng.choice(ctx.enrollments)
+    return {'path': '/api/notifications/unread_count/', 'user': user_id}
+
+
+def _chat(ctx, rng):
+    meeting_id, user_id = rng.choice(ctx.participants)
+    return {'path': f'/api/meetings/meetings/{meeting_id}/chat/', 'user': user_id}
+
+
+# name -> (request builder, runs in a rolled-back transaction)
+CASES = {
+    'catalog': (_catalog, False),
+    'outline': (_outline, False),
+    'tracking': (_tracking, False),
+    'track_progress': (_track_progress, True),
+    'submit_assessment': (_submit_assessment, True),
+    'unread_count': (_unread_count, False),
+    'chat': (_chat, False),
+}
+
+
+def _request(client, ctx, spec):
+    client.force_authenticate(ctx.users.get(spec.get('user')))
+    if spec.get('method') == 'post':
+        return client.post(spec['path'], spec.get('data'), format='json')
+    return client.get(spec['path'], spec.get('data'))
+
+
+def run_case(name, client, ctx, rng, iterations, warmup, devnull):
+    build, rollback = CASES[name]
+    latencies, queries, db_ms = [], [], []
+    statuses = Counter()
+    patterns = Counter()
+    for iteration in range(warmup + iterations):
+        recorder = QueryRecorder()
+        # Some views and receivers print; their output is not part of the report
+        with transaction.atomic() if rollback else nullcontext(), redirect_stdout(devnull):
+            spec = build(ctx, rng)
+            start = time.perf_counter()
+            with wrap_connections(recorder):
+                response = _request(client, ctx, spec)
+            elapsed = time.perf_counter() - start
+            if rollback:
+                transaction.set_rollback(True)
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        queries.append(recorder.count)
+        db_ms.append(recorder.seconds * 1000)
+        statuses[response.status_code] += 1
+        for sql, count in n_plus_one(recorder.fingerprints):
+            patterns[sql] = max(patterns[sql], count)
+
+    latencies.sort()
+    queries.sort()
+    db_ms.sort()
+    return {
+        'iterations': iterations,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'p50': round(percentile(latencies, 0.5), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'queries': {
+            'p50': percentile(queries, 0.5),
+            'p95': percentile(queries, 0.95),
+            'max': queries[-1],
+        },
+        'db_ms_p50': round(percentile(db_ms, 0.5), 2),
+        'n_plus_one': [{'sql': sql, 'repeats': count} for sql, count in patterns.most_common(5)],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def dataset_counts():
+    from assessment.models import StudentAnswer
+    from content.models import Lesson, Module, ModuleProgress
+    from courses.models import Course
+    from django.contrib.auth.models import User
+    from notifications.models import Notification
+
+    models = {
+        'users': User, 'courses': Course, 'modules': Module, 'lessons': Lesson,
+        'module_progress': ModuleProgress, 'student_answers': StudentAnswer, 'notifications': Notification,
+    }
+    return {name: model.objects.count() for name, model in models.items()}
+
+
+def run(cases=None, iterations=50, warmup=5, seed_value=0, log=print):
+    """Benchmark ``cases`` (default all); returns the JSON-serializable result"""
+    from rest_framework.test import APIClient
+
+    rng = random.Random(seed_value)
+    ctx = BenchmarkContext(rng)
+    # Views that fail are recorded by status code instead of aborting the run
+    client = APIClient(raise_request_exception=False)
+    results = {}
+    # Failing requests are counted in status_codes rather than logged each time
+    request_logger = logging.getLogger('django.request')
+    request_logger.disabled = True
+    # The benchmark records queries itself; QueryBudgetMiddleware would only log them again
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], QUERY_BUDGET_ENABLED=False), \
+                open(os.devnull, 'w') as devnull:
+            for name in cases or CASES:
+                result = results[name] = run_case(name, client, ctx, rng, iterations, warmup, devnull)
+                log(f"{name}: p50 {result['latency_ms']['p50']} ms, p95 {result['latency_ms']['p95']} ms, "
+                    f"{result['queries']['p50']} queries, status {result['status_codes']}")
+    finally:
+        request_logger.disabled = False
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'seed': seed_value,
+            'iterations': iterations,
+            'warmup': warmup,
+            'dataset': dataset_counts(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Per-case changes of ``current`` against ``baseline`` results. A case
+    regresses when its p95 latency grows by more than ``threshold`` (a
+    fraction) or its median query count grows at all.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        p95_before, p95_after = before['latency_ms']['p95'], result['latency_ms']['p95']
+        change = (p95_after - p95_before) / p95_before if p95_before else 0
+        queries_before, queries_after = before['queries']['p50'], result['queries']['p50']
+        rows.append({
+            'case': name,
+            'p95_ms_before': p95_before,
+            'p95_ms_after': p95_after,
+            'p95_change': round(change, 3),
+            'queries_before': queries_before,
+            'queries_after': queries_after,
+            'regressed': change > threshold or queries_after > queries_before,
+        })
+    return rows
@@ -0,0 +1,19 @@
+"""
+تطبيق Celery (Celery application).
+
+Used when ``PAYMENT_EVENT_QUEUE_BACKEND = 'celery'``; the broker is
+``CELERY_BROKER_URL`` (``REDIS_URL`` by default). Run a worker and the beat
+scheduler, which also picks up retries whose backoff has expired::
+
+    celery -A core worker -l info
+    celery -A core beat -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+app = Celery('core')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,140 @@
+"""
+توجيه القراءة إلى النسخ المتماثلة (Read replica routing).
+
+With replicas configured (``DATABASE_REPLICA_URLS``, see ``core.database``)
+``ReplicaRouter`` sends a read to a random replica when
+
+* the model is a catalog model listed in ``REPLICA_READ_MODELS`` (courses,
+  categories, articles, books), or
+* it runs inside ``replica_reads()``: search and analytics views, whose
+  queries are heavy and tolerate a little replication lag;
+
+and to the primary otherwise, and always inside a transaction.
+
+Read-your-writes: a write during a request pins the rest of that request to
+the primary, and ``ReplicaPinMiddleware`` pins the user's next requests for
+``REPLICA_PIN_SECONDS`` (longer than the expected replication lag) through
+the cache, so a student never sees a replica that has not caught up with
+their own progress or enrollment. The pin is looked up on the first read
+that would go to a replica, after DRF has authenticated the request. Use a
+cache shared by all workers (Redis, memcached) for pins to hold across
+processes.
+
+Migrations only run on the primary.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_KEY = 'db:pin:{}'
+
+# Routing state of the current request (None outside requests)
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+_replica_reads = contextvars.ContextVar('db_replica_reads', default=False)
+
+
+class RequestState:
+    __slots__ = ('request', 'wrote', 'pinned')
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self.pinned = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _user_id(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def _pinned(state):
+    if state.pinned is None:
+        # Resolving the user may itself read; those reads go to the primary
+        state.pinned = True
+        user_id = _user_id(state.request)
+        # An anonymous answer is not kept: DRF authenticates inside the view
+        state.pinned = bool(user_id and cache.get(PIN_KEY.format(user_id))) if user_id else None
+    return bool(state.pinned)
+
+
+def pin_user(user_id):
+    """Send ``user_id``'s reads to the primary for ``REPLICA_PIN_SECONDS``"""
+    cache.set(PIN_KEY.format(user_id), 1, _setting('REPLICA_PIN_SECONDS', 5))
+
+
+@contextmanager
+def replica_reads():
+    """Route every read in the block to a replica (unless pinned)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(view):
+    """Decorator form of ``replica_reads()`` for function views"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+        self.read_models = {label.lower() for label in _setting('REPLICA_READ_MODELS', ())}
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if not (_replica_reads.get() or model._meta.label_lower in self.read_models):
+            return None
+        state = _request_state.get()
+        if state is not None and (state.wrote or _pinned(state)):
+            return None
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """يثبت قراءات المستخدم على قاعدة البيانات الرئيسية بعد أي كتابة"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state.wrote:
+            user_id = _user_id(request)
+            if user_id:
+                pin_user(user_id)
+        return response
@@ -0,0 +1,186 @@
+"""
+نسخ الصور المتجاوبة (Responsive image variants).
+
+Every image field listed in ``IMAGE_FIELDS`` gets downscaled copies at
+``IMAGE_VARIANT_WIDTHS`` (never wider than the original) in WebP and JPEG,
+stored next to the original::
+
+    courses/photo.png
+    courses/photo__w320.webp   courses/photo__w320.jpg
+    courses/photo__w640.webp   courses/photo__w640.jpg
+    courses/photo__variants.json   (manifest: original size and variant names)
+
+Variants are generated by the ``image`` media job (``content.media_pipeline``),
+queued when a new image is saved (``extras.signals``, on the tracked image
+field). Reading them never queues work: images uploaded before this existed
+are backfilled with ``manage.py generate_image_variants``, which
+(re)generates variants in bulk with a process pool.
+
+The manifest is cached per file name (``image-variants`` cache namespace),
+so rendering a ``srcset`` costs one cache read and no storage access.
+"""
+import hashlib
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .tiered_cache import cache_ns
+
+DEFAULT_WIDTHS = (320, 640, 1280)
+MANIFEST_CACHE_SECONDS = 60 * 60 * 24
+MISSING_CACHE_SECONDS = 5 * 60
+
+# variant format -> (Pillow format, extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# model label -> image fields that get variants
+IMAGE_FIELDS = {
+    'courses.Course': ('image',),
+    'users.Profile': ('image_profile',),
+    'extras.Banner': ('image',),
+    'extras.CardImage': ('image_1', 'image_2', 'image_3'),
+    'articles.Article': ('image',),
+    'assessment.Flashcard': ('front_image', 'back_image'),
+    'assessment.QuestionBank': ('image',),
+}
+
+EXIF_ORIENTATION = 0x0112
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def variant_name(name, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f'{root}__w{width}.{FORMATS[fmt][1]}'
+
+
+def manifest_name(name):
+    root, _ = os.path.splitext(name)
+    return f'{root}__variants.json'
+
+
+def _cache_key(name):
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def _save(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def generate_variants(storage, name, widths=None, force=False):
+    """
+    Write the variants and manifest of image ``name``; existing variants are
+    kept unless ``force``. Returns the manifest.
+    """
+    from PIL import Image, ImageOps
+
+    widths = widths or _setting('IMAGE_VARIANT_WIDTHS', DEFAULT_WIDTHS)
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width
+        targets = sorted({w for w in widths if w < width}, reverse=True)
+        if targets and image.format == 'JPEG':
+            # Let libjpeg decode at a reduced scale that still covers the widest variant
+            image.draft('RGB', (targets[0], targets[0]))
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    current = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    for target in targets:
+        # Each variant is scaled down from the previous, larger one
+        current = current.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+        variants[str(target)] = {}
+        for fmt, (pil_format, _, options) in FORMATS.items():
+            output = variant_name(name, target, fmt)
+            variants[str(target)][fmt] = output
+            if not force and storage.exists(output):
+                continue
+            frame = current
+            if pil_format == 'JPEG' and has_alpha:
+                frame = Image.new('RGB', current.size, (255, 255, 255))
+                frame.paste(current, mask=current.getchannel('A'))
+            buffer = io.BytesIO()
+            frame.save(buffer, pil_format, **options)
+            _save(storage, output, buffer.getvalue())
+
+    manifest = {'width': width, 'height': height, 'variants': variants}
+    _save(storage, manifest_name(name), json.dumps(manifest).encode())
+    cache_ns('image-variants').set(_cache_key(name), manifest, MANIFEST_CACHE_SECONDS)
+    return manifest
+
+
+def process_image_job(instance, field_file):
+    """``image`` handler of the media pipeline"""
+    manifest = generate_variants(field_file.storage, field_file.name)
+    return {'width': manifest['width'], 'height': manifest['height'], 'variants': sorted(manifest['variants'], key=int)}
+
+
+def queue_variants(field_file):
+    """Queue variant generation for ``field_file`` unless a job is already waiting"""
+    from content.media_pipeline import enqueue
+    from content.models import MediaJob
+
+    instance = field_file.instance
+    waiting = MediaJob.objects.filter(
+        kind=MediaJob.Kind.IMAGE, model=instance._meta.label_lower, object_id=str(instance.pk),
+        field_name=field_file.field.name, source_name=field_file.name,
+        status__in=[MediaJob.Status.PENDING, MediaJob.Status.PROCESSING],
+    )
+    if not waiting.exists():
+        enqueue(instance, field_file.field.name, MediaJob.Kind.IMAGE)
+
+
+def get_variants(field_file):
+    """
+    Manifest of ``field_file``'s variants, or None while they do not exist
+    yet. Read-only: a missing manifest is cached for a few minutes.
+    """
+    if not field_file:
+        return None
+    namespace = cache_ns('image-variants')
+    key = _cache_key(field_file.name)
+    manifest = namespace.get(key)
+    if manifest is None:
+        try:
+            with field_file.storage.open(manifest_name(field_file.name), 'rb') as stored:
+                manifest = json.loads(stored.read())
+            namespace.set(key, manifest, MANIFEST_CACHE_SECONDS)
+        except (OSError, ValueError):
+            manifest = {}
+            namespace.set(key, manifest, MISSING_CACHE_SECONDS)
+    return manifest or None
+
+
+def image_srcset(field_file, request=None):
+    """
+    ``{'webp': 'url 320w, url 640w', 'jpeg': '...'}`` for an image field,
+    empty until the variants exist. Originals narrower than every variant
+    width have no variants either.
+    """
+    manifest = get_variants(field_file)
+    if not manifest:
+        return {}
+    storage = field_file.storage
+    srcset = {}
+    for fmt in FORMATS:
+        entries = []
+        for width, names in sorted(manifest['variants'].items(), key=lambda item: int(item[0])):
+            url = storage.url(names[fmt])
+            entries.append(f'{request.build_absolute_uri(url) if request else url} {width}w')
+        if entries:
+            srcset[fmt] = ', '.join(entries)
+    return srcset
@@ -0,0 +1,100 @@
+"""
+عدادات التفاعل وحالة "أعجبني" (Interaction counters and per-user flags).
+
+Like, bookmark and rating totals are stored on the liked object and kept in
+step by the ``post_save`` / ``post_delete`` receivers of the interaction
+models with ``adjust_counters``: a single ``UPDATE ... SET n = n + 1``, so
+concurrent likes never lose an update and reading a count costs nothing.
+Interaction rows must therefore be created and deleted one by one (or with
+``QuerySet.delete()``, which sends ``post_delete``), never with
+``bulk_create`` or ``related_manager.add()``.
+
+``user_has_related`` answers "did the requesting user like/bookmark this"
+for every object of the serialized page with one query, memoized in the
+serializer context like the video signer in ``content.video_signing``.
+Serializers that batch over their siblings this way set
+``Meta.list_serializer_class = SiblingListSerializer``.
+"""
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from rest_framework import serializers
+
+
+def adjust_counters(model, pk, cached=None, **deltas):
+    """
+    Atomically add ``deltas`` to counter fields of one row (never below 0).
+    ``cached`` is an in-memory instance of that row to keep in step.
+    """
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta}
+    if not pk or not updates:
+        return
+    model.objects.filter(pk=pk).update(**updates)
+    if cached is not None:
+        for field, delta in deltas.items():
+            setattr(cached, field, max(0, (getattr(cached, field) or 0) + delta))
+
+
+def cached_related(instance, field):
+    """The object behind foreign key ``field`` if already loaded, else None"""
+    descriptor = getattr(type(instance), field)
+    return getattr(instance, field) if descriptor.is_cached(instance) else None
+
+
+class RelationResolver:
+    """
+    Which objects the user has a row for in ``model`` (joined on ``field``),
+    loaded for all requested ids at once and memoized.
+    """
+
+    def __init__(self, model, field, user):
+        self.queryset = model.objects.filter(user=user)
+        self.field = field
+        self.loaded = set()
+        self.related = set()
+
+    def contains(self, object_id, siblings=()):
+        if object_id not in self.loaded:
+            ids = {object_id, *(pk for pk in siblings if pk is not None)} - self.loaded
+            self.related.update(
+                self.queryset.filter(**{f'{self.field}__in': ids})
+                .values_list(self.field, flat=True)
+            )
+            self.loaded.update(ids)
+        return object_id in self.related
+
+
+class SiblingListSerializer(serializers.ListSerializer):
+    """
+    ``many=True`` serializer that evaluates its instances once into
+    ``instances``, so a child field can look up all of them together.
+    """
+    instances = ()
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        self.instances = list(iterable)
+        return super().to_representation(self.instances)
+
+
+def sibling_instances(serializer):
+    """Instances of the enclosing ``SiblingListSerializer``, if any"""
+    parent = serializer.parent
+    return parent.instances if isinstance(parent, SiblingListSerializer) else ()
+
+
+def user_has_related(serializer, obj, model, field):
+    """
+    True if the requesting user has a ``model`` row pointing at ``obj``
+    through ``field`` (e.g. ``ReviewLike`` / ``'review_id'``). Anonymous
+    users get False without a query.
+    """
+    request = serializer.context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    key = f'_relation:{model._meta.label}:{field}'
+    resolver = serializer.context.get(key)
+    if resolver is None:
+        resolver = serializer.context[key] = RelationResolver(model, field, user)
+    return resolver.contains(obj.pk, [item.pk for item in sibling_instances(serializer)])
@@ -3,6 +3,8 @@
 from django.http import HttpResponseForbidden
 from django.shortcuts import redirect
 
+from users.principal import RequestPrincipal
+
 class AdminMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -11,3 +13,13 @@ class AdminMiddleware:
         if request.path.startswith('/admin/') and not request.user.is_staff:
             return redirect('/')
         return self.get_response(request)
+
+
+class PrincipalMiddleware:
+    """يرفق request.principal لحل دور المستخدم مرة واحدة لكل طلب"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = RequestPrincipal(request)
+        return self.get_response(request)
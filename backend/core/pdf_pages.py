@@ -0,0 +1,444 @@
+"""
+صفحات ملفات PDF (Pre-rendered PDF pages and text).
+
+A module PDF or a book is split by the ``pdf`` media job
+(``content.media_pipeline``) into ``content.DocumentPage`` rows: the text of
+every page, which feeds content search, and a JPEG preview of the first
+``PDF_PREVIEW_PAGES`` pages, ``PDF_PREVIEW_WIDTH`` pixels wide, stored under
+``pdf-pages/<model>/<pk>/<digest>/<number>.jpg``.
+
+Readers fetch pages one at a time instead of the whole file::
+
+    GET /api/media/<kind>/<pk>/pages/            page count and page URLs
+    GET /api/media/<kind>/<pk>/pages/<number>/   preview image of one page
+
+with the access rules of ``core.protected_media``. A page that has not been
+rendered yet (beyond ``PDF_PREVIEW_PAGES``, or before the job ran) is
+rendered on demand; concurrent requests for the same page wait for the
+first render instead of starting their own. Page images are named after
+the source file, so clients may cache them for ``PDF_PAGE_CACHE_SECONDS``.
+
+Rendering uses PyMuPDF when it is installed and the poppler tools
+(``pdfinfo``, ``pdftotext``, ``pdftoppm``; ``POPPLER_PATH`` or PATH)
+otherwise. Both need a storage with local paths.
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import BigIntegerField
+from django.db.models.functions import Cast
+from django.http import Http404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from content.media_pipeline import PermanentError
+
+from .protected_media import MEDIA_AUTHENTICATION, get_protected_file, serve_stored_file, signed_url
+
+DEFAULT_PREVIEW_PAGES = 50
+DEFAULT_PREVIEW_WIDTH = 1024
+DEFAULT_CACHE_SECONDS = 60 * 60 * 24 * 7
+RENDER_LOCK_SECONDS = 60
+JPEG_QUALITY = 80
+
+# protected media kind -> model field holding the extracted page count
+PDF_KINDS = {
+    'module-pdf': 'pdf_page_count',
+    'book': 'pdf_page_count',
+}
+# model label -> protected media kind
+PDF_MODELS = {
+    'content.module': 'module-pdf',
+    'articles.book': 'book',
+}
+
+PAGES_RE = re.compile(r'^Pages:\s+(\d+)', re.MULTILINE)
+RENDERED_PAGE_RE = re.compile(r'-(\d+)\.jpg$')
+
+
+class PdfToolMissing(PermanentError):
+    """Neither PyMuPDF nor the poppler tools are installed"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _fitz():
+    try:
+        import fitz
+    except ImportError:
+        return None
+    return fitz
+
+
+def _poppler(tool):
+    directory = _setting('POPPLER_PATH', None)
+    found = os.path.join(directory, tool) if directory else shutil.which(tool)
+    if not found or not os.path.exists(found):
+        raise PdfToolMissing(f'{tool} not found: install PyMuPDF or poppler-utils, or set POPPLER_PATH')
+    return found
+
+
+def _run(args):
+    completed = subprocess.run(args, capture_output=True, timeout=_setting('PDF_TIMEOUT_SECONDS', 10 * 60))
+    if completed.returncode != 0:
+        tail = completed.stderr.decode('utf-8', 'replace').strip().splitlines()[-3:]
+        raise RuntimeError(f'{os.path.basename(args[0])} exited with {completed.returncode}: ' + ' | '.join(tail))
+    return completed
+
+
+def parse_pdfinfo(text):
+    """Page count from ``pdfinfo`` output"""
+    match = PAGES_RE.search(text)
+    return int(match.group(1)) if match else 0
+
+
+def split_pages(text, count):
+    """Per-page texts from ``pdftotext`` output (pages end with a form feed)"""
+    pages = text.split('\f')[:count]
+    return pages + [''] * (count - len(pages))
+
+
+def page_count(path):
+    fitz = _fitz()
+    if fitz:
+        with fitz.open(path) as document:
+            return document.page_count
+    completed = _run([_poppler('pdfinfo'), path])
+    return parse_pdfinfo(completed.stdout.decode('utf-8', 'replace'))
+
+
+def extract_text(path, count):
+    fitz = _fitz()
+    if fitz:
+        with fitz.open(path) as document:
+            texts = [page.get_text() for page in document]
+    else:
+        completed = _run([_poppler('pdftotext'), '-enc', 'UTF-8', path, '-'])
+        texts = split_pages(completed.stdout.decode('utf-8', 'replace'), count)
+    # PostgreSQL text columns cannot hold NUL characters
+    return [text.replace('\x00', '').strip() for text in texts]
+
+
+def render_pages(path, out_dir, first, last, width=None):
+    """
+    Render pages ``first``..``last`` to ``<out_dir>/<number>.jpg``; returns
+    ``{number: (file name, width, height)}``.
+    """
+    from PIL import Image
+
+    width = width or _setting('PDF_PREVIEW_WIDTH', DEFAULT_PREVIEW_WIDTH)
+    os.makedirs(out_dir, exist_ok=True)
+    rendered = {}
+    # Pages are rendered into a scratch directory and moved into place, so a
+    # reader never sees a half-written image
+    with tempfile.TemporaryDirectory(dir=out_dir) as scratch:
+        fitz = _fitz()
+        if fitz:
+            with fitz.open(path) as document:
+                for number in range(first, last + 1):
+                    page = document[number - 1]
+                    zoom = width / page.rect.width
+                    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                    image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+                    image.save(os.path.join(scratch, f'page-{number}.jpg'), 'JPEG',
+                               quality=JPEG_QUALITY, progressive=True)
+        else:
+            _run([_poppler('pdftoppm'), '-f', str(first), '-l', str(last),
+                  '-scale-to-x', str(width), '-scale-to-y', '-1',
+                  '-jpeg', '-jpegopt', f'quality={JPEG_QUALITY},progressive=y',
+                  path, os.path.join(scratch, 'page')])
+        for entry in os.listdir(scratch):
+            match = RENDERED_PAGE_RE.search(entry)
+            if not match:
+                continue
+            number = int(match.group(1))
+            target = os.path.join(out_dir, f'{number}.jpg')
+            os.replace(os.path.join(scratch, entry), target)
+            with Image.open(target) as image:
+                rendered[number] = (f'{number}.jpg',) + image.size
+    return rendered
+
+
+def _local_path(field_file):
+    try:
+        return field_file.path
+    except NotImplementedError:
+        raise PermanentError('PDF processing needs a local filesystem storage')
+
+
+def pages_directory(instance, source_name):
+    """Storage directory of the page images of one uploaded file"""
+    digest = hashlib.sha1(source_name.encode()).hexdigest()[:12]
+    return f'pdf-pages/{instance._meta.model_name}/{instance.pk}/{digest}'
+
+
+def _pages(instance):
+    from content.models import DocumentPage
+    return DocumentPage.objects.filter(model=instance._meta.label_lower, object_id=str(instance.pk))
+
+
+def _count_field(instance):
+    return PDF_KINDS[PDF_MODELS[instance._meta.label_lower]]
+
+
+def document_page_count(instance, field_file):
+    """
+    Page count stored by the ``pdf`` job, else read from the file. Page rows
+    are not counted: pages rendered on demand before the job ran have rows too.
+    """
+    return getattr(instance, _count_field(instance)) or page_count(_local_path(field_file))
+
+
+def process_pdf_job(instance, field_file):
+    """``pdf`` handler of the media pipeline"""
+    from content.models import DocumentPage
+
+    storage = field_file.storage
+    path = _local_path(field_file)
+    count = page_count(path)
+    texts = extract_text(path, count)
+    directory = pages_directory(instance, field_file.name)
+    eager = min(count, _setting('PDF_PREVIEW_PAGES', DEFAULT_PREVIEW_PAGES))
+    rendered = render_pages(path, storage.path(directory), 1, eager) if eager else {}
+
+    model = type(instance)
+    count_field = _count_field(instance)
+    with transaction.atomic():
+        # Only applies if the instance still has the same file
+        if not model.objects.filter(pk=instance.pk, **{field_file.field.name: field_file.name}).update(
+            **{count_field: count}
+        ):
+            shutil.rmtree(storage.path(directory), ignore_errors=True)
+            return {'skipped': 'file replaced'}
+        previous = _pages(instance)
+        stale_sources = list(previous.exclude(source_name=field_file.name)
+                             .values_list('source_name', flat=True).distinct())
+        # Pages rendered on demand before this run are kept
+        on_demand = {
+            number: (image, width, height)
+            for number, image, width, height in previous.filter(source_name=field_file.name)
+            .exclude(image='').values_list('number', 'image', 'width', 'height')
+        }
+        previous.delete()
+        pages = []
+        for number, text in enumerate(texts, start=1):
+            image, width, height = on_demand.get(number, ('', 0, 0))
+            if number in rendered:
+                name, width, height = rendered[number]
+                image = f'{directory}/{name}'
+            pages.append(DocumentPage(
+                model=instance._meta.label_lower, object_id=str(instance.pk), source_name=field_file.name,
+                number=number, text=text, image=image, width=width, height=height,
+            ))
+        DocumentPage.objects.bulk_create(pages, batch_size=500)
+
+    # Pages of the previous upload are no longer referenced
+    for source_name in stale_sources:
+        shutil.rmtree(storage.path(pages_directory(instance, source_name)), ignore_errors=True)
+    return {'pages': count, 'rendered': len(rendered), 'characters': sum(len(text) for text in texts)}
+
+
+def queue_pages(instance, field_name):
+    """Queue page extraction unless the current file was processed or is waiting"""
+    from content.media_pipeline import enqueue
+    from content.models import MediaJob
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return None
+    count_field = _count_field(instance)
+    if getattr(instance, count_field) and _pages(instance).filter(source_name=field_file.name).exists():
+        return None
+    waiting = MediaJob.objects.filter(
+        kind=MediaJob.Kind.PDF, model=instance._meta.label_lower, object_id=str(instance.pk),
+        field_name=field_name, source_name=field_file.name,
+        status__in=[MediaJob.Status.PENDING, MediaJob.Status.PROCESSING],
+    )
+    if waiting.exists():
+        return None
+    # The stored count belongs to the previous file until the job has run
+    unset = instance._meta.get_field(count_field).get_default()
+    type(instance).objects.filter(pk=instance.pk).update(**{count_field: unset})
+    setattr(instance, count_field, unset)
+    return enqueue(instance, field_name, MediaJob.Kind.PDF)
+
+
+def get_page(instance, field_file, number):
+    """
+    The ``DocumentPage`` of page ``number`` with its preview rendered
+    (on demand when needed), or None past the last page.
+    """
+    from content.models import DocumentPage
+
+    pages = _pages(instance)
+    page = pages.filter(number=number, source_name=field_file.name).first()
+    if page is not None and page.image:
+        return page
+    if page is None and not 1 <= number <= document_page_count(instance, field_file):
+        return None
+
+    lock = f'pdf-page:render:{instance._meta.label_lower}:{instance.pk}:{number}'
+    if not cache.add(lock, 1, RENDER_LOCK_SECONDS):
+        # Another request is rendering this page: wait for its result
+        deadline = time.monotonic() + RENDER_LOCK_SECONDS
+        while time.monotonic() < deadline and cache.get(lock):
+            time.sleep(0.2)
+        page = pages.filter(number=number, source_name=field_file.name).exclude(image='').first()
+        if page is not None:
+            return page
+    try:
+        directory = pages_directory(instance, field_file.name)
+        rendered = render_pages(_local_path(field_file), field_file.storage.path(directory), number, number)
+        if number not in rendered:
+            # The file has fewer pages than counted
+            return None
+        name, width, height = rendered[number]
+        page, _ = DocumentPage.objects.update_or_create(
+            model=instance._meta.label_lower, object_id=str(instance.pk), number=number,
+            defaults={'source_name': field_file.name, 'image': f'{directory}/{name}',
+                      'width': width, 'height': height},
+        )
+    finally:
+        cache.delete(lock)
+    return page
+
+
+def module_ids_matching(query):
+    """Subquery of the IDs of modules whose PDF text contains ``query``"""
+    from content.models import DocumentPage
+
+    return (DocumentPage.objects.filter(model='content.module', text__icontains=query)
+            .annotate(module_id=Cast('object_id', BigIntegerField())).values('module_id'))
+
+
+def search_documents(request, query, course_id=None, limit=20, pages_per_document=5):
+    """
+    PDFs the user may read whose text contains ``query``:
+    ``[{'kind', 'id', 'title', 'pages': [{'number', 'snippet'}]}]``.
+    """
+    from django.apps import apps
+    from content.models import DocumentPage
+    from .protected_media import MEDIA_KINDS, has_access
+
+    matches = {}
+    for page in (DocumentPage.objects.filter(model__in=PDF_MODELS, text__icontains=query)
+                 .order_by('model', 'object_id', 'number').only('model', 'object_id', 'number', 'text')):
+        pages = matches.setdefault((page.model, page.object_id), [])
+        if len(pages) < pages_per_document:
+            pages.append({'number': page.number, 'snippet': snippet(page.text, query)})
+
+    results = []
+    for label, kind in PDF_MODELS.items():
+        ids = [object_id for model, object_id in matches if model == label]
+        if not ids:
+            continue
+        queryset = apps.get_model(MEDIA_KINDS[kind][0]).objects.filter(pk__in=ids)
+        if label == 'content.module' and course_id:
+            queryset = queryset.filter(course_id=course_id)
+        for instance in queryset:
+            if not has_access(request, kind, instance):
+                continue
+            results.append({
+                'kind': kind,
+                'id': instance.pk,
+                'title': getattr(instance, 'title', None) or instance.name,
+                'pages': matches[(label, str(instance.pk))],
+            })
+    return results[:limit]
+
+
+def snippet(text, query, radius=80):
+    """The part of ``text`` around the first match of ``query``"""
+    position = text.lower().find(query.lower())
+    if position < 0:
+        return text[:radius * 2]
+    start = max(position - radius, 0)
+    end = position + len(query) + radius
+    return ('…' if start else '') + text[start:end].strip() + ('…' if end < len(text) else '')
+
+
+def _get_document(request, kind, pk):
+    if kind not in PDF_KINDS:
+        raise Http404('Unknown document kind')
+    return get_protected_file(request, kind, pk)
+
+
+def _unavailable(exc):
+    return Response({'error': f'تعذر عرض صفحات الملف: {exc}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def document_pages(request, kind, pk):
+    """
+    Page count and page image URLs of a PDF
+
+    GET /api/media/<kind>/<pk>/pages/
+    kind: module-pdf | book
+    """
+    try:
+        instance, field_file = _get_document(request, kind, pk)
+    except PermissionDenied as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_403_FORBIDDEN)
+
+    pages = {
+        number: (width, height)
+        for number, width, height in _pages(instance).filter(source_name=field_file.name)
+        .values_list('number', 'width', 'height')
+    }
+    # Ready once the pdf job has split the file and stored its page count
+    ready = bool(getattr(instance, _count_field(instance)))
+    try:
+        count = document_page_count(instance, field_file)
+    except PermanentError as exc:
+        return _unavailable(exc)
+    return Response({
+        'page_count': count,
+        'ready': ready,
+        'pages': [
+            {
+                'number': number,
+                'url': signed_url(reverse('document-page', args=[kind, pk, number]), kind, pk, request),
+                'width': pages.get(number, (0, 0))[0],
+                'height': pages.get(number, (0, 0))[1],
+            }
+            for number in range(1, count + 1)
+        ],
+    })
+
+
+@api_view(['GET'])
+@authentication_classes(MEDIA_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def document_page(request, kind, pk, number):
+    """
+    Preview image of one page of a PDF
+
+    GET /api/media/<kind>/<pk>/pages/<number>/
+    """
+    try:
+        instance, field_file = _get_document(request, kind, pk)
+    except PermissionDenied as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        page = get_page(instance, field_file, number)
+    except PermanentError as exc:
+        return _unavailable(exc)
+    if page is None:
+        return Response({'error': 'رقم الصفحة غير موجود'}, status=status.HTTP_404_NOT_FOUND)
+    return serve_stored_file(request, field_file.storage, page.image,
+                             max_age=_setting('PDF_PAGE_CACHE_SECONDS', DEFAULT_CACHE_SECONDS))
@@ -0,0 +1,71 @@
+"""
+إحصاءات العمليات عبر الذاكرة المؤقتة (Per-process stats shared through the cache).
+
+Instrumentation counters (signal profiler, namespaced cache, query budgets)
+are kept in memory per process. ``ProcessStats`` publishes this process'
+snapshot to the shared cache under ``<prefix><pid>`` and keeps the list of
+publishing pids under ``<prefix>pids``, so a management command or an admin
+endpoint running in any process can aggregate all of them::
+
+    publisher = ProcessStats('core:signal_profile:')
+    if publisher.due(10):
+        publisher.publish(snapshot())
+    for snapshot in publisher.published():
+        ...
+
+Publishing is throttled by the caller through ``due()`` and never raises:
+metrics must not break the code path they measure.
+"""
+import os
+import threading
+import time
+
+from django.core.cache import cache
+
+DEFAULT_TIMEOUT = 60 * 60
+MAX_PROCESSES = 256
+
+
+class ProcessStats:
+    def __init__(self, prefix, timeout=DEFAULT_TIMEOUT):
+        self.prefix = prefix
+        self.index_key = f'{prefix}pids'
+        self.timeout = timeout
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def _key(self, pid):
+        return f'{self.prefix}{pid}'
+
+    def due(self, interval):
+        """Whether ``interval`` seconds passed since the last publish (claims it)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_publish < interval:
+                return False
+            self._last_publish = now
+            return True
+
+    def publish(self, snapshot):
+        """Store this process' snapshot in the cache"""
+        pid = os.getpid()
+        try:
+            cache.set(self._key(pid), snapshot, self.timeout)
+            pids = cache.get(self.index_key) or []
+            if pid not in pids:
+                cache.set(self.index_key, (pids + [pid])[-MAX_PROCESSES:], self.timeout)
+        except Exception:
+            # Metrics must never break the code path they measure
+            pass
+
+    def clear(self):
+        """Drop this process' published snapshot"""
+        cache.delete(self._key(os.getpid()))
+
+    def published(self):
+        """Snapshots published by the other processes"""
+        for pid in cache.get(self.index_key) or []:
+            if pid != os.getpid():
+                snapshot = cache.get(self._key(pid))
+                if snapshot is not None:
+                    yield snapshot
@@ -0,0 +1,402 @@
+"""
+وسائط محمية (Protected media streaming).
+
+``GET /api/media/<kind>/<pk>/`` serves a private file after one access
+check:
+
+* ``module-video`` / ``module-pdf`` / ``module-poster``: enrolled students
+  and the course's instructors / staff;
+* ``book``: any signed-in user while the book is available;
+* ``meeting-materials``: the meeting creator, its participants and staff.
+
+The HLS renditions of a module video are served the same way under
+``GET /api/media/module-hls/<pk>/<file>``, so the relative URIs of the
+playlists resolve to the endpoint too.
+
+Serializers link to these URLs instead of ``MEDIA_URL``
+(``ProtectedFileField``, ``protected_url()``); the web server must not
+serve the protected directories of ``MEDIA_ROOT`` itself.
+
+A media element (``<video src>``, ``<img>``, an HLS player) sends neither
+the JWT header nor, on another origin, the session cookie, so the URLs built
+for a signed-in user carry a short-lived signed token instead
+(``?token=<expires>:<user id>:<hmac>``, over kind, pk, user id and an expiry
+rounded up to ``PROTECTED_MEDIA_TOKEN_BUCKET_SECONDS`` so a page render reuses
+one URL). ``MediaTokenAuthentication`` accepts it in place of header auth
+for that one file; the access check still runs for the user it names. HLS
+URLs put the token in the path (``/api/media/module-hls/<pk>/t/<token>/...``)
+so the relative URIs of the playlists keep it.
+
+The decision is cached per (user, kind, pk) in the ``media-access`` cache
+namespace for
+``PROTECTED_MEDIA_ACCESS_SECONDS``, so the many range requests a player makes
+while seeking do not repeat the enrollment queries.
+
+How the bytes are sent depends on ``PROTECTED_MEDIA_BACKEND``:
+
+* ``'nginx'``: an empty response with ``X-Accel-Redirect`` pointing at an
+  ``internal`` location (``PROTECTED_MEDIA_INTERNAL_PREFIX``, aliased to
+  ``MEDIA_ROOT``); nginx streams the file and handles ranges itself;
+* ``'sendfile'``: the same with ``X-Sendfile`` and the absolute path
+  (Apache mod_xsendfile, lighttpd);
+* ``'django'`` (default): a ``FileResponse`` with ``ETag`` /
+  ``Last-Modified``, ``If-None-Match`` (304) and single ``Range`` /
+  ``If-Range`` support (206 / 416). A range is served from an open file
+  positioned at its start, so seeking never reads the bytes before it, and
+  with gunicorn the file descriptor goes to ``sendfile()`` bounded by
+  ``Content-Length``.
+"""
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import serializers, status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+
+from users.principal import get_principal
+
+from .tiered_cache import cache_ns
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _module_access(request, module):
+    principal = get_principal(request)
+    return principal.can_manage_course(module.course_id) or principal.is_enrolled(module.course_id)
+
+
+def _book_access(request, book):
+    return book.is_available or request.user.is_staff
+
+
+def _meeting_access(request, meeting):
+    user = request.user
+    return (
+        user.is_staff
+        or meeting.creator_id == user.pk
+        or meeting.participants.filter(user=user).exists()
+    )
+
+
+# kind -> (model, file field, access check)
+MEDIA_KINDS = {
+    'module-video': ('content.Module', 'video', _module_access),
+    'module-pdf': ('content.Module', 'pdf', _module_access),
+    'module-poster': ('content.Module', 'video_poster', _module_access),
+    'book': ('articles.Book', 'book_file', _book_access),
+    'meeting-materials': ('meetings.Meeting', 'materials', _meeting_access),
+}
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single ``bytes=`` range, None to serve
+    the whole file (no header, several ranges, other units), or ``False``
+    when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        # Strong comparison only: a weak validator never matches
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+class RangeFile:
+    """Read at most ``length`` bytes of ``file`` from its current position"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _content_type(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def file_response(request, path, filename=None):
+    """Serve ``path`` with conditional GET and single byte range support"""
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{last_modified:x}-{size:x}"'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is not None and not _if_range_matches(request, etag, last_modified):
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    content_type = _content_type(path)
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1),
+                                content_type=content_type, filename=filename, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def serve_stored_file(request, storage, name, max_age=3600):
+    """Send the stored file ``name`` through the configured backend"""
+    backend = _setting('PROTECTED_MEDIA_BACKEND', 'django')
+    filename = os.path.basename(name)
+    if backend == 'nginx':
+        response = HttpResponse(content_type=_content_type(name))
+        prefix = _setting('PROTECTED_MEDIA_INTERNAL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+        response['Content-Disposition'] = f"inline; filename*=utf-8''{quote(filename)}"
+    elif backend == 'sendfile':
+        response = HttpResponse(content_type=_content_type(name))
+        response['X-Sendfile'] = storage.path(name)
+        response['Content-Disposition'] = f"inline; filename*=utf-8''{quote(filename)}"
+    else:
+        response = file_response(request, storage.path(name), filename=filename)
+    response['Cache-Control'] = f'private, max-age={max_age}'
+    return response
+
+
+def serve_field_file(request, field_file):
+    """Send a stored file through the configured backend"""
+    return serve_stored_file(request, field_file.storage, field_file.name)
+
+
+def get_protected_file(request, kind, pk):
+    """
+    ``(instance, field_file)`` of a protected file the requesting user may
+    read; raises Http404 / PermissionDenied otherwise.
+    """
+    if kind not in MEDIA_KINDS:
+        raise Http404('Unknown media kind')
+    model_label, field_name, _ = MEDIA_KINDS[kind]
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    field_file = getattr(instance, field_name, None)
+    if not field_file:
+        raise Http404('File not found')
+    if not has_access(request, kind, instance):
+        raise PermissionDenied('ليس لديك صلاحية للوصول إلى هذا الملف')
+    return instance, field_file
+
+
+def has_access(request, kind, instance):
+    """Cached result of the access check of ``kind`` for the requesting user"""
+    namespace = cache_ns('media-access')
+    key = f'{request.user.pk}:{kind}:{instance.pk}'
+    allowed = namespace.get(key)
+    if allowed is None:
+        allowed = bool(MEDIA_KINDS[kind][2](request, instance))
+        namespace.set(key, allowed, _setting('PROTECTED_MEDIA_ACCESS_SECONDS', 300))
+    return allowed
+
+
+def _token_signature(kind, pk, user_id, expires):
+    message = f'{kind}:{pk}:{user_id}:{expires}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def media_token(kind, pk, user_id, now=None):
+    """Signed token letting ``user_id`` fetch the ``kind`` file of ``pk``"""
+    bucket = _setting('PROTECTED_MEDIA_TOKEN_BUCKET_SECONDS', 300)
+    now = int(time.time() if now is None else now)
+    expires = now + _setting('PROTECTED_MEDIA_TOKEN_SECONDS', 6 * 3600)
+    expires = -(-expires // bucket) * bucket
+    return f'{expires}:{user_id}:{_token_signature(kind, pk, user_id, expires)}'
+
+
+def check_media_token(token, kind, pk, now=None):
+    """User id named by a valid, unexpired ``token`` for (kind, pk), or None"""
+    try:
+        expires, user_id, signature = token.split(':')
+        expires, user_id = int(expires), int(user_id)
+    except (AttributeError, ValueError):
+        return None
+    if expires < (time.time() if now is None else now):
+        return None
+    if not hmac.compare_digest(signature, _token_signature(kind, pk, user_id, expires)):
+        return None
+    return user_id
+
+
+class MediaTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate a media request by the signed token of its URL (query
+    string or, for HLS, path), bound to the kind and pk being fetched.
+    """
+
+    def authenticate(self, request):
+        kwargs = request.parser_context.get('kwargs', {})
+        token = kwargs.get('token') or request.query_params.get('token')
+        if not token:
+            return None
+        user_id = check_media_token(token, kwargs.get('kind', 'module-video'), kwargs.get('pk'))
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first() if user_id else None
+        if user is None:
+            raise AuthenticationFailed('رابط الملف غير صالح أو منتهي الصلاحية')
+        return user, None
+
+
+# The usual JWT / session authentication (whose challenge makes a missing
+# credential a 401), then the signed URL
+MEDIA_AUTHENTICATION = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, MediaTokenAuthentication]
+
+
+@api_view(['GET'])
+@authentication_classes(MEDIA_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def protected_media(request, kind, pk):
+    """
+    Stream a protected file
+
+    GET /api/media/<kind>/<pk>/
+    kind: module-video | module-pdf | book | meeting-materials
+    """
+    try:
+        instance, field_file = get_protected_file(request, kind, pk)
+    except PermissionDenied as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_403_FORBIDDEN)
+    return serve_field_file(request, field_file)
+
+
+@api_view(['GET'])
+@authentication_classes(MEDIA_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def protected_hls(request, pk, name, token=None):
+    """
+    Stream a file of the HLS package of a module video
+
+    GET /api/media/module-hls/<pk>/<name>   (master.m3u8, renditions, segments)
+    GET /api/media/module-hls/<pk>/t/<token>/<name>
+    """
+    try:
+        module, _ = get_protected_file(request, 'module-video', pk)
+    except PermissionDenied as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_403_FORBIDDEN)
+    if not module.hls_manifest:
+        raise Http404('Video not packaged')
+    directory = posixpath.dirname(module.hls_manifest)
+    path = posixpath.normpath(f'{directory}/{name}')
+    if not path.startswith(directory + '/'):
+        raise Http404('File not found')
+    return serve_stored_file(request, module.video.storage, path)
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _request_user_id(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def signed_url(url, kind, pk, request):
+    """``url`` with the media token of the requesting user, if signed in"""
+    user_id = _request_user_id(request)
+    if user_id is not None:
+        url = f'{url}?token={media_token(kind, pk, user_id)}'
+    return _absolute(url, request)
+
+
+def protected_url(kind, instance, request=None):
+    """URL of the access-checked endpoint for the file of ``instance``, or None"""
+    if not getattr(instance, MEDIA_KINDS[kind][1], None):
+        return None
+    return signed_url(reverse('protected-media', args=[kind, instance.pk]), kind, instance.pk, request)
+
+
+def hls_url(module, request=None):
+    """URL of the master playlist of a packaged module video, or None"""
+    if not module.hls_manifest:
+        return None
+    user_id = _request_user_id(request)
+    if user_id is None:
+        return _absolute(reverse('protected-hls', args=[module.pk, 'master.m3u8']), request)
+    token = media_token('module-video', module.pk, user_id)
+    return _absolute(reverse('protected-hls-signed', args=[module.pk, token, 'master.m3u8']), request)
+
+
+class ProtectedFileField(serializers.FileField):
+    """File field that accepts uploads and renders the protected-media URL"""
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return protected_url(self.kind, value.instance, self.context.get('request'))
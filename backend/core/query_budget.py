@@ -0,0 +1,256 @@
+"""
+ميزانية الاستعلامات لكل نقطة وصول (Per-endpoint query budgets and N+1 detection).
+
+``QueryBudgetMiddleware`` wraps every database connection for the length of a
+request (``connection.execute_wrapper``) and records, per resolved endpoint
+(``'<METHOD> <route>'``, e.g. ``'GET api/content/modules/<int:pk>/'``):
+
+* the number of queries and the time spent in the database;
+* SQL fingerprints (literals and ``IN`` lists normalized away): the same
+  fingerprint run ``QUERY_BUDGET_N_PLUS_ONE`` times or more in one request is
+  an N+1 pattern.
+
+A request over its budget (``QUERY_BUDGETS['<METHOD> <route>']`` or
+``QUERY_BUDGETS['<route>']``, else ``QUERY_BUDGET_DEFAULT``) or with an N+1
+pattern is logged as a warning on the ``core.query_budget`` logger.
+
+Recent samples are kept per process and published every
+``QUERY_BUDGET_PUBLISH_SECONDS`` (``core.process_stats``), so
+``collect_stats()`` can report p50/p95/p99 across workers: see the admin
+page ``/admin/query-budgets/`` and ``/api/extras/admin/queries/``.
+
+Tests assert budgets with ``QueryBudgetTestMixin.assertQueryBudget()``.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .process_stats import ProcessStats
+
+logger = logging.getLogger(__name__)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)')
+SPACE_RE = re.compile(r'\s+')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def fingerprint(sql):
+    """``sql`` with literals and ``IN`` lists replaced, for grouping"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()[:500]
+
+
+def budget_for(endpoint):
+    budgets = _setting('QUERY_BUDGETS', {})
+    route = endpoint.split(' ', 1)[-1]
+    return budgets.get(endpoint, budgets.get(route, _setting('QUERY_BUDGET_DEFAULT', 50)))
+
+
+def n_plus_one(fingerprints, threshold=None):
+    """``[(fingerprint, repeats)]`` repeated at least ``threshold`` times"""
+    threshold = threshold or _setting('QUERY_BUDGET_N_PLUS_ONE', 10)
+    return [(sql, count) for sql, count in fingerprints.most_common() if count >= threshold]
+
+
+class QueryRecorder:
+    """``execute_wrapper`` counting queries, DB time and fingerprints"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+# endpoint -> {'requests', 'over_budget', 'samples': deque, 'n_plus_one': Counter}
+_stats = {}
+_lock = threading.Lock()
+_publisher = ProcessStats('core:query_budget:')
+
+
+def _endpoint_stats(endpoint):
+    stats = _stats.get(endpoint)
+    if stats is None:
+        stats = _stats[endpoint] = {
+            'requests': 0,
+            'over_budget': 0,
+            'samples': deque(maxlen=_setting('QUERY_BUDGET_SAMPLES', 200)),
+            'n_plus_one': Counter(),
+        }
+    return stats
+
+
+def record(endpoint, recorder, duration):
+    """Store one request's sample; returns ``(over budget, N+1 patterns)``"""
+    budget = budget_for(endpoint)
+    over = recorder.count > budget
+    patterns = n_plus_one(recorder.fingerprints)
+    with _lock:
+        stats = _endpoint_stats(endpoint)
+        stats['requests'] += 1
+        stats['over_budget'] += over
+        stats['samples'].append((recorder.count, round(recorder.seconds * 1000, 2), round(duration * 1000, 2)))
+        for sql, count in patterns:
+            stats['n_plus_one'][sql] = max(stats['n_plus_one'][sql], count)
+    if _publisher.due(_setting('QUERY_BUDGET_PUBLISH_SECONDS', 10)):
+        publish_stats()
+    return over, patterns
+
+
+class QueryBudgetMiddleware:
+    """يسجل عدد الاستعلامات وزمنها لكل نقطة وصول وينبه عند تجاوز الميزانية"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _setting('QUERY_BUDGET_ENABLED', True):
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with wrap_connections(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        endpoint = f'{request.method} {match.route}'
+        over, patterns = record(endpoint, recorder, duration)
+        if over or patterns:
+            logger.warning(
+                "Query budget: %s ran %d queries (budget %d) in %.1f ms%s",
+                endpoint, recorder.count, budget_for(endpoint), recorder.seconds * 1000,
+                ''.join(f'\n  N+1 x{count}: {sql}' for sql, count in patterns[:3]),
+            )
+        if settings.DEBUG:
+            response['X-Query-Count'] = recorder.count
+            response['X-Query-Time-Ms'] = f'{recorder.seconds * 1000:.1f}'
+        return response
+
+
+@contextmanager
+def wrap_connections(recorder):
+    """Run ``recorder`` around every query of every connection in the block"""
+    wrappers = [connections[alias].execute_wrapper(recorder) for alias in connections]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def _snapshot():
+    with _lock:
+        return {
+            endpoint: {
+                'requests': stats['requests'],
+                'over_budget': stats['over_budget'],
+                'samples': list(stats['samples']),
+                'n_plus_one': dict(stats['n_plus_one']),
+            }
+            for endpoint, stats in _stats.items()
+        }
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+    _publisher.clear()
+
+
+def publish_stats():
+    """Store this process' samples in the cache for cross-process reporting"""
+    _publisher.publish(_snapshot())
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted ``values``"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+def collect_stats(include_published=True):
+    """Per-endpoint percentiles over this and every published process"""
+    sources = [_snapshot()]
+    if include_published:
+        sources.extend(_publisher.published())
+
+    merged = defaultdict(lambda: {'requests': 0, 'over_budget': 0, 'samples': [], 'n_plus_one': Counter()})
+    for source in sources:
+        for endpoint, stats in source.items():
+            entry = merged[endpoint]
+            entry['requests'] += stats['requests']
+            entry['over_budget'] += stats['over_budget']
+            entry['samples'].extend(stats['samples'])
+            for sql, count in stats['n_plus_one'].items():
+                entry['n_plus_one'][sql] = max(entry['n_plus_one'][sql], count)
+
+    rows = []
+    for endpoint, entry in merged.items():
+        queries = sorted(sample[0] for sample in entry['samples'])
+        db_ms = sorted(sample[1] for sample in entry['samples'])
+        rows.append({
+            'endpoint': endpoint,
+            'budget': budget_for(endpoint),
+            'requests': entry['requests'],
+            'over_budget': entry['over_budget'],
+            'queries_p50': percentile(queries, 0.5),
+            'queries_p95': percentile(queries, 0.95),
+            'queries_p99': percentile(queries, 0.99),
+            'queries_max': queries[-1] if queries else 0,
+            'db_ms_p50': percentile(db_ms, 0.5),
+            'db_ms_p95': percentile(db_ms, 0.95),
+            'db_ms_p99': percentile(db_ms, 0.99),
+            'n_plus_one': [
+                {'sql': sql, 'repeats': count} for sql, count in entry['n_plus_one'].most_common(5)
+            ],
+        })
+    return sorted(rows, key=lambda row: (row['queries_p95'], row['requests']), reverse=True)
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin: ``with self.assertQueryBudget(8): client.get(...)``"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, repeats=None, using='default'):
+        """
+        Fail when the block runs more than ``budget`` queries, or one SQL
+        fingerprint ``repeats`` times or more (default
+        ``QUERY_BUDGET_N_PLUS_ONE``).
+        """
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        fingerprints = Counter(fingerprint(query['sql']) for query in context.captured_queries)
+        patterns = n_plus_one(fingerprints, repeats)
+        details = ''.join(f'\n  x{count}: {sql}' for sql, count in fingerprints.most_common(5))
+        if len(context) > budget:
+            self.fail(f'{len(context)} queries executed, budget is {budget}:{details}')
+        if patterns:
+            self.fail('N+1 query pattern:' + ''.join(f'\n  x{count}: {sql}' for sql, count in patterns))
@@ -13,6 +13,10 @@ from datetime import timedelta
 import os 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
+from core.database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +34,53 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1','142.93.95.121','triplesacademy.com','
 
 SITE_ID = 1
 
+# Signal dispatch profiling (see core/signal_registry.py, manage.py signal_profile)
+SIGNAL_PROFILING = os.getenv('SIGNAL_PROFILING', str(DEBUG)).lower() in ('1', 'true', 'yes')
+SIGNAL_PROFILE_PUBLISH_SECONDS = 10
+
+# Per-endpoint query budgets (see core/query_budget.py). Keys are
+# '<METHOD> <route>' or '<route>' as in urls.py, e.g.
+#   'GET api/content/course/<int:course_id>/outline/': 5
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+QUERY_BUDGET_DEFAULT = 50
+QUERY_BUDGET_N_PLUS_ONE = 10  # repeats of one SQL fingerprint that flag an N+1
+QUERY_BUDGETS = {
+    # CourseBasicSerializer lists (COURSE_CARD_PREFETCH)
+    'GET api/courses/featured/': 10,
+    'GET api/courses/popular/': 10,
+    'GET api/courses/recent/': 10,
+    'GET api/courses/public/': 10,
+    # Dashboards
+    'GET api/courses/my-enrolled-courses/': 12,
+    'GET api/courses/dashboard/stats/': 10,
+    'GET api/courses/student/dashboard/stats/': 10,
+    'GET api/courses/student/courses/': 10,
+    'GET api/courses/teacher/dashboard/stats/': 15,
+    'GET api/content/modules/(?P<pk>[^/.]+)/$': 12,
+    'GET api/reviews/courses/<int:course_id>/rating/': 5,
+}
+QUERY_BUDGET_SAMPLES = 200
+QUERY_BUDGET_PUBLISH_SECONDS = 10
+
+# Inbound payment events (see store/event_queue.py): 'db' or 'celery'
+PAYMENT_EVENT_QUEUE_BACKEND = os.getenv('PAYMENT_EVENT_QUEUE_BACKEND', 'db')
+PAYMENT_EVENT_MAX_ATTEMPTS = 8
+PAYMENT_EVENT_BACKOFF_SECONDS = 30
+
+# Article view buffering (see articles/view_buffer.py)
+ARTICLE_VIEW_FLUSH_SECONDS = 10
+# Periodic flush thread: enable it in the web workers only (env), never in
+# management commands or tests
+ARTICLE_VIEW_FLUSH_THREAD = os.getenv('ARTICLE_VIEW_FLUSH_THREAD', 'false').lower() in ('1', 'true', 'yes')
+ARTICLE_VIEW_BUFFER_SIZE = 500
+ARTICLE_VIEW_DEDUPE_SECONDS = 30 * 60
+
+# Trending rankings (see extras/trending.py, manage.py compute_trending)
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_HOURLY_DAYS = 2
+TRENDING_WINDOW_DAYS = 30
+TRENDING_TABLE_SIZE = 200
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
     # 'allauth.account.auth_backends.AuthenticationBackend',  # Temporarily disabled for testing
@@ -107,6 +158,7 @@ INSTALLED_APPS = [
 # }
 
 MIDDLEWARE = [
+    'core.query_budget.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     # 'oauth2_provider.middleware.OAuth2TokenMiddleware',
@@ -114,6 +166,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PrincipalMiddleware',
+    'core.db_router.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'axes.middleware.AxesMiddleware',
@@ -150,12 +204,66 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Selected by DATABASE_URL / DATABASE_REPLICA_URLS / DB_* (see core/database.py);
+# defaults to db.sqlite3 in WAL mode
+DATABASES = database_settings(BASE_DIR)
+
+# Catalog, search and analytics reads go to replicas when configured, with
+# read-your-writes per user (see core/db_router.py)
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+REPLICA_READ_MODELS = [
+    'courses.Category',
+    'courses.Tag',
+    'courses.Course',
+    'articles.BookCategory',
+    'articles.Book',
+    'articles.Article',
+]
+
+
+# Cache: Redis shared by all workers when REDIS_URL is set, else per-process
+# memory. Application data goes through core.tiered_cache.cache_ns(), which
+# adds a per-process LRU in front of Redis.
+#
+# Deployments with more than one worker process NEED REDIS_URL: namespace
+# versions (the outline cache, media access decisions, ...), fill locks and
+# view-count dedupe only work across workers through a shared cache. Without
+# one every cache_ns() entry is capped at TIERED_CACHE_UNSHARED_MAX_SECONDS,
+# so a bump made by another worker is seen after at most that long.
+REDIS_URL = os.getenv('REDIS_URL')
+SHARED_CACHE = bool(REDIS_URL)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'lms',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'lms-default',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
     }
+# Celery (see core/celery.py), used by PAYMENT_EVENT_QUEUE_BACKEND = 'celery'
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    # Retries whose backoff expired are not scheduled by an enqueue
+    'process-payment-events': {'task': 'store.tasks.process_payment_events', 'schedule': 60.0},
 }
+if PAYMENT_EVENT_QUEUE_BACKEND == 'celery' and not CELERY_BROKER_URL:
+    raise ImproperlyConfigured("PAYMENT_EVENT_QUEUE_BACKEND='celery' needs CELERY_BROKER_URL or REDIS_URL")
+
+TIERED_CACHE_LOCAL_MAX_BYTES = 32 * 1024 * 1024 if REDIS_URL else 0
+TIERED_CACHE_LOCAL_SECONDS = 60
+TIERED_CACHE_VERSION_SECONDS = 1
+TIERED_CACHE_STATS_PUBLISH_SECONDS = 10
+TIERED_CACHE_UNSHARED_MAX_SECONDS = 5
 
 
 # Password validation
@@ -423,6 +531,45 @@ SPECTACULAR_SETTINGS = {
 # Max module file size in MB (used by content.models.validate_file_size)
 MAX_MODULE_FILE_MB = 300
 
+# Resumable chunked uploads (see content/chunked_upload.py, manage.py purge_uploads)
+CHUNKED_UPLOAD_MAX_MB = 2048
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# Protected media (see core/protected_media.py): 'django', 'nginx' (X-Accel-Redirect)
+# or 'sendfile' (X-Sendfile). For nginx, add an internal location, e.g.
+#   location /protected-media/ { internal; alias /path/to/media/; }
+PROTECTED_MEDIA_BACKEND = os.getenv('PROTECTED_MEDIA_BACKEND', 'django')
+PROTECTED_MEDIA_INTERNAL_PREFIX = '/protected-media/'
+PROTECTED_MEDIA_ACCESS_SECONDS = 300
+# Lifetime of the signed tokens of protected media URLs (players send no auth
+# header); the expiry is rounded up to the bucket so URLs stay cacheable
+PROTECTED_MEDIA_TOKEN_SECONDS = 6 * 3600
+PROTECTED_MEDIA_TOKEN_BUCKET_SECONDS = 300
+
+# Background media processing (see content/media_pipeline.py, manage.py process_media_jobs)
+MEDIA_PIPELINE_WORKERS = 2
+MEDIA_PIPELINE_MAX_ATTEMPTS = 3
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY')  # default: ffmpeg on PATH, then imageio-ffmpeg
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY')
+FFMPEG_TIMEOUT_SECONDS = 3 * 60 * 60
+MEDIA_HLS_RENDITIONS = [
+    {'name': '360p', 'height': 360, 'video_bitrate': '800k', 'audio_bitrate': '96k'},
+    {'name': '720p', 'height': 720, 'video_bitrate': '2800k', 'audio_bitrate': '128k'},
+]
+
+# Responsive image variants (see core/image_variants.py, manage.py generate_image_variants)
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+
+# PDF page previews and text (see core/pdf_pages.py): PyMuPDF if installed,
+# else poppler-utils from POPPLER_PATH or PATH
+POPPLER_PATH = os.getenv('POPPLER_PATH')
+PDF_PREVIEW_PAGES = 50  # rendered ahead by the media pipeline; later pages on demand
+PDF_PREVIEW_WIDTH = 1024
+PDF_PAGE_CACHE_SECONDS = 60 * 60 * 24 * 7
+PDF_TIMEOUT_SECONDS = 10 * 60
+
 # If you plan to upload big files via Django, consider increasing in-memory/body limits
 # 1GB example; tune as needed
 DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 1024
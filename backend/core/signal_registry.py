@@ -0,0 +1,167 @@
+"""
+سجل الإشارات مع قياس زمن التنفيذ (Signal registry with dispatch profiling).
+
+``receiver`` is a drop-in replacement for ``django.dispatch.receiver`` that
+refuses to connect a receiver without an explicit ``sender``, so a handler
+can never run for every model save in the project. Senders may be model
+classes or lazy ``'app_label.ModelName'`` strings, which lets modules that
+are imported before the app registry is ready bind to their models.
+
+Every registered receiver is wrapped with a cheap profiler that records the
+call count and cumulative time per (signal, receiver). Stats are kept per
+process and published to the cache (``core.process_stats``) every
+``SIGNAL_PROFILE_PUBLISH_SECONDS`` so ``manage.py signal_profile`` and the
+debug endpoint can aggregate them.
+Profiling is enabled with ``SIGNAL_PROFILING`` (defaults to ``DEBUG``).
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import signals as model_signals
+
+from .process_stats import ProcessStats
+
+_publisher = ProcessStats('core:signal_profile:')
+
+_SIGNAL_NAMES = {
+    id(value): name for name, value in vars(model_signals).items()
+    if isinstance(value, model_signals.ModelSignal)
+}
+
+# (signal name, receiver path, sender label) for every registered binding
+_bindings = []
+# (signal name, receiver path) -> [calls, total seconds, max seconds]
+_stats = defaultdict(lambda: [0, 0.0, 0.0])
+_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return getattr(settings, 'SIGNAL_PROFILING', settings.DEBUG)
+
+
+def signal_name(signal):
+    return _SIGNAL_NAMES.get(id(signal), repr(signal))
+
+
+def _sender_label(sender):
+    if isinstance(sender, str):
+        return sender
+    meta = getattr(sender, '_meta', None)
+    return meta.label if meta else getattr(sender, '__name__', repr(sender))
+
+
+def _record(key, elapsed):
+    with _lock:
+        entry = _stats[key]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+    if _publisher.due(getattr(settings, 'SIGNAL_PROFILE_PUBLISH_SECONDS', 10)):
+        publish_snapshot()
+
+
+def _profiled(signal, func):
+    key = (signal_name(signal), f'{func.__module__}.{func.__qualname__}')
+
+    def wrapper(*args, **kwargs):
+        if not profiling_enabled():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(key, time.perf_counter() - start)
+
+    wrapper.__wrapped__ = func
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__module__ = func.__module__
+    return wrapper
+
+
+def receiver(signal, sender=None, **kwargs):
+    """
+    Connect the decorated function to ``signal`` for ``sender`` only.
+
+    ``signal`` and ``sender`` may each be a single value or a list/tuple.
+    """
+    if sender is None:
+        raise ImproperlyConfigured(
+            "Signal receivers must be bound to an explicit sender"
+        )
+    signals = signal if isinstance(signal, (list, tuple)) else [signal]
+    senders = sender if isinstance(sender, (list, tuple)) else [sender]
+
+    def decorator(func):
+        path = f'{func.__module__}.{func.__qualname__}'
+        uid = kwargs.get('dispatch_uid') or path
+        for sig in signals:
+            wrapped = _profiled(sig, func)
+            for snd in senders:
+                label = _sender_label(snd)
+                sig.connect(
+                    wrapped, sender=snd, weak=False,
+                    dispatch_uid=f'{uid}:{label}',
+                )
+                _bindings.append((signal_name(sig), path, label))
+        return func
+
+    return decorator
+
+
+def get_bindings():
+    """Registered (signal, receiver, sender) bindings, sorted"""
+    return sorted(set(_bindings))
+
+
+def get_local_stats():
+    """Stats recorded in this process: {(signal, receiver): [calls, total_s, max_s]}"""
+    with _lock:
+        return {key: list(value) for key, value in _stats.items()}
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+    _publisher.clear()
+
+
+def publish_snapshot():
+    """Store this process' stats in the cache for cross-process reporting"""
+    _publisher.publish([[signal, path, *values] for (signal, path), values in get_local_stats().items()])
+
+
+def collect_stats(include_published=True):
+    """
+    Aggregate stats from this process and, optionally, every process that
+    published a snapshot. Returns a list of dicts sorted by total time.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    sources = [get_local_stats()]
+    if include_published:
+        for snapshot in _publisher.published():
+            sources.append({(row[0], row[1]): row[2:] for row in snapshot})
+
+    for source in sources:
+        for key, (calls, total, peak) in source.items():
+            entry = totals[key]
+            entry[0] += calls
+            entry[1] += total
+            entry[2] = max(entry[2], peak)
+
+    rows = [
+        {
+            'signal': signal,
+            'receiver': path,
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'avg_ms': round(total * 1000 / calls, 3) if calls else 0,
+            'max_ms': round(peak * 1000, 3),
+        }
+        for (signal, path), (calls, total, peak) in totals.items()
+    ]
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
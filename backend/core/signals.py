@@ -0,0 +1,16 @@
+"""
+مستقبلات إشارات النواة (Signal receivers of core).
+
+``core`` is not an installed app: ``extras.apps.ExtrasConfig.ready()``
+imports this module.
+"""
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from .database import configure_sqlite
+from .signal_registry import receiver
+
+
+@receiver(connection_created, sender=SQLiteDatabaseWrapper)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    configure_sqlite(connection)
@@ -0,0 +1,314 @@
+"""
+ذاكرة تخزين مؤقت متعددة المستويات (Tiered, namespaced cache).
+
+``cache_ns(name, scope=None)`` is the cache API for application data::
+
+    outline = cache_ns('outline', course.id).get_or_set('compiled', build, 3600)
+    cache_ns('outline', course.id).bump()   # invalidates every key of the scope
+
+Reads go through two tiers:
+
+1. a per-process LRU of pickled values bounded by
+   ``TIERED_CACHE_LOCAL_MAX_BYTES`` (0 disables it, the default when the
+   shared cache is itself process-local);
+2. the ``default`` Django cache (Redis when ``REDIS_URL`` is set).
+
+Without a shared cache (``SHARED_CACHE`` false, i.e. per-process LocMem) a
+bump only reaches the process that made it, so every entry is kept for at
+most ``TIERED_CACHE_UNSHARED_MAX_SECONDS``.
+
+Keys embed the namespace version, so ``bump()`` makes every older entry
+unreachable in both tiers without deleting anything. Other processes keep
+their local copy of the version for ``TIERED_CACHE_VERSION_SECONDS`` and of
+values for at most ``TIERED_CACHE_LOCAL_SECONDS``: that is the staleness a
+bump or ``set()`` elsewhere can see. Namespaces that need a write to be
+visible everywhere at once are created with ``local=False``.
+
+``get_or_set()`` computes a missing value once: threads of a process share
+a lock per key, and processes take a short ``cache.add`` lock while the
+others wait for the value instead of all hitting the database (stampede
+protection).
+
+Hits per tier, misses, fills, lock waits and bumps are counted per
+namespace name and published every ``TIERED_CACHE_STATS_PUBLISH_SECONDS``
+(``core.process_stats``) for ``manage.py cache_stats`` and
+``/api/extras/admin/cache/``.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .process_stats import ProcessStats
+
+MISSING = object()
+
+STATS_EVENTS = ('local_hits', 'hits', 'misses', 'fills', 'lock_waits', 'bumps')
+
+LOCK_SECONDS = 30
+WAIT_INTERVAL = 0.05
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LocalLRU:
+    """Thread-safe LRU of pickled values, bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()  # key -> (expires at, payload)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _pop(self, key):
+        _, payload = self._data.pop(key)
+        self.size -= len(key) + len(payload)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            if item[0] < time.monotonic():
+                self._pop(key)
+                return MISSING
+            self._data.move_to_end(key)
+            payload = item[1]
+        # Unpickled per read, so callers can never mutate the cached value
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            # A single large value must not flush the whole tier
+            if len(key) + len(payload) > self.max_bytes // 8:
+                return
+            self._data[key] = (time.monotonic() + timeout, payload)
+            self.size += len(key) + len(payload)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+_local = [None]
+
+
+def local_tier():
+    """The process' local tier, or None when disabled"""
+    max_bytes = _setting('TIERED_CACHE_LOCAL_MAX_BYTES', 0)
+    if not max_bytes:
+        return None
+    if _local[0] is None or _local[0].max_bytes != max_bytes:
+        _local[0] = LocalLRU(max_bytes)
+    return _local[0]
+
+
+# Stats: namespace name -> {event: count}
+_stats = defaultdict(lambda: dict.fromkeys(STATS_EVENTS, 0))
+_stats_lock = threading.Lock()
+_publisher = ProcessStats('core:cache_stats:')
+
+# Striped locks for single-flight fills within the process
+_fill_locks = [threading.Lock() for _ in range(64)]
+
+
+def _count(name, event):
+    with _stats_lock:
+        _stats[name][event] += 1
+    if _publisher.due(_setting('TIERED_CACHE_STATS_PUBLISH_SECONDS', 10)):
+        publish_stats()
+
+
+class CacheNamespace:
+    def __init__(self, name, scope=None, local=True):
+        self.name = name
+        self.prefix = f'ns:{name}' if scope is None else f'ns:{name}:{scope}'
+        self.local = local
+
+    @property
+    def _tier(self):
+        return local_tier() if self.local else None
+
+    def version(self):
+        """Current version of the namespace (created on first use)"""
+        key = f'{self.prefix}:v'
+        tier = self._tier
+        if tier is not None:
+            version = tier.get(key)
+            if version is not MISSING:
+                return version
+        version = cache.get(key)
+        if version is None:
+            # A fresh timestamp cannot collide with entries cached under an
+            # evicted version, so losing the key only costs a refill
+            version = time.time_ns()
+            cache.add(key, version, None)
+            version = cache.get(key, version)
+        if tier is not None:
+            tier.set(key, version, _setting('TIERED_CACHE_VERSION_SECONDS', 1))
+        return version
+
+    def bump(self):
+        """Invalidate every key of the namespace"""
+        key = f'{self.prefix}:v'
+        version = time.time_ns()
+        cache.set(key, version, None)
+        tier = self._tier
+        if tier is not None:
+            tier.set(key, version, _setting('TIERED_CACHE_VERSION_SECONDS', 1))
+        _count(self.name, 'bumps')
+        return version
+
+    def make_key(self, key, version=None):
+        return f'{self.prefix}:{version or self.version()}:{key}'
+
+    def _local_timeout(self, timeout):
+        local_seconds = _setting('TIERED_CACHE_LOCAL_SECONDS', 60)
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return local_seconds
+        return min(local_seconds, timeout)
+
+    def _lookup(self, full_key, count=True):
+        tier = self._tier
+        if tier is not None:
+            value = tier.get(full_key)
+            if value is not MISSING:
+                if count:
+                    _count(self.name, 'local_hits')
+                return value
+        value = cache.get(full_key, MISSING)
+        if count:
+            _count(self.name, 'misses' if value is MISSING else 'hits')
+        if value is not MISSING and tier is not None:
+            tier.set(full_key, value, _setting('TIERED_CACHE_LOCAL_SECONDS', 60))
+        return value
+
+    def _store(self, full_key, value, timeout):
+        if not _setting('SHARED_CACHE', True):
+            cap = _setting('TIERED_CACHE_UNSHARED_MAX_SECONDS', 5)
+            timeout = cap if timeout is DEFAULT_TIMEOUT or timeout is None else min(cap, timeout)
+        cache.set(full_key, value, timeout)
+        tier = self._tier
+        if tier is not None:
+            tier.set(full_key, value, self._local_timeout(timeout))
+
+    def get(self, key, default=None, version=None):
+        value = self._lookup(self.make_key(key, version))
+        return default if value is MISSING else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(self.make_key(key, version), value, timeout)
+
+    def delete(self, key, version=None):
+        full_key = self.make_key(key, version)
+        cache.delete(full_key)
+        tier = self._tier
+        if tier is not None:
+            tier.delete(full_key)
+
+    def get_or_set(self, key, producer, timeout=DEFAULT_TIMEOUT, version=None):
+        """Cached value of ``key``, computed once by ``producer()`` on a miss"""
+        full_key = self.make_key(key, version)
+        value = self._lookup(full_key)
+        if value is not MISSING:
+            return value
+        with _fill_locks[hash(full_key) % len(_fill_locks)]:
+            # Another thread may have filled it while this one waited
+            value = self._lookup(full_key, count=False)
+            if value is not MISSING:
+                return value
+            lock_key = f'{full_key}:lock'
+            if not cache.add(lock_key, 1, LOCK_SECONDS):
+                _count(self.name, 'lock_waits')
+                value = self._wait_for(full_key, lock_key)
+                if value is not MISSING:
+                    return value
+            try:
+                value = producer()
+                self._store(full_key, value, timeout)
+                _count(self.name, 'fills')
+            finally:
+                cache.delete(lock_key)
+            return value
+
+    def _wait_for(self, full_key, lock_key):
+        """Wait for the process holding ``lock_key`` to store the value"""
+        deadline = time.monotonic() + LOCK_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            value = cache.get(full_key, MISSING)
+            if value is not MISSING:
+                tier = self._tier
+                if tier is not None:
+                    tier.set(full_key, value, _setting('TIERED_CACHE_LOCAL_SECONDS', 60))
+                return value
+            if not cache.get(lock_key):
+                # The holder failed or the lock expired: compute it here
+                break
+        return MISSING
+
+
+def cache_ns(name, scope=None, local=True):
+    """Namespace ``name`` (optionally one ``scope`` of it, e.g. a course id)"""
+    return CacheNamespace(name, scope, local)
+
+
+def get_local_stats():
+    with _stats_lock:
+        return {name: dict(events) for name, events in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+    _publisher.clear()
+
+
+def publish_stats():
+    """Store this process' counters in the shared cache"""
+    _publisher.publish(get_local_stats())
+
+
+def collect_stats(include_published=True):
+    """Counters per namespace summed over this and every published process"""
+    sources = [get_local_stats()]
+    if include_published:
+        sources.extend(_publisher.published())
+    totals = defaultdict(lambda: dict.fromkeys(STATS_EVENTS, 0))
+    for source in sources:
+        for name, events in source.items():
+            for event, count in events.items():
+                totals[name][event] += count
+    rows = []
+    for name, events in sorted(totals.items()):
+        reads = events['local_hits'] + events['hits'] + events['misses']
+        hit_ratio = (events['local_hits'] + events['hits']) / reads if reads else 0
+        rows.append({'namespace': name, **events, 'hit_ratio': round(hit_ratio, 3)})
+    return rows
+
+
+def local_tier_info():
+    tier = local_tier()
+    if tier is None:
+        return {'enabled': False}
+    return {'enabled': True, 'entries': len(tier), 'bytes': tier.size, 'max_bytes': tier.max_bytes}
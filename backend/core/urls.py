@@ -23,6 +23,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 # Import our custom admin site
 from extras.admin import custom_admin_site
 from . import views
+from .pdf_pages import document_page, document_pages
+from .protected_media import protected_hls, protected_media
 
 if settings.DEBUG:
     try:
@@ -56,6 +58,12 @@ urlpatterns = [
     path('api/content/', include('content.urls')),  # Content app URLs
     path('api/store/', include('store.urls')),  # Store app URLs
     path('api/reviews/', include('reviews.urls')),  # Reviews app URLs
+    path('api/media/module-hls/<int:pk>/t/<str:token>/<path:name>', protected_hls,
+         name='protected-hls-signed'),  # HLS packages, signed URL
+    path('api/media/module-hls/<int:pk>/<path:name>', protected_hls, name='protected-hls'),  # HLS packages
+    path('api/media/<str:kind>/<int:pk>/', protected_media, name='protected-media'),  # Access-checked media
+    path('api/media/<str:kind>/<int:pk>/pages/', document_pages, name='document-pages'),  # PDF page previews
+    path('api/media/<str:kind>/<int:pk>/pages/<int:number>/', document_page, name='document-page'),
    
     
     # Legacy routes (for backward compatibility) - Commented out to avoid namespace conflicts
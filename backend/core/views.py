@@ -12,6 +12,7 @@ from articles.models import Article
 from store.models import Order
 from store.models_payment import Transaction
 from reviews.models import CourseReview
+from .db_router import use_replica
 
 
 @login_required
@@ -69,6 +70,7 @@ def student_dashboard_stats(request):
     })
 
 @login_required
+@use_replica
 def teacher_dashboard_stats(request):
     """إحصائيات لوحة تحكم المعلم"""
     if not hasattr(request.user, 'instructor'):
@@ -2,12 +2,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 
 from .models import Course, Enrollment
 from users.models import User, Profile, Instructor, Student
+from users.principal import get_principal
 from content.models import Module, Lesson
 # from assignments.models import Assignment, AssignmentSubmission  # Module deleted
 from meetings.models import Meeting
@@ -26,7 +27,7 @@ def teacher_dashboard_stats(request):
                 'error': 'ليس لديك صلاحية للوصول لهذه الإحصائيات'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instructor = profile.get_instructor_object()
+        instructor = get_principal(request).instructor
         if not instructor:
             return Response({
                 'error': 'لم يتم العثور على بيانات المعلم'
@@ -40,13 +41,9 @@ def teacher_dashboard_stats(request):
         published_courses = instructor_courses.filter(status='published').count()
         draft_courses = instructor_courses.filter(status='draft').count()
         
-        # إحصائيات الطلاب
-        total_students = 0
-        total_enrollments = 0
-        for course in instructor_courses:
-            enrollments = course.enrollments.count()
-            total_enrollments += enrollments
-            total_students += course.students.count()
+        # إحصائيات الطلاب (مجموع كل المقررات باستعلام واحد لكل منها)
+        total_enrollments = Enrollment.objects.filter(course__in=instructor_courses).count()
+        total_students = Course.students.through.objects.filter(course__in=instructor_courses).count()
         
         # إحصائيات الواجبات - تعليق مؤقت بسبب حذف نموذج الواجبات
         # pending_assignments = Assignment.objects.filter(
@@ -112,7 +109,7 @@ def teacher_courses(request):
                 'error': 'ليس لديك صلاحية للوصول لهذه البيانات'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instructor = profile.get_instructor_object()
+        instructor = get_principal(request).instructor
         if not instructor:
             return Response({
                 'error': 'لم يتم العثور على بيانات المعلم'
@@ -166,7 +163,7 @@ def teacher_student_progress(request):
                 'error': 'ليس لديك صلاحية للوصول لهذه البيانات'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instructor = profile.get_instructor_object()
+        instructor = get_principal(request).instructor
         if not instructor:
             return Response({
                 'error': 'لم يتم العثور على بيانات المعلم'
@@ -213,7 +210,7 @@ def teacher_recent_activity(request):
                 'error': 'ليس لديك صلاحية للوصول لهذه البيانات'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instructor = profile.get_instructor_object()
+        instructor = get_principal(request).instructor
         if not instructor:
             return Response({
                 'error': 'لم يتم العثور على بيانات المعلم'
@@ -267,7 +264,7 @@ def teacher_announcements(request):
                 'error': 'ليس لديك صلاحية للوصول لهذه البيانات'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instructor = profile.get_instructor_object()
+        instructor = get_principal(request).instructor
         if not instructor:
             return Response({
                 'error': 'لم يتم العثور على بيانات المعلم'
@@ -312,37 +309,30 @@ def student_dashboard_stats(request):
         
         # الحصول على تسجيلات الطالب
         student_enrollments = Enrollment.objects.filter(student=user)
-        student_courses = [enrollment.course for enrollment in student_enrollments]
         
         # إحصائيات المقررات (فقط الاشتراكات النشطة)
         enrolled_courses = student_enrollments.filter(status='active').count()
         completed_courses = student_enrollments.filter(status='completed').count()
         
-        # إحصائيات الدروس - حساب حقيقي
+        # إحصائيات الدروس - عدد الدروس ومدتها لكل مقرر باستعلام واحد
+        lesson_totals = {
+            row['module__course_id']: row
+            for row in Lesson.objects.filter(
+                module__course_id__in=student_enrollments.values('course_id')
+            ).values('module__course_id').annotate(count=Count('id'), minutes=Sum('duration_minutes'))
+        }
         completed_lessons = 0
         total_lessons = 0
         total_study_time = 0  # بالدقائق
         
-        for course in student_courses:
-            for module in course.modules.all():
-                lessons = module.lessons.all()
-                total_lessons += lessons.count()
-                
-                # حساب الدروس المكتملة (يمكن تحسين هذا حسب نموذج التقدم)
-                for lesson in lessons:
-                    # إضافة مدة الدرس للوقت الإجمالي
-                    if hasattr(lesson, 'duration') and lesson.duration:
-                        total_study_time += lesson.duration.total_seconds() / 60  # تحويل إلى دقائق
-                    
-                    # يمكن إضافة منطق للتحقق من إكمال الدرس
-                    # if lesson.is_completed_by_user(user):
-                    #     completed_lessons += 1
-        
         # حساب الدروس المكتملة بناءً على التقدم في التسجيل
-        for enrollment in student_enrollments:
-            if enrollment.progress:
-                course_lessons = sum(module.lessons.count() for module in enrollment.course.modules.all())
-                completed_lessons += int((enrollment.progress / 100) * course_lessons)
+        for course_id, progress in student_enrollments.values_list('course_id', 'progress'):
+            totals = lesson_totals.get(course_id, {})
+            course_lessons = totals.get('count', 0)
+            total_lessons += course_lessons
+            total_study_time += totals.get('minutes') or 0
+            if progress:
+                completed_lessons += int((progress / 100) * course_lessons)
         
         # إحصائيات الواجبات - تعليق مؤقت بسبب حذف نموذج الواجبات
         # pending_assignments = Assignment.objects.filter(
@@ -423,7 +413,7 @@ def student_courses(request):
             student=user,
             status='active'
         ).select_related('course', 'course__category').prefetch_related(
-            'course__instructors', 'course__modules__lessons'
+            'course__instructors', 'course__instructors__profile', 'course__modules__lessons'
         ).order_by('-enrollment_date')
         
         courses_data = []
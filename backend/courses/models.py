@@ -6,7 +6,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from core.signal_registry import receiver
+from users.models import TrackedFieldsMixin
 from django.db.models import Count, Avg, Sum, Q
 
 User = get_user_model()
@@ -105,8 +106,9 @@ class Tag(models.Model):
 Tags = Tag
 
 
-class Course(models.Model):
+class Course(TrackedFieldsMixin, models.Model):
     """Main course model that represents an online course"""
+    tracked_fields = ('image',)
     
     LEVEL_CHOICES = [
         ('beginner', _('Beginner')),
@@ -633,18 +635,8 @@ class StudySchedule(models.Model):
     
     def get_total_study_days(self):
         """Calculate total study days excluding days off"""
-        from datetime import timedelta
-        total_days = 0
-        current_date = self.start_date
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        while current_date <= self.end_date:
-            day_name = day_names[current_date.weekday()]
-            if day_name not in self.days_off:
-                total_days += 1
-            current_date += timedelta(days=1)
-        
-        return total_days
+        from .scheduling import count_study_days
+        return count_study_days(self.start_date, self.end_date, self.days_off)
     
     def get_total_study_hours(self):
         """Calculate total available study hours"""
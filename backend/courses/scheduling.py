@@ -0,0 +1,220 @@
+"""
+محرك جدول الدراسة (Study schedule engine).
+
+``rebalance`` lays the course's lessons out over the study days of a
+``StudySchedule``:
+
+* lesson durations come from one query, in course order;
+* study days are the dates in ``start_date..end_date`` whose weekday is not
+  in ``days_off``, generated lazily, so a year-long window costs nothing
+  beyond the days actually used;
+* lessons are packed first-fit into days of ``daily_hours`` capacity, never
+  earlier than the previous lesson's day so the course order is kept.
+  A lesson longer than a whole day gets an empty day of its own. Lessons
+  that do not fit before ``end_date`` are left unscheduled and reported;
+* completed items are never touched: their lessons are not re-planned and
+  their time is taken out of their day's capacity;
+* the plan is diffed against the existing items by lesson, so only changed
+  rows are written (``bulk_create`` / ``bulk_update`` / one ``DELETE``).
+"""
+from dataclasses import dataclass
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_START_MINUTES = 9 * 60  # 9 AM
+DEFAULT_LESSON_MINUTES = 15
+LAST_MINUTE = 24 * 60 - 1
+
+PLANNED_FIELDS = [
+    'date', 'start_time', 'end_time', 'hours',
+    'module_id', 'module_title', 'lesson_title', 'order',
+]
+
+
+@dataclass
+class PlannedItem:
+    lesson_id: int
+    lesson_title: str
+    module_id: int
+    module_title: str
+    date: object
+    start: int  # minutes from midnight
+    minutes: int
+    order: int
+
+    def values(self):
+        end = min(self.start + self.minutes, LAST_MINUTE)
+        return {
+            'date': self.date,
+            'start_time': time(*divmod(self.start, 60)),
+            'end_time': time(*divmod(end, 60)),
+            'hours': (Decimal(self.minutes) / 60).quantize(Decimal('0.1')),
+            'module_id': self.module_id,
+            'module_title': self.module_title[:255],
+            'lesson_title': self.lesson_title[:255],
+            'order': self.order,
+        }
+
+
+def iter_study_days(start_date, end_date, days_off=()):
+    """Dates from ``start_date`` to ``end_date`` (inclusive) not falling on ``days_off``"""
+    off = {DAY_NAMES.index(name) for name in days_off or () if name in DAY_NAMES}
+    if len(off) == 7 or start_date is None or end_date is None:
+        return
+    day = start_date
+    while day <= end_date:
+        if day.weekday() not in off:
+            yield day
+        day += timedelta(days=1)
+
+
+def count_study_days(start_date, end_date, days_off=()):
+    """Number of study days in the window, computed by whole weeks"""
+    if start_date is None or end_date is None or end_date < start_date:
+        return 0
+    off = {DAY_NAMES.index(name) for name in days_off or () if name in DAY_NAMES}
+    total = (end_date - start_date).days + 1
+    weeks, rest = divmod(total, 7)
+    tail = sum(1 for i in range(rest) if (start_date.weekday() + i) % 7 not in off)
+    return weeks * (7 - len(off)) + tail
+
+
+def load_lessons(course):
+    """(lesson id, title, minutes, module id, module name) in course order, one query"""
+    from content.models import Lesson
+    return list(
+        Lesson.objects.filter(module__course=course, module__is_active=True, is_active=True)
+        .order_by('module__order', 'module_id', 'order', 'id')
+        .values_list('id', 'title', 'duration_minutes', 'module_id', 'module__name')
+    )
+
+
+def plan(lessons, days, daily_hours, busy=None):
+    """
+    Pack ``lessons`` into the iterable of study ``days``. ``busy`` maps a date
+    to (minutes already used, first free minute) for completed items.
+    Returns (planned items, unscheduled lesson ids).
+    """
+    capacity = int(daily_hours * 60)
+    busy = busy or {}
+    days = iter(days)
+    planned = []
+    day = None
+    used = cursor = 0
+
+    def next_day():
+        nonlocal day, used, cursor
+        day = next(days, None)
+        used, cursor = busy.get(day, (0, DAY_START_MINUTES))
+
+    next_day()
+    for index, (lesson_id, title, duration, module_id, module_name) in enumerate(lessons):
+        minutes = duration if duration and duration > 0 else DEFAULT_LESSON_MINUTES
+        while day is not None:
+            if used + minutes <= capacity:
+                break
+            if minutes > capacity and used == 0:
+                # Longer than a whole day: it gets a day of its own
+                break
+            next_day()
+        if day is None:
+            return planned, [lesson[0] for lesson in lessons[index:]]
+        planned.append(PlannedItem(
+            lesson_id=lesson_id, lesson_title=title or '',
+            module_id=module_id, module_title=module_name or '',
+            date=day, start=cursor, minutes=minutes, order=index,
+        ))
+        used += minutes
+        cursor += minutes
+    return planned, []
+
+
+def _busy_days(completed):
+    busy = {}
+    for item in completed:
+        used, cursor = busy.get(item.date, (0, DAY_START_MINUTES))
+        end = item.end_time.hour * 60 + item.end_time.minute
+        busy[item.date] = (used + int(item.hours * 60), max(cursor, end))
+    return busy
+
+
+def rebalance(schedule):
+    """
+    Re-plan the open items of ``schedule``. Returns a stats dict with the
+    plan and the number of rows created / updated / deleted / kept.
+    """
+    from .models import ScheduleItem
+
+    existing = list(ScheduleItem.objects.filter(schedule=schedule).order_by())
+    completed = [item for item in existing if item.is_completed]
+    done_lessons = {item.lesson_id for item in completed if item.lesson_id is not None}
+
+    course_lessons = load_lessons(schedule.course)
+    lessons = [lesson for lesson in course_lessons if lesson[0] not in done_lessons]
+    days = iter_study_days(schedule.start_date, schedule.end_date, schedule.days_off)
+    planned, unscheduled = plan(lessons, days, schedule.daily_hours, _busy_days(completed))
+    # Items keep the lesson's position in the whole course as their order
+    positions = {lesson[0]: index for index, lesson in enumerate(course_lessons)}
+    for entry in planned:
+        entry.order = positions[entry.lesson_id]
+
+    # Match the plan against the open items by lesson; duplicates and items
+    # of lessons that left the plan are deleted
+    open_items = {}
+    stale = []
+    for item in existing:
+        if item.is_completed:
+            continue
+        if item.lesson_id in open_items or item.lesson_id is None:
+            stale.append(item.pk)
+        else:
+            open_items[item.lesson_id] = item
+
+    now = timezone.now()
+    to_create, to_update, kept = [], [], 0
+    for entry in planned:
+        values = entry.values()
+        item = open_items.pop(entry.lesson_id, None)
+        if item is None:
+            to_create.append(ScheduleItem(schedule=schedule, lesson_id=entry.lesson_id, **values))
+        elif any(getattr(item, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(item, field, value)
+            item.updated_at = now
+            to_update.append(item)
+        else:
+            kept += 1
+    stale.extend(item.pk for item in open_items.values())
+
+    if stale or to_update or to_create:
+        with transaction.atomic():
+            if stale:
+                ScheduleItem.objects.filter(pk__in=stale).delete()
+            if to_update:
+                # bulk_update() skips auto_now, so updated_at is set above
+                ScheduleItem.objects.bulk_update(to_update, [*PLANNED_FIELDS, 'updated_at'], batch_size=500)
+            if to_create:
+                ScheduleItem.objects.bulk_create(to_create, batch_size=500)
+
+    hours_distribution = {}
+    for entry in planned:
+        key = entry.date.isoformat()
+        hours_distribution[key] = round(hours_distribution.get(key, 0) + entry.minutes / 60, 2)
+
+    return {
+        'total_lessons': len(course_lessons),
+        'completed_lessons': len(done_lessons),
+        'distributed_lessons': len(planned),
+        'unscheduled_lessons': unscheduled,
+        'schedule_items_created': len(to_create),
+        'schedule_items_updated': len(to_update),
+        'schedule_items_deleted': len(stale),
+        'schedule_items_kept': kept,
+        'study_days_used': len(hours_distribution),
+        'hours_per_day': schedule.daily_hours,
+        'hours_distribution': hours_distribution,
+    }
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Course, Category, Tag, Enrollment, StudySchedule, ScheduleItem
 from users.models import Instructor
+from users.principal import get_principal
+from core.image_variants import image_srcset
 from django.db.models import Count
 from django.utils.text import slugify
 from datetime import timedelta
@@ -25,6 +27,11 @@ class TagsSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+# Relations CourseBasicSerializer reads for every course: lists rendered with
+# it prefetch these so the query count does not grow with the page size
+COURSE_CARD_PREFETCH = ('instructors', 'instructors__profile', 'tags', 'modules__lessons')
+
+
 class CourseBasicSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     instructors = serializers.SerializerMethodField()
@@ -32,6 +39,7 @@ class CourseBasicSerializer(serializers.ModelSerializer):
     enrolled_count = serializers.SerializerMethodField()
     rating = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     duration = serializers.SerializerMethodField()
     modules_count = serializers.SerializerMethodField()
     lessons_count = serializers.SerializerMethodField()
@@ -39,7 +47,7 @@ class CourseBasicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = [
-            'id', 'title', 'subtitle', 'description', 'short_description', 'image', 'image_url', 'price',
+            'id', 'title', 'subtitle', 'description', 'short_description', 'image', 'image_url', 'image_srcset', 'price',
             'discount_price', 'category', 'category_name', 'instructors', 'tags',
             'level', 'status', 'is_complete_course', 'created_at', 'rating', 'enrolled_count',
             'is_free', 'is_featured', 'is_certified', 'total_enrollments', 'average_rating', 'duration',
@@ -98,6 +106,10 @@ class CourseBasicSerializer(serializers.ModelSerializer):
         if obj.image:
             return self.context['request'].build_absolute_uri(obj.image.url)
         return None
+
+    def get_image_srcset(self, obj):
+        """Downscaled WebP/JPEG variants for catalog cards (see core.image_variants)"""
+        return image_srcset(obj.image, self.context.get('request'))
     
     def get_duration(self, obj):
         """Calculate total duration of all lessons in the course"""
@@ -128,7 +140,7 @@ class CourseBasicSerializer(serializers.ModelSerializer):
     def get_modules_count(self, obj):
         """Get the number of modules in the course"""
         try:
-            return obj.modules.count()
+            return len(obj.modules.all())
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -140,7 +152,7 @@ class CourseBasicSerializer(serializers.ModelSerializer):
         try:
             total_lessons = 0
             for module in obj.modules.all():
-                total_lessons += module.lessons.count()
+                total_lessons += len(module.lessons.all())
             return total_lessons
         except Exception as e:
             import logging
@@ -218,7 +230,7 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         try:
             request = self.context.get('request')
             if request and hasattr(request, 'user') and request.user.is_authenticated:
-                return obj.enrollments.filter(student=request.user, status='active').exists()
+                return get_principal(request).is_enrolled(obj.id, statuses=('active',))
             return False
         except Exception as e:
             import logging
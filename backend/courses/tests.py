@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from content.models import Lesson, Module
+
+from . import scheduling
+from .models import Course, ScheduleItem, StudySchedule
+
+User = get_user_model()
+
+
+class ScheduleEngineTest(TestCase):
+    """Test cases for the study schedule packing and diffed writes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', email='planner@example.com', password='x')
+        self.course = Course.objects.create(title='Planned', description='d')
+        module = Module.objects.create(course=self.course, name='Module', order=1)
+        # 2h + 1.5h fit in a 4h day, the 1h lesson spills over, 5h gets its own day
+        for order, minutes in enumerate([120, 90, 60, 300, 30], start=1):
+            Lesson.objects.create(module=module, title=f'L{order}', order=order, duration_minutes=minutes)
+        # 2026-01-05 is a Monday
+        self.schedule = StudySchedule.objects.create(
+            student=self.user, course=self.course, start_date=date(2026, 1, 5),
+            end_date=date(2026, 12, 31), daily_hours=4, days_off=['Tuesday'],
+        )
+
+    def test_study_days_honor_days_off(self):
+        days = list(scheduling.iter_study_days(date(2026, 1, 5), date(2026, 1, 11), ['Tuesday', 'Friday']))
+        self.assertEqual([d.weekday() for d in days], [0, 2, 3, 5, 6])
+        self.assertEqual(self.schedule.get_total_study_days(), 361 - 52)
+
+    def test_packing_keeps_order_and_daily_capacity(self):
+        stats = scheduling.rebalance(self.schedule)
+        items = list(ScheduleItem.objects.filter(schedule=self.schedule).order_by('order'))
+        self.assertEqual(stats['distributed_lessons'], 5)
+        self.assertEqual(
+            [(item.lesson_title, item.date.isoformat(), item.start_time.strftime('%H:%M')) for item in items],
+            [
+                ('L1', '2026-01-05', '09:00'),
+                ('L2', '2026-01-05', '11:00'),
+                ('L3', '2026-01-07', '09:00'),  # Tuesday is off
+                ('L4', '2026-01-08', '09:00'),
+                ('L5', '2026-01-09', '09:00'),
+            ],
+        )
+
+    def test_rebalance_preserves_completed_and_writes_only_changes(self):
+        scheduling.rebalance(self.schedule)
+        first = ScheduleItem.objects.get(schedule=self.schedule, lesson_title='L1')
+        first.mark_completed()
+
+        with self.assertNumQueries(2):  # items and lessons; nothing to write
+            stats = scheduling.rebalance(self.schedule)
+        self.assertEqual(stats['schedule_items_kept'], 4)
+
+        self.schedule.days_off = ['Tuesday', 'Wednesday']
+        stats = scheduling.rebalance(self.schedule)
+        self.assertEqual(stats['schedule_items_created'], 0)
+        self.assertEqual(stats['schedule_items_updated'], 3)
+        self.assertTrue(ScheduleItem.objects.get(pk=first.pk).is_completed)
+        self.assertEqual(ScheduleItem.objects.filter(schedule=self.schedule).count(), 5)
+
+    def test_long_course_over_a_year_packs_in_one_query(self):
+        module = Module.objects.create(course=self.course, name='Long', order=2)
+        Lesson.objects.bulk_create([
+            Lesson(module=module, title=f'Extra {i}', slug=f'extra-{i}', order=i, duration_minutes=45) for i in range(1500)
+        ])
+        # One query for the lessons; packing them into days is done in memory
+        with self.assertNumQueries(1):
+            planned, unscheduled = scheduling.plan(
+                scheduling.load_lessons(self.course),
+                scheduling.iter_study_days(date(2026, 1, 1), date(2026, 12, 31), []),
+                4,
+            )
+        self.assertEqual((len(planned), unscheduled), (1505, []))
+        per_day = {}
+        for entry in planned:
+            per_day[entry.date] = per_day.get(entry.date, 0) + entry.minutes
+        # Full days hold five 45-minute lessons; only the 5-hour lesson exceeds a day
+        self.assertEqual(sorted(set(per_day.values()))[-2:], [5 * 45, 300])
@@ -13,14 +13,14 @@ from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from django.db import transaction
-from datetime import timedelta, datetime
 from django.core.paginator import Paginator
 import logging
 
 from .models import Course, Category, Tag, Enrollment, StudySchedule, ScheduleItem
 from users.models import Instructor, Profile, User
+from users.principal import get_principal
 from .serializers import (
-    CategorySerializer, TagsSerializer, CourseBasicSerializer, 
+    CategorySerializer, TagsSerializer, CourseBasicSerializer, COURSE_CARD_PREFETCH,
     CourseDetailSerializer, CourseCreateSerializer, CourseUpdateSerializer,
     CourseEnrollmentSerializer, DashboardStatsSerializer, SearchSerializer,
     StudyScheduleSerializer, StudyScheduleCreateSerializer, ScheduleItemSerializer
@@ -28,6 +28,9 @@ from .serializers import (
 from content.models import Module, Lesson
 from collections import defaultdict
 from content.serializers import ModuleBasicSerializer
+from core.protected_media import protected_url
+from extras import trending
+from . import scheduling
 
 logger = logging.getLogger(__name__)
 
@@ -83,12 +86,11 @@ class CourseViewSet(ModelViewSet):
             return queryset
         
         # If user is instructor, show their courses
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.status == 'Instructor':
-            try:
-                instructor = Instructor.objects.get(profile=self.request.user.profile)
-                return queryset.filter(instructors=instructor)
-            except Instructor.DoesNotExist:
+        principal = get_principal(self.request)
+        if principal.is_instructor:
+            if principal.instructor_id is None:
                 return Course.objects.none()
+            return queryset.filter(instructors__id=principal.instructor_id)
         
         # For other users, show only published courses
         return queryset.filter(status='published')
@@ -218,24 +220,20 @@ class CourseViewSet(ModelViewSet):
         try:
             # Check permissions
             course = self.get_object()
-            user = self.request.user
+            principal = get_principal(self.request)
             
-            try:
-                profile = user.profile
-                if profile.status == 'Admin' or user.is_staff:
-                    # Admin can update any course
-                    pass
-                elif profile.status == 'Instructor':
-                    try:
-                        instructor = Instructor.objects.get(profile=profile)
-                        if not course.instructors.filter(id=instructor.id).exists():
-                            raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل هذه الدورة")
-                    except Instructor.DoesNotExist:
-                        raise permissions.PermissionDenied("لم يتم العثور على ملف تعريف المدرب")
-                else:
-                    raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل الدورات")
-            except Profile.DoesNotExist:
+            if principal.profile is None:
                 raise permissions.PermissionDenied("لم يتم العثور على ملف تعريف المستخدم")
+            if principal.role == 'Admin' or principal.is_staff:
+                # Admin can update any course
+                pass
+            elif principal.is_instructor:
+                if principal.instructor_id is None:
+                    raise permissions.PermissionDenied("لم يتم العثور على ملف تعريف المدرب")
+                if not principal.teaches(course.id):
+                    raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل هذه الدورة")
+            else:
+                raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل الدورات")
             
             serializer.save()
         except Exception as e:
@@ -320,21 +318,10 @@ class CourseViewSet(ModelViewSet):
         course = self.get_object()
         
         # Check if user is enrolled or is the teacher/admin (only check active enrollments)
-        user = request.user
-        is_enrolled = course.enrollments.filter(student=user, status='active').exists()
-        is_instructor_or_admin = False
-        
-        try:
-            profile = user.profile
-            if profile.status == 'Admin' or user.is_staff:
-                # Admin can access any course
-                is_instructor_or_admin = True
-            elif profile.status == 'Instructor':
-                instructor = profile.get_instructor_object()
-                if instructor and course.instructors.filter(id=instructor.id).exists():
-                    is_instructor_or_admin = True
-        except Profile.DoesNotExist:
-            pass
+        principal = get_principal(request)
+        is_enrolled = principal.is_enrolled(course.id, statuses=('active',))
+        # Admin can access any course
+        is_instructor_or_admin = principal.can_manage_course(course.id)
         
         if not is_enrolled and not is_instructor_or_admin:
             return Response({
@@ -357,13 +344,13 @@ class CourseViewSet(ModelViewSet):
         related_courses = Course.objects.filter(
             category=course.category,
             status='published'
-        ).exclude(id=course.id).select_related('category').prefetch_related('tags')[:6]
+        ).exclude(id=course.id).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)[:6]
         
         # If not enough courses in same category, add some popular courses
         if related_courses.count() < 6:
             additional_courses = Course.objects.filter(
                 status='published'
-            ).exclude(id=course.id).exclude(id__in=related_courses.values_list('id', flat=True)).select_related('category').prefetch_related('tags')[:6 - related_courses.count()]
+            ).exclude(id=course.id).exclude(id__in=related_courses.values_list('id', flat=True)).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)[:6 - related_courses.count()]
             related_courses = list(related_courses) + list(additional_courses)
         
         serializer = CourseBasicSerializer(related_courses, many=True, context={'request': request})
@@ -379,7 +366,7 @@ class CourseViewSet(ModelViewSet):
             enrollments__student=user,
             enrollments__status='active',
             status='published'
-        ).select_related('instructors', 'category').prefetch_related('tags')
+        ).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)
         
         serializer = CourseBasicSerializer(enrolled_courses, many=True, context={'request': request})
         return Response({
@@ -405,7 +392,7 @@ def course_search(request):
     data = serializer.validated_data
     
     # Start with published courses
-    queryset = Course.objects.filter(status='published').select_related('instructors', 'category').prefetch_related('tags')
+    queryset = Course.objects.filter(status='published').select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)
     
     # Apply filters
     if data.get('query'):
@@ -455,7 +442,7 @@ def featured_courses(request):
     courses = Course.objects.filter(
         status='published',
         is_featured=True
-    ).select_related('category').prefetch_related('instructors', 'instructors__profile', 'tags')[:8]
+    ).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)[:8]
     
     serializer = CourseBasicSerializer(courses, many=True, context={'request': request})
     return Response({
@@ -466,12 +453,15 @@ def featured_courses(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def popular_courses(request):
-    """الدورات الأكثر شعبية"""
-    courses = Course.objects.filter(
+    """الدورات الأكثر شعبية (الرائجة حالياً)"""
+    published = Course.objects.filter(
         status='published'
-    ).annotate(
+    ).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)
+    # Courses without recent activity (or all of them, before compute_trending
+    # has run) follow by enrollment count
+    courses = trending.ranked(published, 'course', 8, fallback=published.annotate(
         enrollment_count=Count('enrollments')
-    ).order_by('-enrollment_count').select_related('instructors', 'category').prefetch_related('tags')[:8]
+    ).order_by('-enrollment_count'))
     
     serializer = CourseBasicSerializer(courses, many=True, context={'request': request})
     return Response({
@@ -485,7 +475,7 @@ def recent_courses(request):
     """أحدث الدورات"""
     courses = Course.objects.filter(
         status='published'
-    ).order_by('-created_at').select_related('instructors', 'category').prefetch_related('tags')[:8]
+    ).order_by('-created_at').select_related('category').prefetch_related(*COURSE_CARD_PREFETCH)[:8]
     
     serializer = CourseBasicSerializer(courses, many=True, context={'request': request})
     return Response({
@@ -523,12 +513,10 @@ def dashboard_stats(request):
             }
         elif profile.status == 'Instructor':
             # Instructor stats - only their courses
-            instructor = profile.get_instructor_object()
+            instructor = get_principal(request).instructor
             if instructor:
                 instructor_courses = Course.objects.filter(instructors=instructor)
-                total_students = 0
-                for course in instructor_courses:
-                    total_students += course.enrollments.count()
+                total_students = Enrollment.objects.filter(course__in=instructor_courses).count()
                 
                 stats = {
                     'total_courses': instructor_courses.count(),
@@ -568,11 +556,7 @@ def public_courses(request):
         courses = Course.objects.filter(
             status='published',
             is_active=True
-        ).select_related('category').prefetch_related(
-            'instructors', 
-            'instructors__profile', 
-            'tags'
-        ).order_by('-created_at')
+        ).select_related('category').prefetch_related(*COURSE_CARD_PREFETCH).order_by('-created_at')
         
         # Apply filters
         category = request.GET.get('category')
@@ -636,45 +620,51 @@ def my_enrolled_courses(request):
             'course__tags'
         ).order_by('-enrollment_date')
         
+        from content.models import UserProgress
+        from content.progress_bitmap import count_positions, get_completions
+        
+        # Progress rows and published module/lesson counts for all the courses at once
+        enrollments = list(enrollments)
+        course_ids = [enrollment.course_id for enrollment in enrollments]
+        progress_by_course = {
+            user_progress.course_id: user_progress
+            for user_progress in UserProgress.objects.filter(user=user, course_id__in=course_ids)
+        }
+        published_modules = Module.objects.filter(course_id__in=course_ids, status='published', is_active=True)
+        module_counts = dict(
+            published_modules.values('course_id').annotate(count=Count('id')).values_list('course_id', 'count')
+        )
+        completions = get_completions(user, course_ids, user_progress=progress_by_course)
+        lesson_counts = dict(
+            Lesson.objects.filter(module__in=published_modules, is_active=True)
+            .values('module__course_id').annotate(count=Count('id')).values_list('module__course_id', 'count')
+        )
+        
         enrolled_courses = []
         completed_courses = []
         
         for enrollment in enrollments:
             # Get actual progress from UserProgress model
-            from content.models import UserProgress, ModuleProgress
-            
-            try:
-                user_progress = UserProgress.objects.get(
-                    user=user,
-                    course=enrollment.course
-                )
+            user_progress = progress_by_course.get(enrollment.course_id)
+            if user_progress is not None:
                 actual_progress = user_progress.overall_progress
-            except UserProgress.DoesNotExist:
+            else:
                 actual_progress = enrollment.progress
             
             # Count total and completed modules
-            total_modules = enrollment.course.modules.filter(
-                status='published',
-                is_active=True
-            ).count()
+            total_modules = module_counts.get(enrollment.course_id, 0)
             
-            completed_modules = ModuleProgress.objects.filter(
-                user=user,
-                module__course=enrollment.course,
-                is_completed=True
-            ).count()
+            completed_modules = count_positions(completions[enrollment.course_id].modules)
             
-            # Calculate total lessons from modules
-            total_lessons = 0
-            for module in enrollment.course.modules.filter(status='published', is_active=True):
-                total_lessons += module.lessons.filter(is_active=True).count()
+            total_lessons = lesson_counts.get(enrollment.course_id, 0)
+            instructors = list(enrollment.course.instructors.all())
             
             course_data = {
                 'id': enrollment.course.id,
                 'title': enrollment.course.title,
                 'description': enrollment.course.short_description or enrollment.course.description,
                 'image': request.build_absolute_uri(enrollment.course.image.url) if enrollment.course.image else None,
-                'instructor': enrollment.course.instructors.first().profile.name if enrollment.course.instructors.exists() and hasattr(enrollment.course.instructors.first(), 'profile') else 'غير محدد',
+                'instructor': instructors[0].profile.name if instructors and instructors[0].profile else 'غير محدد',
                 'progress': actual_progress,
                 'totalLessons': total_lessons,
                 'total_lessons': total_lessons,  # Alternative field name
@@ -764,6 +754,11 @@ def course_tracking_data(request, course_id):
                 'completion_percentage': module_progress.get_completion_percentage()
             }
         
+        # Lesson completion comes from the user's completion bitmaps (one query,
+        # read after the progress rows above were created)
+        from content.progress_bitmap import get_completion
+        completion = get_completion(user, course)
+        
         # Get quizzes for course and modules - تعليق مؤقت بسبب حذف نموذج الواجبات
         # from assignments.models import Quiz, QuizAttempt  # Module deleted
         # course_quizzes = Quiz.objects.filter(
@@ -829,6 +824,16 @@ def course_tracking_data(request, course_id):
         total_lessons = 0
         completed_lessons = 0
         
+        # Sign every private embed URL of the course in one pass
+        from content.video_signing import sign_many
+        signed_video_urls = sign_many(
+            Lesson.objects.filter(module__in=modules, is_active=True)
+            .exclude(bunny_video_id__isnull=True).exclude(bunny_video_id='')
+            .values_list('bunny_video_id', flat=True),
+            user_id=request.user.id if request.user.is_authenticated else None,
+            expires_in=3600  # 1 hour
+        )
+        
         for module in modules:
             module_progress = module_progress_data.get(module.id, {})
             
@@ -838,22 +843,12 @@ def course_tracking_data(request, course_id):
             
             for lesson in lessons:
                 total_lessons += 1
-                # For now, we'll assume lesson completion based on module progress
-                # In a real implementation, you'd have lesson-level progress tracking
-                lesson_completed = module_progress.get('is_completed', False)
+                lesson_completed = completion.lesson_completed(lesson.course_position)
                 if lesson_completed:
                     completed_lessons += 1
                 
-                # Generate bunny_video_url if bunny_video_id exists (for private embed with token)
-                bunny_video_url = None
-                if lesson.bunny_video_id:
-                    from content.bunny_utils import get_bunny_private_embed_url
-                    # Use private embed URL with token for DRM protected videos
-                    bunny_video_url = get_bunny_private_embed_url(
-                        video_id=lesson.bunny_video_id,
-                        user_id=request.user.id if request.user.is_authenticated else None,
-                        expires_in=3600  # 1 hour
-                    )
+                # Private embed URL with token for DRM protected videos
+                bunny_video_url = signed_video_urls.get(lesson.bunny_video_id)
                 
                 module_lessons.append({
                     'id': lesson.id,
@@ -905,9 +900,9 @@ def course_tracking_data(request, course_id):
                 'name': module.name,
                 'description': module.description,
                 'order': module.order,
-                'video_url': module.video.url if module.video else None,
+                'video_url': protected_url('module-video', module, request),
                 'video_duration': module.video_duration,
-                'pdf_url': module.pdf.url if module.pdf else None,
+                'pdf_url': protected_url('module-pdf', module, request),
                 'note': module.note,
                 'lessons': module_lessons,
                 'total_lessons': len(module_lessons),
@@ -1203,190 +1198,31 @@ def rebalance_schedule(request, schedule_id):
     try:
         schedule = get_object_or_404(StudySchedule, id=schedule_id, student=request.user)
         
-        # Delete existing schedule items
-        ScheduleItem.objects.filter(schedule=schedule).delete()
-        
-        # Get all modules and lessons for the course
-        modules = Module.objects.filter(
-            course=schedule.course,
-            is_active=True
-        ).prefetch_related('lessons').order_by('order')
-        
-        # Collect all lessons with their details
-        lessons = []
-        for module in modules:
-            module_lessons = Lesson.objects.filter(
-                module=module,
-                is_active=True
-            ).order_by('order')
-            
-            for lesson in module_lessons:
-                lessons.append({
-                    'module_id': module.id,
-                    'module_title': module.name,
-                    'lesson_id': lesson.id,
-                    'lesson_title': lesson.title,
-                    'duration_minutes': lesson.duration_minutes or 15,  # Default 15 minutes
-                })
-        
-        if not lessons:
+        if not schedule.get_total_study_days():
             return Response({
-                'error': 'No lessons found for this course'
+                'error': 'No study days available. All days are marked as days off.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate available study days
-        study_days = []
-        current_date = schedule.start_date
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        while current_date <= schedule.end_date:
-            day_name = day_names[current_date.weekday()]
-            if day_name not in schedule.days_off:
-                study_days.append(current_date)
-            current_date += timedelta(days=1)
+        # Pack the open lessons into the study days; completed items are kept
+        # and only changed items are written (see courses/scheduling.py)
+        stats = scheduling.rebalance(schedule)
         
-        if not study_days:
+        if not stats['total_lessons']:
             return Response({
-                'error': 'No study days available. All days are marked as days off.'
+                'error': 'No lessons found for this course'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Distribute lessons across days
-        schedule_items = []
-        lesson_index = 0
-        order = 0
-        
-        # Start time for each day
-        daily_start_hour = 9  # 9 AM
-        
-        # Cycle through days until all lessons are scheduled
-        day_cycle_index = 0
-        max_iterations = len(lessons) * 2  # Safety limit
+        if stats['unscheduled_lessons']:
+            logger.warning(
+                f"Schedule {schedule.id}: {len(stats['unscheduled_lessons'])} lessons do not fit "
+                f"before {schedule.end_date}"
+            )
         
-        while lesson_index < len(lessons) and day_cycle_index < max_iterations:
-            # Get the current study day (cycle through available days)
-            study_date = study_days[day_cycle_index % len(study_days)]
-            current_time = daily_start_hour
-            daily_hours_remaining = schedule.daily_hours
-            day_has_space = True
-            
-            # Try to fill this day with lessons
-            while lesson_index < len(lessons) and daily_hours_remaining > 0.01 and day_has_space:
-                lesson = lessons[lesson_index]
-                lesson_duration_hours = lesson['duration_minutes'] / 60.0
-                
-                # Special case: If lesson is longer than daily hours, schedule it anyway but only once per day
-                if lesson_duration_hours > schedule.daily_hours:
-                    # This is a very long lesson, schedule it but don't add more lessons to this day
-                    start_time = datetime.combine(study_date, datetime.min.time()).replace(
-                        hour=int(current_time),
-                        minute=int((current_time % 1) * 60)
-                    ).time()
-                    
-                    end_time_obj = datetime.combine(study_date, datetime.min.time()).replace(
-                        hour=int(current_time),
-                        minute=int((current_time % 1) * 60)
-                    ) + timedelta(hours=lesson_duration_hours)
-                    end_time = end_time_obj.time()
-                    
-                    schedule_items.append(ScheduleItem(
-                        schedule=schedule,
-                        date=study_date,
-                        start_time=start_time,
-                        end_time=end_time,
-                        hours=lesson_duration_hours,
-                        module_id=lesson['module_id'],
-                        module_title=lesson['module_title'],
-                        lesson_id=lesson['lesson_id'],
-                        lesson_title=lesson['lesson_title'],
-                        order=order
-                    ))
-                    
-                    order += 1
-                    lesson_index += 1
-                    daily_hours_remaining = 0  # Day is full
-                    day_has_space = False
-                    logger.warning(f"Lesson '{lesson['lesson_title']}' ({lesson_duration_hours}h) exceeds daily hours ({schedule.daily_hours}h). Scheduled anyway.")
-                
-                # Check if lesson fits in remaining hours
-                elif lesson_duration_hours <= daily_hours_remaining:
-                    # Lesson fits completely - schedule it
-                    start_time = datetime.combine(study_date, datetime.min.time()).replace(
-                        hour=int(current_time),
-                        minute=int((current_time % 1) * 60)
-                    ).time()
-                    
-                    end_time_obj = datetime.combine(study_date, datetime.min.time()).replace(
-                        hour=int(current_time),
-                        minute=int((current_time % 1) * 60)
-                    ) + timedelta(hours=lesson_duration_hours)
-                    end_time = end_time_obj.time()
-                    
-                    schedule_items.append(ScheduleItem(
-                        schedule=schedule,
-                        date=study_date,
-                        start_time=start_time,
-                        end_time=end_time,
-                        hours=lesson_duration_hours,
-                        module_id=lesson['module_id'],
-                        module_title=lesson['module_title'],
-                        lesson_id=lesson['lesson_id'],
-                        lesson_title=lesson['lesson_title'],
-                        order=order
-                    ))
-                    
-                    order += 1
-                    lesson_index += 1
-                    daily_hours_remaining -= lesson_duration_hours
-                    current_time += lesson_duration_hours
-                    
-                else:
-                    # Lesson doesn't fit in remaining hours
-                    # Move to next day to schedule this lesson
-                    day_has_space = False
-            
-            # Move to next day
-            day_cycle_index += 1
-        
-        # Log summary before creating
-        logger.info(f"Schedule rebalance summary:")
-        logger.info(f"  - Total lessons: {len(lessons)}")
-        logger.info(f"  - Lessons processed: {lesson_index}/{len(lessons)}")
-        logger.info(f"  - Schedule items to create: {len(schedule_items)}")
-        logger.info(f"  - Available study days: {len(study_days)}")
-        logger.info(f"  - Daily hours: {schedule.daily_hours}")
-        
-        # Calculate hours per day for verification
-        days_with_items = {}
-        for item in schedule_items:
-            date_str = item.date.isoformat()
-            if date_str not in days_with_items:
-                days_with_items[date_str] = 0
-            days_with_items[date_str] += item.hours
-        
-        logger.info(f"  - Hours distribution per day: {days_with_items}")
-        
-        # Bulk create schedule items
-        ScheduleItem.objects.bulk_create(schedule_items)
-        
-        # Refresh schedule
-        schedule.refresh_from_db()
         serializer = StudyScheduleSerializer(schedule)
-        
-        # Check if all lessons were distributed
-        if lesson_index < len(lessons):
-            logger.warning(f"Warning: Only {lesson_index} out of {len(lessons)} lessons were distributed. Remaining lessons may be too long for available hours.")
-        
         return Response({
             'schedule': serializer.data,
             'message': 'Schedule rebalanced successfully',
-            'stats': {
-                'total_lessons': len(lessons),
-                'distributed_lessons': lesson_index,
-                'schedule_items_created': len(schedule_items),
-                'study_days_used': len(days_with_items),
-                'hours_per_day': schedule.daily_hours,
-                'hours_distribution': days_with_items
-            }
+            'stats': stats
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
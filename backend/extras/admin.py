@@ -33,6 +33,7 @@ class CustomAdminSite(AdminSite):
             path('user-permissions/<int:user_id>/', self.admin_view(user_permissions), name='user-permissions'),
             path('group-permissions/', self.admin_view(group_permissions), name='group-permissions'),
             path('group-permissions/<int:group_id>/', self.admin_view(group_permissions), name='group-permissions'),
+            path('query-budgets/', self.admin_view(admin_views.query_budgets), name='query-budgets'),
         ]
         return custom_urls + urls
     
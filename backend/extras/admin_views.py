@@ -92,3 +92,18 @@ def admin_dashboard(request):
     }
     
     return render(request, 'admin/dashboard/index.html', context)
+
+
+@login_required
+@user_passes_test(is_admin_user)
+def query_budgets(request):
+    """
+    صفحة ميزانيات الاستعلامات: عدد الاستعلامات وزمنها لكل نقطة وصول
+    """
+    from core.query_budget import collect_stats
+
+    context = {
+        'rows': collect_stats(),
+        'title': 'ميزانيات الاستعلامات',
+    }
+    return render(request, 'admin/query_budgets.html', context)
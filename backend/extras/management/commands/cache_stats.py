@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.tiered_cache import collect_stats, local_tier_info, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the namespaced cache (core.tiered_cache)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Output JSON')
+        parser.add_argument('--reset', action='store_true',
+                            help='Clear stats published by this process')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Cache stats reset'))
+            return
+
+        rows = collect_stats()
+        if options['json']:
+            self.stdout.write(json.dumps({'local_tier': local_tier_info(), 'namespaces': rows}, indent=2))
+            return
+
+        if not local_tier_info()['enabled']:
+            self.stdout.write(self.style.WARNING('Local tier disabled (TIERED_CACHE_LOCAL_MAX_BYTES = 0)'))
+        if not rows:
+            self.stdout.write('No cache reads recorded')
+            return
+        self.stdout.write(
+            f"{'local':>9} {'shared':>9} {'misses':>9} {'fills':>7} {'waits':>6} {'bumps':>6} {'ratio':>6}  namespace"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['local_hits']:>9} {row['hits']:>9} {row['misses']:>9} {row['fills']:>7} "
+                f"{row['lock_waits']:>6} {row['bumps']:>6} {row['hit_ratio']:>6.1%}  {row['namespace']}"
+            )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from extras.trending import DEFAULT_WEIGHTS, prune_counters, refresh_ranking
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending rankings of articles and courses (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(DEFAULT_WEIGHTS), action='append',
+                            help='Only rank this kind (repeatable; default all)')
+        parser.add_argument('--no-prune', action='store_true',
+                            help='Keep counter buckets that fell out of the window')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep recomputing every --interval seconds')
+        parser.add_argument('--interval', type=int, default=300,
+                            help='Seconds between runs with --loop (default 300)')
+
+    def handle(self, *args, **options):
+        kinds = options['kind'] or sorted(DEFAULT_WEIGHTS)
+        while True:
+            for kind in kinds:
+                ranked = refresh_ranking(kind)
+                self.stdout.write(self.style.SUCCESS(f'{kind}: {ranked} ranked'))
+            if not options['no_prune']:
+                pruned = prune_counters()
+                if pruned:
+                    self.stdout.write(f'Pruned {pruned} counter buckets')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
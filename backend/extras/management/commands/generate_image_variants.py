@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.image_variants import IMAGE_FIELDS, generate_variants
+
+
+def _generate(task):
+    label, field_name, name, widths, force = task
+    storage = apps.get_model(label)._meta.get_field(field_name).storage
+    try:
+        generate_variants(storage, name, widths=widths, force=force)
+    except Exception as exc:
+        return name, f'{type(exc).__name__}: {exc}'
+    return name, None
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive WebP/JPEG variants of uploaded images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(IMAGE_FIELDS),
+                            help='Only this model (repeatable; default all)')
+        parser.add_argument('--force', action='store_true',
+                            help='Rewrite variants that already exist')
+        parser.add_argument('--widths', type=str, default='',
+                            help='Comma-separated widths (default IMAGE_VARIANT_WIDTHS)')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                            help='Worker processes (default: number of CPUs)')
+
+    def handle(self, *args, **options):
+        try:
+            widths = tuple(int(w) for w in options['widths'].split(',') if w.strip()) or None
+        except ValueError:
+            raise CommandError('--widths must be comma-separated integers')
+
+        tasks, seen = [], set()
+        for label in options['model'] or sorted(IMAGE_FIELDS):
+            model = apps.get_model(label)
+            for field_name in IMAGE_FIELDS[label]:
+                names = (
+                    model._default_manager.exclude(**{field_name: ''})
+                    .exclude(**{f'{field_name}__isnull': True})
+                    .values_list(field_name, flat=True).distinct()
+                )
+                for name in names.iterator():
+                    if name not in seen:
+                        seen.add(name)
+                        tasks.append((label, field_name, name, widths, options['force']))
+        if not tasks:
+            self.stdout.write('No images to process')
+            return
+
+        # Workers only touch storage and Pillow; do not share DB sockets with them
+        connections.close_all()
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['processes']), initializer=django.setup) as pool:
+            for name, error in pool.map(_generate, tasks, chunksize=8):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(tasks) - failed} images, {failed} failed'))
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import CASES, compare, run
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency and query counts of the API hot paths on the seeded dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--case', choices=sorted(CASES), action='append',
+                            help='Only run this case (repeatable; default all)')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Measured requests per case (default 50)')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Unmeasured requests per case first (default 5)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='Compare with the JSON results of an earlier run')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='p95 latency growth counted as a regression (default 0.1 = 10%%)')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when --compare finds a regression')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read {options["compare"]}: {e}')
+
+        try:
+            result = run(options['case'], options['iterations'], options['warmup'], options['seed'],
+                         log=self.stderr.write)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stderr.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+        else:
+            self.stdout.write(json.dumps(result, indent=2))
+
+        if baseline is None:
+            return
+        rows = compare(baseline, result, options['threshold'])
+        self.stderr.write(f"\n{'case':<20} {'p95 before':>11} {'p95 after':>10} {'change':>8} {'queries':>9}")
+        for row in rows:
+            line = (f"{row['case']:<20} {row['p95_ms_before']:>11} {row['p95_ms_after']:>10} "
+                    f"{row['p95_change']:>8.1%} {row['queries_before']:>4}->{row['queries_after']:<4}")
+            self.stderr.write(self.style.ERROR(line) if row['regressed'] else line)
+        regressed = [row['case'] for row in rows if row['regressed']]
+        if regressed and options['fail_on_regression']:
+            raise CommandError(f'Regressions: {", ".join(regressed)}')
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import DEFAULT_BATCH_SIZE, FULL_SCALE, flush, seed
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create the benchmark dataset used by run_benchmarks (core.benchmark)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help=f'Fraction of the full dataset ({FULL_SCALE["users"]} users, '
+                                 f'{FULL_SCALE["notifications"]} notifications...); e.g. 0.01 for a quick run')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Rows per bulk insert (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete existing benchmark data before seeding')
+        parser.add_argument('--delete', action='store_true',
+                            help='Only delete the benchmark data')
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        if options['flush'] or options['delete']:
+            self.stdout.write('Deleting benchmark data...')
+            flush(log=self.stdout.write)
+            if options['delete']:
+                return
+
+        start = time.monotonic()
+        try:
+            seed(options['scale'], options['batch_size'], options['seed'], log=self.stdout.write)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Benchmark data seeded in {time.monotonic() - start:.0f}s'))
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.signal_registry import collect_stats, get_bindings, profiling_enabled, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show signal receiver bindings and dispatch timings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bindings', action='store_true',
+                            help='List (signal, receiver, sender) bindings')
+        parser.add_argument('--json', action='store_true', help='Output JSON')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Number of receivers to show (default 20)')
+        parser.add_argument('--reset', action='store_true',
+                            help='Clear stats published by this process')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Signal stats reset'))
+            return
+
+        if options['bindings']:
+            bindings = get_bindings()
+            if options['json']:
+                self.stdout.write(json.dumps(
+                    [dict(zip(('signal', 'receiver', 'sender'), row)) for row in bindings],
+                    indent=2
+                ))
+                return
+            for signal, path, sender in bindings:
+                self.stdout.write(f'{signal:<14} {sender:<28} {path}')
+            return
+
+        rows = collect_stats()[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+
+        if not profiling_enabled():
+            self.stdout.write(self.style.WARNING('SIGNAL_PROFILING is disabled'))
+        if not rows:
+            self.stdout.write('No signal dispatches recorded')
+            return
+        self.stdout.write(f"{'calls':>8} {'total ms':>10} {'avg ms':>8} {'max ms':>8}  receiver")
+        for row in rows:
+            self.stdout.write(
+                f"{row['calls']:>8} {row['total_ms']:>10.1f} {row['avg_ms']:>8.2f} "
+                f"{row['max_ms']:>8.2f}  {row['signal']} -> {row['receiver']}"
+            )
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0006_cardimage_alter_banner_banner_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('article', 'Article'), ('course', 'Course')], max_length=20, verbose_name='النوع')),
+                ('object_id', models.PositiveIntegerField(verbose_name='معرّف العنصر')),
+                ('metric', models.CharField(max_length=20, verbose_name='المقياس')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4, verbose_name='الدقة')),
+                ('bucket_start', models.DateTimeField(verbose_name='بداية الفترة')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='العدد')),
+            ],
+            options={
+                'verbose_name': 'عداد نشاط',
+                'verbose_name_plural': 'عدادات النشاط',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('article', 'Article'), ('course', 'Course')], max_length=20, verbose_name='النوع')),
+                ('object_id', models.PositiveIntegerField(verbose_name='معرّف العنصر')),
+                ('score', models.FloatField(verbose_name='النتيجة')),
+                ('computed_at', models.DateTimeField(verbose_name='وقت الحساب')),
+            ],
+            options={
+                'verbose_name': 'نتيجة رائجة',
+                'verbose_name_plural': 'النتائج الرائجة',
+                'indexes': [models.Index(fields=['kind', '-score'], name='trending_kind_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_trending_object'),
+        ),
+        migrations.AddIndex(
+            model_name='activitycounter',
+            index=models.Index(fields=['kind', 'granularity', 'bucket_start'], name='activity_kind_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='activitycounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'metric', 'granularity', 'bucket_start'), name='unique_activity_bucket'),
+        ),
+    ]
@@ -3,10 +3,12 @@ from django.utils import timezone
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
 from courses.models import Course
+from users.models import TrackedFieldsMixin
 
 
-class Banner(models.Model):
+class Banner(TrackedFieldsMixin, models.Model):
     """Model for managing banners on the website"""
+    tracked_fields = ('image',)
     BANNER_TYPES = [
         ('main', 'Main Banner'),
         ('header', 'Header Banner'),
@@ -343,8 +345,9 @@ class ContactMessage(models.Model):
         return status_map.get(self.status, self.status)
 
 
-class CardImage(models.Model):
+class CardImage(TrackedFieldsMixin, models.Model):
     """Model for managing card images with three upload slots"""
+    tracked_fields = ('image_1', 'image_2', 'image_3')
     
     # English fields
     title = models.CharField(max_length=200, verbose_name='Title (EN)')
@@ -409,3 +412,59 @@ class CardImage(models.Model):
         if self.image_3:
             return self.image_3.url
         return None
+
+
+class ActivityCounter(models.Model):
+    """Time-bucketed activity counter used by the trending ranking (extras.trending)"""
+    KIND_CHOICES = [
+        ('article', 'Article'),
+        ('course', 'Course'),
+    ]
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='النوع')
+    object_id = models.PositiveIntegerField(verbose_name='معرّف العنصر')
+    metric = models.CharField(max_length=20, verbose_name='المقياس')
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES, verbose_name='الدقة')
+    bucket_start = models.DateTimeField(verbose_name='بداية الفترة')
+    count = models.PositiveIntegerField(default=0, verbose_name='العدد')
+
+    class Meta:
+        verbose_name = 'عداد نشاط'
+        verbose_name_plural = 'عدادات النشاط'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id', 'metric', 'granularity', 'bucket_start'],
+                name='unique_activity_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'granularity', 'bucket_start'], name='activity_kind_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.metric} @ {self.bucket_start:%Y-%m-%d %H:%M} = {self.count}"
+
+
+class TrendingScore(models.Model):
+    """Precomputed decayed score; the top rows per kind are served as "popular" lists"""
+    kind = models.CharField(max_length=20, choices=ActivityCounter.KIND_CHOICES, verbose_name='النوع')
+    object_id = models.PositiveIntegerField(verbose_name='معرّف العنصر')
+    score = models.FloatField(verbose_name='النتيجة')
+    computed_at = models.DateTimeField(verbose_name='وقت الحساب')
+
+    class Meta:
+        verbose_name = 'نتيجة رائجة'
+        verbose_name_plural = 'النتائج الرائجة'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_trending_object'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', '-score'], name='trending_kind_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} ({self.score:.2f})"
@@ -1,18 +1,20 @@
 from rest_framework import serializers
 from .models import Banner, CourseCollection, PrivacyPolicy, TermsAndConditions, RefundingFAQ, ContactInfo, Partnership, ContactMessage, CardImage
 from courses.serializers import CourseBasicSerializer
+from core.image_variants import image_srcset
 
 
 class BannerSerializer(serializers.ModelSerializer):
     """Serializer for Banner model"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     is_active = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Banner
         fields = [
             'id', 'title', 'title_ar', 'description', 'description_ar',
-            'image', 'image_url', 'url', 'is_active', 'banner_type', 'display_order',
+            'image', 'image_url', 'image_srcset', 'url', 'is_active', 'banner_type', 'display_order',
             'start_date', 'end_date', 'button_text', 'button_text_ar', 'button_url',
             'background_color', 'text_color', 'created_at', 'updated_at'
         ]
@@ -23,16 +25,20 @@ class BannerSerializer(serializers.ModelSerializer):
             return self.context['request'].build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.image, self.context.get('request'))
+
 
 class BannerByTypeSerializer(serializers.ModelSerializer):
     """Simplified serializer for banners by type"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Banner
         fields = [
             'id', 'title', 'title_ar', 'description', 'description_ar',
-            'image_url', 'url', 'banner_type', 'display_order',
+            'image_url', 'image_srcset', 'url', 'banner_type', 'display_order',
             'button_text', 'button_text_ar', 'button_url',
             'background_color', 'text_color'
         ]
@@ -42,6 +48,9 @@ class BannerByTypeSerializer(serializers.ModelSerializer):
             return self.context['request'].build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.image, self.context.get('request'))
+
 
 class CourseCollectionListSerializer(serializers.ModelSerializer):
     """Serializer for listing course collections"""
@@ -194,13 +203,14 @@ class CardImageSerializer(serializers.ModelSerializer):
     image_1_url = serializers.SerializerMethodField()
     image_2_url = serializers.SerializerMethodField()
     image_3_url = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     
     class Meta:
         model = CardImage
         fields = [
             'id', 'title', 'title_ar', 'description', 'description_ar',
             'image_1', 'image_1_url', 'image_2', 'image_2_url', 
-            'image_3', 'image_3_url', 'display_order', 'is_active',
+            'image_3', 'image_3_url', 'image_srcsets', 'display_order', 'is_active',
             'created_at', 'updated_at'
         ]
         read_only_fields = ('created_at', 'updated_at')
@@ -227,4 +237,12 @@ class CardImageSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.image_3.url)
             return obj.image_3.url
-        return None
\ No newline at end of file
+        return None
+
+    def get_image_srcsets(self, obj):
+        """{'image_1': {'webp': ..., 'jpeg': ...}, ...}"""
+        request = self.context.get('request')
+        return {
+            field: image_srcset(getattr(obj, field), request)
+            for field in ('image_1', 'image_2', 'image_3')
+        }
@@ -0,0 +1,43 @@
+"""
+Feed article / course activity into the trending counters (extras.trending)
+and queue responsive variants of saved images (core.image_variants).
+"""
+from django.db.models.signals import post_save
+
+from core.image_variants import IMAGE_FIELDS, queue_variants
+from core.signal_registry import receiver
+
+from .trending import record_on_commit
+
+
+@receiver(post_save, sender='articles.Like')
+def count_article_like(sender, instance, created, **kwargs):
+    if created:
+        record_on_commit('article', 'like', instance.article_id)
+
+
+@receiver(post_save, sender='articles.Bookmark')
+def count_article_bookmark(sender, instance, created, **kwargs):
+    if created:
+        record_on_commit('article', 'bookmark', instance.article_id)
+
+
+@receiver(post_save, sender='courses.Enrollment')
+def count_course_enrollment(sender, instance, created, **kwargs):
+    if created:
+        record_on_commit('course', 'enrollment', instance.course_id)
+
+
+@receiver(post_save, sender='reviews.CourseReview')
+def count_course_review(sender, instance, created, **kwargs):
+    if created:
+        record_on_commit('course', 'review', instance.course_id)
+
+
+@receiver(post_save, sender=list(IMAGE_FIELDS))
+def queue_image_variants(sender, instance, created, **kwargs):
+    # Only a new upload needs variants: other saves keep the same file
+    for field_name in IMAGE_FIELDS[sender._meta.label]:
+        field_file = getattr(instance, field_name)
+        if field_file and (created or instance.has_changed(field_name)):
+            queue_variants(field_file)
@@ -0,0 +1,171 @@
+"""
+الترتيب الرائج (Time-decayed trending ranking).
+
+Activity is counted in hourly and daily buckets (``ActivityCounter``):
+
+* articles: ``view`` (from the view buffer flush), ``like``, ``bookmark``
+* courses: ``enrollment``, ``review``
+
+``compute_scores`` (run by ``manage.py compute_trending`` from cron, every
+few minutes) sums ``weight * count * 0.5 ** (age / half_life)`` over the
+hourly buckets of the last ``TRENDING_HOURLY_DAYS`` days and the daily
+buckets before that, up to ``TRENDING_WINDOW_DAYS``, and replaces the top
+``TRENDING_TABLE_SIZE`` rows of ``TrendingScore`` for the kind.
+
+"Popular" lists read those rows with one indexed query (``top_ids``) and
+fall back to their previous ordering while the table is empty.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS = {
+    'article': {'view': 1.0, 'like': 3.0, 'bookmark': 4.0},
+    'course': {'enrollment': 5.0, 'review': 4.0},
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _buckets(at):
+    hour = at.replace(minute=0, second=0, microsecond=0)
+    return (('hour', hour), ('day', hour.replace(hour=0)))
+
+
+def record(kind, metric, counts, at=None):
+    """
+    Add ``counts`` ({object id: n}) to the current hour and day buckets of
+    ``metric``. Errors are logged, never raised: counting must not break
+    the write path that produced the activity.
+    """
+    from .models import ActivityCounter
+
+    counts = {object_id: n for object_id, n in counts.items() if object_id and n}
+    if not counts:
+        return
+    by_increment = defaultdict(list)
+    for object_id, n in counts.items():
+        by_increment[n].append(object_id)
+
+    try:
+        with transaction.atomic():
+            for granularity, start in _buckets(at or timezone.now()):
+                bucket = {'kind': kind, 'metric': metric, 'granularity': granularity, 'bucket_start': start}
+                # Missing rows are inserted at 0 and then incremented like the
+                # others, so concurrent writers never lose an increment
+                ActivityCounter.objects.bulk_create(
+                    [ActivityCounter(object_id=object_id, count=0, **bucket) for object_id in counts],
+                    ignore_conflicts=True,
+                )
+                for n, object_ids in by_increment.items():
+                    ActivityCounter.objects.filter(object_id__in=object_ids, **bucket).update(
+                        count=F('count') + n
+                    )
+    except DatabaseError:
+        logger.exception("Could not record %s %s activity", kind, metric)
+
+
+def record_on_commit(kind, metric, object_id, n=1):
+    """Count one event once the surrounding transaction commits"""
+    transaction.on_commit(lambda: record(kind, metric, {object_id: n}))
+
+
+def _hourly_cutoff(now):
+    days = _setting('TRENDING_HOURLY_DAYS', 2)
+    return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def compute_scores(kind, now=None):
+    """Decayed score of every object of ``kind`` with activity in the window"""
+    from .models import ActivityCounter
+
+    now = now or timezone.now()
+    weights = _setting('TRENDING_WEIGHTS', DEFAULT_WEIGHTS).get(kind, {})
+    half_life = _setting('TRENDING_HALF_LIFE_HOURS', 24) * 3600
+    hourly_cutoff = _hourly_cutoff(now)
+    window_start = now - timedelta(days=_setting('TRENDING_WINDOW_DAYS', 30))
+    span = {'hour': 1800, 'day': 12 * 3600}
+
+    # Hourly buckets cover the recent days, daily buckets everything older;
+    # the cutoff is a day boundary, so no activity is counted twice
+    rows = ActivityCounter.objects.filter(
+        Q(granularity='hour', bucket_start__gte=hourly_cutoff)
+        | Q(granularity='day', bucket_start__gte=window_start, bucket_start__lt=hourly_cutoff),
+        kind=kind, metric__in=list(weights),
+    ).values_list('object_id', 'metric', 'granularity', 'bucket_start', 'count')
+
+    scores = defaultdict(float)
+    for object_id, metric, granularity, bucket_start, count in rows.iterator(chunk_size=2000):
+        # Age is measured from the middle of the bucket
+        age = max(0.0, (now - bucket_start).total_seconds() - span[granularity])
+        scores[object_id] += weights[metric] * count * 0.5 ** (age / half_life)
+    return scores
+
+
+def refresh_ranking(kind, now=None):
+    """Replace the ranking rows of ``kind``. Returns the number of rows written."""
+    from .models import TrendingScore
+
+    now = now or timezone.now()
+    scores = compute_scores(kind, now)
+    top = sorted(
+        ((object_id, score) for object_id, score in scores.items() if score > 0),
+        key=lambda item: item[1], reverse=True,
+    )[:_setting('TRENDING_TABLE_SIZE', 200)]
+    with transaction.atomic():
+        TrendingScore.objects.filter(kind=kind).delete()
+        TrendingScore.objects.bulk_create([
+            TrendingScore(kind=kind, object_id=object_id, score=score, computed_at=now)
+            for object_id, score in top
+        ])
+    return len(top)
+
+
+def prune_counters(now=None):
+    """Delete buckets that no longer contribute to any score"""
+    from .models import ActivityCounter
+
+    now = now or timezone.now()
+    hourly, _ = ActivityCounter.objects.filter(
+        granularity='hour', bucket_start__lt=_hourly_cutoff(now)
+    ).delete()
+    daily, _ = ActivityCounter.objects.filter(
+        granularity='day',
+        bucket_start__lt=now - timedelta(days=_setting('TRENDING_WINDOW_DAYS', 30) + 1),
+    ).delete()
+    return hourly + daily
+
+
+def top_ids(kind, limit):
+    """Object ids of ``kind`` ordered by trending score (one indexed read)"""
+    from .models import TrendingScore
+
+    return list(
+        TrendingScore.objects.filter(kind=kind)
+        .order_by('-score')
+        .values_list('object_id', flat=True)[:limit]
+    )
+
+
+def ranked(queryset, kind, limit, fallback=None):
+    """
+    Objects of ``queryset`` in trending order, at most ``limit``, padded with
+    the objects of the ordered ``fallback`` queryset that are not ranked (all
+    of them before the first ranking).
+    """
+    # Ranked objects may have been unpublished since; read a few extra
+    ids = top_ids(kind, limit * 2)
+    objects = queryset.in_bulk(ids) if ids else {}
+    result = [objects[object_id] for object_id in ids if object_id in objects][:limit]
+    if fallback is not None and len(result) < limit:
+        result.extend(fallback.exclude(pk__in=[obj.pk for obj in result])[:limit - len(result)])
+    return result
@@ -24,6 +24,9 @@ admin_urlpatterns = [
     path('courses/bulk-<str:action>/', 
          views.bulk_update_course_status, 
          name='bulk-update-course-status'),
+    path('signals/', views.signal_profile, name='signal-profile'),
+    path('cache/', views.cache_stats, name='cache-stats'),
+    path('queries/', views.query_budgets, name='query-budgets'),
 ]
 
 # The API URLs are now determined automatically by the router
@@ -214,7 +214,8 @@ class CourseCollectionViewSet(viewsets.ModelViewSet):
             'courses__category',
             'courses__instructors',
             'courses__instructors__profile',
-            'courses__tags'
+            'courses__tags',
+            'courses__modules__lessons'
         ).order_by('display_order', 'name')
         
         serializer = CourseCollectionDetailSerializer(collections, many=True, context={'request': request})
@@ -585,3 +586,59 @@ class CardImageViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def signal_profile(request):
+    """
+    Signal receiver bindings and dispatch timings aggregated across processes.
+    DELETE resets the stats of the serving process.
+    """
+    from core.signal_registry import collect_stats, get_bindings, profiling_enabled, reset_stats
+
+    if request.method == 'DELETE':
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({
+        'profiling_enabled': profiling_enabled(),
+        'bindings': [
+            {'signal': signal, 'receiver': path, 'sender': sender}
+            for signal, path, sender in get_bindings()
+        ],
+        'stats': collect_stats(),
+    })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Hit/miss counters of the namespaced cache aggregated across processes.
+    DELETE resets the stats of the serving process.
+    """
+    from core.tiered_cache import collect_stats, local_tier_info, reset_stats
+
+    if request.method == 'DELETE':
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({'local_tier': local_tier_info(), 'namespaces': collect_stats()})
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def query_budgets(request):
+    """
+    Per-endpoint query counts, DB time percentiles and N+1 patterns
+    aggregated across processes. DELETE resets the stats of the serving
+    process.
+    """
+    from core.query_budget import collect_stats, reset_stats
+
+    if request.method == 'DELETE':
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({'endpoints': collect_stats()})
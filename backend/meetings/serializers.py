@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
 from users.models import Profile
+from core.protected_media import ProtectedFileField, protected_url
 
 
 class MeetingBasicSerializer(serializers.ModelSerializer):
@@ -133,9 +134,7 @@ class MeetingDetailSerializer(serializers.ModelSerializer):
         } for p in participants]
     
     def get_materials_url(self, obj):
-        if obj.materials:
-            return obj.materials.url
-        return None
+        return protected_url('meeting-materials', obj, self.context.get('request'))
     
     def get_user_is_registered(self, obj):
         request = self.context.get('request')
@@ -167,6 +166,7 @@ class MeetingDetailSerializer(serializers.ModelSerializer):
 
 class MeetingCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating meetings"""
+    materials = ProtectedFileField('meeting-materials', required=False, allow_null=True)
     
     class Meta:
         model = Meeting
@@ -213,6 +213,7 @@ class MeetingCreateSerializer(serializers.ModelSerializer):
 
 class MeetingUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating meetings"""
+    materials = ProtectedFileField('meeting-materials', required=False, allow_null=True)
     
     class Meta:
         model = Meeting
@@ -11,6 +11,8 @@ from django.core.paginator import Paginator
 from .models import Meeting, Participant, Notification, MeetingChat, MeetingInvitation
 from courses.models import Course, Enrollment
 from users.models import Instructor, Profile
+from users.principal import get_principal
+from core.db_router import use_replica
 from .serializers import (
     MeetingDetailSerializer, MeetingCreateSerializer,
     MeetingAttendanceSerializer, MeetingInvitationSerializer,
@@ -48,11 +50,11 @@ class MeetingViewSet(viewsets.ModelViewSet):
             return queryset
         
         # Filter by user role for list actions
-        if user.profile.status == 'Student':
+        if get_principal(self.request).is_student:
             # Students see meetings they're registered for
             queryset = queryset.filter(participants__user=user).distinct()
         
-        elif user.profile.status == 'Instructor':
+        elif get_principal(self.request).is_instructor:
             # Instructors see meetings they created or are registered for
             queryset = queryset.filter(
                 Q(creator=user) | Q(participants__user=user)
@@ -95,14 +97,14 @@ class MeetingViewSet(viewsets.ModelViewSet):
         
         # For students, check if they are participants (only for non-retrieve actions)
         if not (user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_teacher_or_admin())):
+                get_principal(request).is_teacher_or_admin):
             if not obj.participants.filter(user=user).exists():
                 raise permissions.PermissionDenied("يجب التسجيل في الاجتماع للوصول إليه")
         
         # For creation/modification, check creator permissions
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             if not (user.is_superuser or 
-                    (hasattr(user, 'profile') and user.profile.is_admin()) or
+                    get_principal(request).is_admin or
                     obj.creator == user):
                 raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل هذا الاجتماع")
     
@@ -110,7 +112,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
         # Check if user is instructor or admin
         user = self.request.user
         if not (user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_teacher_or_admin())):
+                get_principal(self.request).is_teacher_or_admin):
             raise permissions.PermissionDenied("يجب أن تكون معلماً أو أدمن لإنشاء اجتماع")
         
         serializer.save(creator=self.request.user)
@@ -123,7 +125,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
         # Check permissions
         if not (meeting.creator == user or 
                 user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_admin())):
+                get_principal(self.request).is_admin):
             raise permissions.PermissionDenied("ليس لديك صلاحية لتعديل هذا الاجتماع")
         
         serializer.save()
@@ -135,7 +137,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
         # Check permissions
         if not (instance.creator == user or 
                 user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_admin())):
+                get_principal(self.request).is_admin):
             raise permissions.PermissionDenied("ليس لديك صلاحية لحذف هذا الاجتماع")
         
         instance.delete()
@@ -249,7 +251,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
         
         # Check permissions for detailed participant info
         if (user.is_superuser or 
-            (hasattr(user, 'profile') and user.profile.status == 'Instructor') or
+            get_principal(request).is_instructor or
             meeting.creator == user):
             # For teachers/admins, show detailed participant info
             serializer = ParticipantSerializer(participants, many=True)
@@ -419,7 +421,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
         
         # Check if user is the creator or admin
         if not (user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_teacher_or_admin()) or
+                get_principal(request).is_teacher_or_admin or
                 meeting.creator == user):
             return Response({
                 'error': 'ليس لديك صلاحية لتحديث الحضور'
@@ -521,7 +523,7 @@ def mark_absent_participants(request, meeting_id):
     
     # Check if user is the creator or admin
     if not (user.is_superuser or 
-            (hasattr(user, 'profile') and user.profile.is_teacher_or_admin()) or
+            get_principal(request).is_teacher_or_admin or
             meeting.creator == user):
         return Response({
             'error': 'ليس لديك صلاحية لتسجيل الغياب'
@@ -697,7 +699,7 @@ def auto_join_meeting(request, meeting_id):
         
         # Check permissions
         if not (user.is_superuser or 
-                (hasattr(user, 'profile') and user.profile.is_admin()) or
+                get_principal(request).is_admin or
                 meeting.course.instructor.profile.user == user):
             raise permissions.PermissionDenied("ليس لديك صلاحية لإرسال دعوات")
         
@@ -776,7 +778,7 @@ def available_meetings(request):
     user = request.user
     
     # Only students can see available meetings
-    if not user.profile.status == 'Student':
+    if not get_principal(request).is_student:
         return Response({
             'error': 'هذا الإجراء متاح للطلاب فقط'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -838,7 +840,7 @@ def teaching_meetings(request):
     user = request.user
     
     # Only teachers can see teaching meetings
-    if not user.profile.status == 'Instructor':
+    if not get_principal(request).is_instructor:
         return Response({
             'error': 'هذا الإجراء متاح للمعلمين فقط'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -1020,6 +1022,7 @@ def meeting_status(request, meeting_id):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@use_replica
 def meeting_analytics(request, meeting_id):
     """Get meeting analytics"""
     try:
@@ -1232,9 +1235,9 @@ def search_meetings(request):
     )
     
     # Filter by user role
-    if user.profile.status == 'Student':
+    if get_principal(request).is_student:
         meetings = meetings.filter(participants__user=user)
-    elif user.profile.status == 'Instructor':
+    elif get_principal(request).is_instructor:
         meetings = meetings.filter(
             Q(creator=user) | Q(participants__user=user)
         )
@@ -1254,7 +1257,7 @@ def dashboard_stats(request):
     user = request.user
     now = timezone.now()
     
-    if user.profile.status == 'instructor':
+    if get_principal(request).role == 'instructor':
         # Instructor statistics
         total_meetings = Meeting.objects.filter(creator=user).count()
         upcoming_meetings = Meeting.objects.filter(creator=user, start_time__gt=now).count()
@@ -1270,7 +1273,7 @@ def dashboard_stats(request):
             'total_participants': total_participants
         })
     
-    elif user.profile.status in ['admin', 'manager']:
+    elif get_principal(request).role in ['admin', 'manager']:
         # Admin statistics
         total_meetings = Meeting.objects.count()
         upcoming_meetings = Meeting.objects.filter(start_time__gt=now).count()
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _likes(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('id')).values('total'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def backfill_like_counts(apps, schema_editor):
+    apps.get_model('reviews', 'CourseReview').objects.update(
+        like_count=_likes(apps.get_model('reviews', 'ReviewLike'), 'review')
+    )
+    apps.get_model('reviews', 'Comment').objects.update(
+        like_count=_likes(apps.get_model('reviews', 'CommentLike'), 'comment')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_reviewlike_coursereview_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='coursereview',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,9 @@ from django.db.models import Avg
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+from core.interactions import adjust_counters, cached_related
+from core.signal_registry import receiver
 
 User = get_user_model()
 
@@ -26,6 +27,8 @@ class CourseReview(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=True)
     likes = models.ManyToManyField(User, through='ReviewLike', related_name='liked_reviews')
+    # Kept in step by the ReviewLike receivers below
+    like_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         unique_together = ('course', 'user')
@@ -51,16 +54,11 @@ class CourseReview(models.Model):
         """Update the course's average rating"""
         self.course.update_statistics()
     
-    @property
-    def like_count(self):
-        """Get the number of likes for this review"""
-        return self.likes.count()
-    
     def is_liked_by_user(self, user=None):
         """Check if this review is liked by a specific user"""
         if not user:
             return False
-        return self.likes.filter(user=user).exists()
+        return self.review_likes.filter(user=user).exists()
 
 
 class ReviewReply(models.Model):
@@ -90,6 +88,8 @@ class Comment(models.Model):
     is_active = models.BooleanField(default=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
     likes = models.ManyToManyField(User, through='CommentLike', related_name='liked_comments')
+    # Kept in step by the CommentLike receivers below
+    like_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-created_at']
@@ -101,11 +101,6 @@ class Comment(models.Model):
     def is_reply(self):
         """Check if this is a reply to another comment"""
         return self.parent is not None
-    
-    @property
-    def like_count(self):
-        """Get the number of likes for this comment"""
-        return self.likes.count()
 
 
 class CommentLike(models.Model):
@@ -147,3 +142,25 @@ def send_reply_notification(sender, instance, created, **kwargs):
         # Here you would implement notification logic
         # For example, send email or in-app notification to the review author
         pass
+
+
+@receiver(post_save, sender=ReviewLike)
+def count_review_like(sender, instance, created, **kwargs):
+    if created:
+        adjust_counters(CourseReview, instance.review_id, cached_related(instance, 'review'), like_count=1)
+
+
+@receiver(post_delete, sender=ReviewLike)
+def uncount_review_like(sender, instance, **kwargs):
+    adjust_counters(CourseReview, instance.review_id, cached_related(instance, 'review'), like_count=-1)
+
+
+@receiver(post_save, sender=CommentLike)
+def count_comment_like(sender, instance, created, **kwargs):
+    if created:
+        adjust_counters(Comment, instance.comment_id, cached_related(instance, 'comment'), like_count=1)
+
+
+@receiver(post_delete, sender=CommentLike)
+def uncount_comment_like(sender, instance, **kwargs):
+    adjust_counters(Comment, instance.comment_id, cached_related(instance, 'comment'), like_count=-1)
@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.db.models import Avg, Count
 from courses.models import Course
 from users.models import User
+from core.interactions import SiblingListSerializer, user_has_related
 from .models import CourseReview, ReviewReply, Comment, CommentLike, ReviewLike
 
 
@@ -38,6 +39,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             'like_count', 'is_liked_by_user'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        list_serializer_class = SiblingListSerializer
     
     def get_replies_count(self, obj):
         return obj.replies.count()
@@ -50,10 +52,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         return obj.like_count
     
     def get_is_liked_by_user(self, obj):
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            return obj.is_liked_by_user(request.user)
-        return False
+        # One query for the whole page of reviews
+        return user_has_related(self, obj, ReviewLike, 'review_id')
     
     def get_user_name(self, obj):
         """Get user name from profile or fallback to username"""
@@ -209,15 +209,13 @@ class CommentSerializer(serializers.ModelSerializer):
             'replies', 'replies_count', 'is_owner', 'is_active', 'parent'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        list_serializer_class = SiblingListSerializer
     
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.like_count
     
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
-        return False
+        return user_has_related(self, obj, CommentLike, 'comment_id')
     
     def get_replies(self, obj):
         # Only get direct replies (one level deep)
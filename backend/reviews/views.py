@@ -272,17 +272,17 @@ def like_review(request, review_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if user has already liked this review
-        if review.likes.filter(id=request.user.id).exists():
-            # Unlike the review
-            review.likes.remove(request.user)
+        # Unlike if already liked. Like rows are created/deleted one by one
+        # (not likes.add/remove) so the like_count receivers run
+        deleted, _ = ReviewLike.objects.filter(review=review, user=request.user).delete()
+        if deleted:
             return Response(
                 {"detail": "Review unliked successfully", "liked": False},
                 status=status.HTTP_200_OK
             )
         else:
             # Like the review
-            review.likes.add(request.user)
+            ReviewLike.objects.get_or_create(review=review, user=request.user)
             return Response(
                 {"detail": "Review liked successfully", "liked": True},
                 status=status.HTTP_201_CREATED
@@ -309,14 +309,19 @@ def course_rating_stats(request, course_id):
         # Get all approved reviews for this course
         reviews = CourseReview.objects.filter(course=course, is_approved=True)
         
-        # Calculate statistics
-        total_reviews = reviews.count()
-        average_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+        # Calculate statistics (totals and distribution in one query)
+        stats = reviews.aggregate(
+            total=Count('id'),
+            average=Avg('rating'),
+            **{f'rating_{i}': Count('id', filter=Q(rating=i)) for i in range(1, 6)}
+        )
+        total_reviews = stats['total']
+        average_rating = stats['average'] or 0
         
         # Rating distribution
         rating_distribution = {}
         for i in range(1, 6):
-            count = reviews.filter(rating=i).count()
+            count = stats[f'rating_{i}']
             percentage = (count / total_reviews * 100) if total_reviews > 0 else 0
             rating_distribution[i] = {
                 'count': count,
@@ -4,7 +4,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
 
-from .models import Cart, CartItem, Wishlist, Order, OrderItem, Coupon
+from .models import Cart, CartItem, Wishlist, Order, OrderItem, Coupon, ProcessedPaymentEvent, PaymentEvent
 
 
 class CartItemInline(admin.TabularInline):
@@ -154,3 +154,27 @@ class OrderItemAdmin(admin.ModelAdmin):
         return obj.order.user if obj.order and obj.order.user else None
     get_order_user.short_description = 'User'
     get_order_user.admin_order_field = 'order__user'
+
+
+@admin.register(ProcessedPaymentEvent)
+class ProcessedPaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['payment_id', 'provider', 'event_type', 'order', 'processed_at']
+    list_filter = ['provider', 'event_type']
+    search_fields = ['payment_id', 'order__order_number']
+    raw_id_fields = ['order']
+    readonly_fields = ['processed_at']
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'provider', 'event_type', 'payment_id', 'status', 'attempts', 'received_at']
+    list_filter = ['status', 'provider', 'event_type']
+    search_fields = ['payment_id']
+    readonly_fields = ['received_at', 'processed_at', 'locked_at']
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        from .event_queue import requeue_dead
+        count = requeue_dead(list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f'Requeued {count} dead events')
+    requeue.short_description = 'Requeue dead events'
@@ -0,0 +1,194 @@
+"""
+طابور أحداث الدفع الواردة (Inbound payment event queue).
+
+``moyasar_webhook`` stores the raw event with ``enqueue_event`` and answers
+immediately; applying the event (order fulfilment, enrollments, statistics)
+happens later in a worker:
+
+* ``manage.py process_payment_events`` drains the queue from the database
+  (default, ``PAYMENT_EVENT_QUEUE_BACKEND = 'db'``);
+* with ``PAYMENT_EVENT_QUEUE_BACKEND = 'celery'`` every enqueue also schedules
+  ``store.tasks.process_payment_events`` on commit, on the app in
+  ``core/celery.py`` (broker ``CELERY_BROKER_URL``); beat runs it every
+  minute for retries.
+
+Events of the same payment id are applied strictly in arrival order: an event
+is only claimed when no older event of that payment is still pending or
+processing. Failures are retried with exponential backoff and end up in the
+``dead`` state after ``PAYMENT_EVENT_MAX_ATTEMPTS``.
+"""
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .fulfilment import process_payment_event
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _payment_id(event):
+    data = event.get('data') if isinstance(event.get('data'), dict) else {}
+    return str(data.get('id') or event.get('id') or '')
+
+
+def enqueue_event(event, provider='moyasar'):
+    """Persist a parsed gateway event and schedule its processing"""
+    from .models import PaymentEvent
+
+    queued = PaymentEvent.objects.create(
+        provider=provider,
+        event_type=str(event.get('type') or '')[:50],
+        payment_id=_payment_id(event)[:100],
+        payload=event,
+    )
+    if _setting('PAYMENT_EVENT_QUEUE_BACKEND', 'db') == 'celery':
+        transaction.on_commit(_schedule_celery)
+    return queued
+
+
+def _schedule_celery():
+    try:
+        from .tasks import process_payment_events
+        process_payment_events.delay()
+    except Exception:
+        # Broker down: the event stays pending for the next beat run or the
+        # database worker
+        logger.exception("Could not schedule payment event processing")
+
+
+def release_stale(timeout=None):
+    """Put events stuck in ``processing`` (crashed worker) back in the queue"""
+    from .models import PaymentEvent
+
+    timeout = timeout or _setting('PAYMENT_EVENT_LOCK_SECONDS', 300)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return PaymentEvent.objects.filter(status='processing', locked_at__lt=cutoff).update(
+        status='pending', locked_at=None
+    )
+
+
+def claim_batch(limit=100):
+    """
+    Mark up to ``limit`` due events as processing and return them. Only the
+    oldest unfinished event of each payment id is eligible.
+    """
+    from .models import PaymentEvent
+
+    now = timezone.now()
+    blocked_by_older = PaymentEvent.objects.filter(
+        payment_id=OuterRef('payment_id'),
+        id__lt=OuterRef('id'),
+        status__in=['pending', 'processing'],
+    )
+    with transaction.atomic():
+        candidates = (
+            PaymentEvent.objects
+            .filter(status='pending', next_attempt_at__lte=now)
+            .exclude(Exists(blocked_by_older.exclude(payment_id='')))
+            .order_by('id')
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        events = list(candidates[:limit])
+        if events:
+            PaymentEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                status='processing', locked_at=now
+            )
+    for event in events:
+        event.status, event.locked_at = 'processing', now
+    return events
+
+
+def _backoff(attempts):
+    base = _setting('PAYMENT_EVENT_BACKOFF_SECONDS', 30)
+    cap = _setting('PAYMENT_EVENT_MAX_BACKOFF_SECONDS', 60 * 60)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def apply_event(event):
+    """Apply one claimed event and record the outcome. Returns True on success."""
+    from .models import PaymentEvent
+
+    now = timezone.now()
+    try:
+        result = process_payment_event(event.payload, provider=event.provider)
+    except Exception as exc:
+        event.attempts += 1
+        event.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+        event.locked_at = None
+        if event.attempts >= _setting('PAYMENT_EVENT_MAX_ATTEMPTS', 8):
+            event.status = 'dead'
+            logger.error("Payment event %s moved to dead letters: %s", event.pk, event.last_error)
+        else:
+            event.status = 'pending'
+            event.next_attempt_at = now + _backoff(event.attempts)
+        PaymentEvent.objects.filter(pk=event.pk).update(
+            status=event.status, attempts=event.attempts, last_error=event.last_error,
+            next_attempt_at=event.next_attempt_at, locked_at=None
+        )
+        return False
+
+    event.status, event.result, event.processed_at = 'done', result, now
+    PaymentEvent.objects.filter(pk=event.pk).update(
+        status='done', result=result, processed_at=now, locked_at=None
+    )
+    return True
+
+
+def _apply_in_order(events):
+    """Apply the events of one payment id; stop at the first failure"""
+    try:
+        for event in events:
+            if not apply_event(event):
+                break
+    finally:
+        close_old_connections()
+
+
+def process_pending(limit=100, workers=1):
+    """
+    Claim and apply one batch of due events. Different payment ids are
+    processed in parallel when ``workers`` > 1. Returns the number of
+    events claimed.
+    """
+    release_stale()
+    events = claim_batch(limit)
+    if not events:
+        return 0
+
+    groups = {}
+    for event in events:
+        groups.setdefault(event.payment_id or f'#{event.pk}', []).append(event)
+
+    if workers <= 1 or len(groups) == 1:
+        for group in groups.values():
+            for event in group:
+                if not apply_event(event):
+                    break
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_apply_in_order, groups.values()))
+    return len(events)
+
+
+def requeue_dead(ids=None):
+    """Move dead events (all, or the given ids) back to the queue"""
+    from .models import PaymentEvent
+
+    queryset = PaymentEvent.objects.filter(status='dead')
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.update(
+        status='pending', attempts=0, next_attempt_at=timezone.now(), locked_at=None
+    )
@@ -0,0 +1,205 @@
+"""
+تنفيذ الطلبات المدفوعة (Paid order fulfilment).
+
+A paid order is fulfilled in one transaction: the order row is locked, the
+missing enrollments are created with a single ``bulk_create`` and existing
+ones are updated with a single ``bulk_update``. Bulk writes skip
+``Enrollment.save()`` and its ``post_save`` receiver, so course statistics
+are recomputed once per affected course after the transaction commits
+instead of once per enrollment.
+
+Gateway webhooks are deduplicated through ``ProcessedPaymentEvent``: the
+event row is inserted in the same transaction as the fulfilment, so a
+retried or concurrent delivery of the same payment is a no-op, while a
+failed fulfilment rolls the event back and can be retried.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+def refresh_course_statistics(course_ids, new_enrollments=()):
+    """
+    Recompute the denormalized statistics of each course once, and count
+    ``new_enrollments`` (course ids) for trending since bulk_create skips
+    their post_save
+    """
+    from courses.models import Course
+    from extras.trending import record
+    for course in Course.objects.filter(pk__in=set(course_ids)).only('pk'):
+        course.update_statistics()
+    record('course', 'enrollment', {course_id: 1 for course_id in new_enrollments})
+
+
+def defer_course_statistics(course_ids, new_enrollments=()):
+    """Refresh course statistics after the current transaction commits"""
+    course_ids = set(course_ids)
+    if course_ids:
+        transaction.on_commit(lambda: refresh_course_statistics(course_ids, new_enrollments))
+
+
+def enroll_user(user, prices, payment_id='', paid_at=None):
+    """
+    Create or activate paid enrollments of ``user``.
+
+    ``prices`` maps course id -> amount paid. Returns a dict mapping
+    course id -> enrollment id. Statistics are deferred to commit.
+    """
+    from courses.models import Enrollment
+
+    if not prices:
+        return {}
+    paid_at = paid_at or timezone.now()
+    payment = {
+        'is_paid': True,
+        'payment_date': paid_at,
+        'transaction_id': payment_id,
+        'status': 'active',
+    }
+
+    existing = list(Enrollment.objects.filter(student=user, course_id__in=prices))
+    existing_ids = {enrollment.course_id for enrollment in existing}
+    for enrollment in existing:
+        for field, value in payment.items():
+            setattr(enrollment, field, value)
+        enrollment.payment_amount = prices[enrollment.course_id]
+    if existing:
+        Enrollment.objects.bulk_update(
+            existing, ['payment_amount', *payment], batch_size=500
+        )
+
+    new = [
+        Enrollment(student=user, course_id=course_id, payment_amount=amount, **payment)
+        for course_id, amount in prices.items()
+        if course_id not in existing_ids
+    ]
+    if new:
+        # ignore_conflicts: a concurrent delivery may have inserted the row
+        Enrollment.objects.bulk_create(new, ignore_conflicts=True)
+        enrollment_ids = dict(
+            Enrollment.objects.filter(student=user, course_id__in=prices)
+            .values_list('course_id', 'id')
+        )
+    else:
+        enrollment_ids = {enrollment.course_id: enrollment.id for enrollment in existing}
+
+    defer_course_statistics(prices, [enrollment.course_id for enrollment in new])
+    return enrollment_ids
+
+
+def enroll_order_items(order):
+    """Enroll the order's user in every course of the order not yet linked"""
+    from .models import OrderItem
+
+    if not order.user:
+        return []
+    items = [item for item in order.items.all() if not item.enrollment_id]
+    if not items:
+        return []
+
+    prices = {}
+    for item in items:
+        prices.setdefault(item.course_id, item.price)
+    enrollment_ids = enroll_user(order.user, prices, order.payment_id)
+
+    for item in items:
+        item.enrollment_id = enrollment_ids.get(item.course_id)
+    OrderItem.objects.bulk_update(items, ['enrollment'])
+    return items
+
+
+def fulfil_order(order, payment_id, payment_status='completed'):
+    """
+    Mark ``order`` as paid and enroll its user, in one transaction.
+    Safe to call again for an order that is already fulfilled.
+    """
+    from .models import Order
+
+    with transaction.atomic():
+        locked = Order.objects.select_for_update().get(pk=order.pk)
+        locked.status = 'completed'
+        locked.payment_id = payment_id
+        locked.payment_status = payment_status
+        # Queryset update: no post_save, and concurrent webhooks wait on the lock
+        Order.objects.filter(pk=locked.pk).update(
+            status=locked.status,
+            payment_id=payment_id,
+            payment_status=payment_status,
+            updated_at=timezone.now(),
+        )
+        enroll_order_items(locked)
+
+    order.status = locked.status
+    order.payment_id = payment_id
+    order.payment_status = payment_status
+    return order
+
+
+def record_payment_event(payment_id, event_type='', provider='moyasar', order=None):
+    """
+    Insert the processed-event row for ``payment_id``.
+
+    Returns False when the event was already processed. Must be called inside
+    the transaction that performs the fulfilment.
+    """
+    from .models import ProcessedPaymentEvent
+
+    try:
+        with transaction.atomic():
+            ProcessedPaymentEvent.objects.create(
+                provider=provider, payment_id=payment_id,
+                event_type=event_type, order=order
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def process_payment_event(event, provider='moyasar'):
+    """
+    Fulfil a ``payment.succeeded`` gateway event exactly once.
+
+    Handles direct course payments (``metadata.payment_type`` is
+    ``direct_course_payment``) and order payments (``metadata.order_id``).
+    Returns ``'processed'``, ``'duplicate'`` or ``'ignored'``.
+    """
+    from courses.models import Course
+    from users.models import User
+    from .models import Order
+
+    if event.get('type') != 'payment.succeeded':
+        return 'ignored'
+    payment_data = event.get('data') or {}
+    metadata = payment_data.get('metadata') or {}
+    payment_id = str(payment_data.get('id') or event.get('id') or '')
+    if not payment_id:
+        return 'ignored'
+
+    order = user = course = None
+    if metadata.get('order_id'):
+        order = Order.objects.filter(pk=metadata['order_id']).first()
+        if order is None:
+            return 'ignored'
+    elif metadata.get('payment_type') == 'direct_course_payment':
+        user = User.objects.filter(pk=metadata.get('user_id')).first()
+        course = (
+            Course.objects.filter(pk=metadata.get('course_id'))
+            .only('pk', 'price', 'discount_price').first()
+        )
+        if user is None or course is None:
+            return 'ignored'
+    else:
+        return 'ignored'
+
+    with transaction.atomic():
+        if not record_payment_event(payment_id, event['type'], provider, order):
+            return 'duplicate'
+        if order is not None:
+            fulfil_order(order, payment_id)
+        else:
+            amount = payment_data.get('amount')
+            # Gateway amounts are in halalas
+            paid = Decimal(amount) / 100 if amount else (course.discount_price or course.price)
+            enroll_user(user, {course.pk: paid}, payment_id)
+    return 'processed'
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.event_queue import process_pending, requeue_dead
+
+
+class Command(BaseCommand):
+    help = 'Apply queued payment gateway events (webhooks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100,
+                            help='Events claimed per batch (default 100)')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads applying different payments in parallel (default 4)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the queue instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep between polls in --loop mode (default 2)')
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help='Move all dead events back to the queue and exit')
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            count = requeue_dead()
+            self.stdout.write(self.style.SUCCESS(f'Requeued {count} dead events'))
+            return
+
+        total = 0
+        try:
+            while True:
+                claimed = process_pending(limit=options['batch'], workers=options['workers'])
+                total += claimed
+                if claimed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} payment events'))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_add_enrollment_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedPaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='moyasar', max_length=30)),
+                ('payment_id', models.CharField(max_length=100)),
+                ('event_type', models.CharField(blank=True, max_length=50)),
+                ('processed_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_events', to='store.order')),
+            ],
+            options={
+                'ordering': ['-processed_at'],
+                'unique_together': {('provider', 'payment_id')},
+            },
+        ),
+    ]
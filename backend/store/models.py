@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MinValueValidator
@@ -98,30 +100,90 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.user.username}"
     
+    TAX_RATE = Decimal('0.15')
+
+    def get_summary(self):
+        """
+        Cart totals from a single aggregate query, memoized on the instance.
+
+        Returns a dict with ``items_count``, ``subtotal``, ``discount`` (from
+        the applied coupon), ``tax`` (on the discounted subtotal) and ``total``.
+        The cache is dropped by ``add_item``, ``remove_item``, ``clear`` and
+        ``refresh_from_db``; call ``invalidate_summary`` after other changes.
+        """
+        summary = getattr(self, '_summary', None)
+        if summary is not None:
+            return summary
+
+        if self.pk is None:
+            totals = {'items_count': 0, 'subtotal': None}
+        else:
+            # Same rule as CartItem.total_price: discount price if set, else price
+            unit_price = Coalesce(
+                NullIf(F('course__discount_price'), Value(0)), F('course__price'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            )
+            totals = self.items.aggregate(
+                items_count=Count('id'),
+                subtotal=Sum(
+                    ExpressionWrapper(
+                        unit_price * F('quantity'),
+                        output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                    )
+                ),
+            )
+        subtotal = totals['subtotal'] or Decimal('0.00')
+
+        discount = Decimal('0.00')
+        if self.coupon_id and subtotal:
+            discount = subtotal - self.coupon.apply_discount(subtotal)
+
+        tax = (subtotal - discount) * self.TAX_RATE
+        self._summary = summary = {
+            'items_count': totals['items_count'],
+            'subtotal': subtotal,
+            'discount': discount,
+            'tax': tax,
+            'total': subtotal - discount + tax,
+        }
+        return summary
+
+    def invalidate_summary(self):
+        self.__dict__.pop('_summary', None)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.invalidate_summary()
+
     @property
     def total_price(self):
         """Calculate total price of all items in cart"""
-        return sum(item.total_price for item in self.items.all())
+        return self.get_summary()['subtotal']
     
     @property
     def subtotal(self):
         """Calculate subtotal of all items in cart"""
-        return sum(item.total_price for item in self.items.all())
+        return self.get_summary()['subtotal']
+    
+    @property
+    def discount(self):
+        """Discount from the applied coupon"""
+        return self.get_summary()['discount']
     
     @property
     def tax(self):
-        """Calculate tax (15%) on subtotal"""
-        return self.subtotal * Decimal('0.15')
+        """Calculate tax (15%) on the discounted subtotal"""
+        return self.get_summary()['tax']
     
     @property
     def total(self):
         """Calculate total including tax"""
-        return self.subtotal + self.tax
+        return self.get_summary()['total']
     
     @property
     def total_items(self):
         """Get total number of items in cart"""
-        return self.items.count()
+        return self.get_summary()['items_count']
     
     def add_item(self, course, quantity=1):
         """Add an item to the cart"""
@@ -133,15 +195,18 @@ class Cart(models.Model):
         if not created:
             item.quantity += quantity
             item.save()
+        self.invalidate_summary()
         return item
     
     def remove_item(self, course_id):
         """Remove an item from the cart"""
         self.items.filter(course_id=course_id).delete()
+        self.invalidate_summary()
     
     def clear(self):
         """Remove all items from the cart"""
         self.items.all().delete()
+        self.invalidate_summary()
 
 
 class CartItem(models.Model):
@@ -298,22 +363,29 @@ class Order(models.Model):
         self.total = self.subtotal + self.tax
         self.save()
     
+    def update_totals(self):
+        """
+        Recalculate totals from the items with one aggregate query.
+        Written with a queryset update so the post_save receivers that call
+        this method are not triggered again.
+        """
+        self.subtotal = self.items.aggregate(total=Sum('price'))['total'] or Decimal('0.00')
+        self.tax = self.subtotal * Decimal('0.1')  # 10% tax
+        self.total = self.subtotal + self.tax
+        Order.objects.filter(pk=self.pk).update(
+            subtotal=self.subtotal, tax=self.tax, total=self.total
+        )
+    
     def create_enrollments_after_payment(self):
         """Create enrollments for all order items after successful payment"""
         if self.status == 'completed' and self.user:
-            for item in self.items.all():
-                if not item.enrollment:
-                    item.create_enrollment(self.user)
+            from .fulfilment import enroll_order_items
+            enroll_order_items(self)
     
     def mark_as_paid(self, payment_id, payment_status='completed'):
         """Mark order as paid and create enrollments"""
-        self.status = 'completed'
-        self.payment_id = payment_id
-        self.payment_status = payment_status
-        self.save()
-        
-        # Create enrollments for all courses
-        self.create_enrollments_after_payment()
+        from .fulfilment import fulfil_order
+        fulfil_order(self, payment_id, payment_status)
 
 
 class OrderItem(models.Model):
@@ -378,3 +450,73 @@ class OrderItem(models.Model):
         self.save()
         
         return enrollment
+
+
+class ProcessedPaymentEvent(models.Model):
+    """
+    Payment gateway events that have already been fulfilled.
+
+    The (provider, payment_id) pair is unique, so a duplicate or concurrent
+    delivery of the same webhook is recognised and acknowledged without
+    touching orders or enrollments again.
+    """
+    provider = models.CharField(max_length=30, default='moyasar')
+    payment_id = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50, blank=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payment_events'
+    )
+    processed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-processed_at']
+        unique_together = ('provider', 'payment_id')
+    
+    def __str__(self):
+        return f"{self.provider}:{self.payment_id} ({self.event_type})"
+
+
+class PaymentEvent(models.Model):
+    """
+    Inbound payment gateway event waiting to be applied.
+
+    The webhook only stores the raw event; ``store.event_queue`` applies
+    events in order per payment id, retrying with backoff and moving events
+    that keep failing to the ``dead`` state.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    ]
+    
+    provider = models.CharField(max_length=30, default='moyasar')
+    event_type = models.CharField(max_length=50, blank=True)
+    payment_id = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    result = models.CharField(max_length=20, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider}:{self.event_type} {self.payment_id} ({self.status})"
@@ -96,13 +96,14 @@ class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     items_count = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()
+    discount = serializers.SerializerMethodField()
     tax = serializers.SerializerMethodField()
     total = serializers.SerializerMethodField()
     
     class Meta:
         model = Cart
         fields = [
-            'id', 'items', 'items_count', 'subtotal', 'tax', 'total',
+            'id', 'items', 'items_count', 'subtotal', 'discount', 'tax', 'total',
             'coupon', 'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -111,26 +112,22 @@ class CartSerializer(serializers.ModelSerializer):
         ]
     
     def get_items_count(self, obj):
-        return obj.items.count()
+        return obj.get_summary()['items_count']
     
     def get_subtotal(self, obj):
-        """Calculate subtotal from cart items"""
-        total = Decimal('0.00')
-        for item in obj.items.all():
-            price = item.course.discount_price if item.course.discount_price else item.course.price
-            total += price * item.quantity
-        return total
+        """Subtotal from the cart summary (one aggregate query per cart)"""
+        return obj.get_summary()['subtotal']
+    
+    def get_discount(self, obj):
+        return obj.get_summary()['discount']
     
     def get_tax(self, obj):
         """Calculate tax (15%)"""
-        subtotal = self.get_subtotal(obj)
-        return subtotal * Decimal('0.15')
+        return obj.get_summary()['tax']
     
     def get_total(self, obj):
         """Calculate total including tax"""
-        subtotal = self.get_subtotal(obj)
-        tax = self.get_tax(obj)
-        return subtotal + tax
+        return obj.get_summary()['total']
 
 
 class WishlistCourseSerializer(serializers.ModelSerializer):
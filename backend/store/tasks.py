@@ -0,0 +1,16 @@
+"""
+Celery tasks for the store app.
+
+Registered on the app in ``core/celery.py`` and used when
+``PAYMENT_EVENT_QUEUE_BACKEND = 'celery'``.
+"""
+from celery import shared_task
+
+from .event_queue import process_pending
+
+
+@shared_task(ignore_result=True)
+def process_payment_events(limit=100):
+    """Drain due payment events; reschedules itself while work remains"""
+    if process_pending(limit=limit) >= limit:
+        process_payment_events.delay(limit)
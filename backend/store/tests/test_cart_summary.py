@@ -0,0 +1,54 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.models import Course
+from store.models import Cart, Coupon
+
+User = get_user_model()
+
+
+class CartSummaryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='shopper', password='testpass123')
+        self.cart = Cart.objects.create(user=self.user)
+        self.course = Course.objects.create(title='One', description='d', price=Decimal('100.00'))
+        self.discounted = Course.objects.create(
+            title='Two', description='d', price=Decimal('80.00'), discount_price=Decimal('50.00')
+        )
+
+    def test_summary_is_one_query_and_memoized(self):
+        self.cart.add_item(self.course)
+        self.cart.add_item(self.discounted, quantity=2)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cart.subtotal, Decimal('200.00'))
+            self.assertEqual(self.cart.total_items, 2)
+            self.assertEqual(self.cart.tax, Decimal('30.00'))
+            self.assertEqual(self.cart.total, Decimal('230.00'))
+
+    def test_mutations_invalidate_summary(self):
+        self.cart.add_item(self.course)
+        self.assertEqual(self.cart.subtotal, Decimal('100.00'))
+        self.cart.add_item(self.discounted)
+        self.assertEqual(self.cart.subtotal, Decimal('150.00'))
+        self.cart.remove_item(self.course.id)
+        self.assertEqual(self.cart.subtotal, Decimal('50.00'))
+        self.cart.clear()
+        self.assertEqual(self.cart.total_items, 0)
+        self.assertEqual(self.cart.total, Decimal('0.00'))
+
+    def test_coupon_discount_applied_before_tax(self):
+        now = timezone.now()
+        self.cart.coupon = Coupon.objects.create(
+            code='TEN', discount_type='percentage', discount_value=Decimal('10.00'),
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1)
+        )
+        self.cart.save()
+        self.cart.add_item(self.course)
+        summary = self.cart.get_summary()
+        self.assertEqual(summary['discount'], Decimal('10.00'))
+        self.assertEqual(summary['tax'], Decimal('13.50'))
+        self.assertEqual(summary['total'], Decimal('103.50'))
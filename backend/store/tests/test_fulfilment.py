@@ -0,0 +1,125 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Course, Enrollment
+from store.event_queue import enqueue_event, process_pending, requeue_dead
+from store.fulfilment import process_payment_event
+from store.models import Order, OrderItem, PaymentEvent, ProcessedPaymentEvent
+
+User = get_user_model()
+
+
+class OrderFulfilmentTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='testpass123')
+        self.courses = [
+            Course.objects.create(title=f'Course {i}', description='d', price=Decimal('100.00'))
+            for i in range(3)
+        ]
+        self.order = Order.objects.create(
+            user=self.user, order_number='ORD-1', billing_email='b@example.com',
+            billing_name='Buyer', billing_address='-'
+        )
+        for course in self.courses:
+            OrderItem.objects.create(order=self.order, course=course, price=course.price)
+        # Already enrolled (unpaid) in the first course
+        Enrollment.objects.create(student=self.user, course=self.courses[0], status='pending')
+
+    def test_mark_as_paid_enrolls_and_links_items(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.order.mark_as_paid('pay_1')
+        self.assertEqual(len(callbacks), 1)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'completed')
+        enrollments = Enrollment.objects.filter(student=self.user)
+        self.assertEqual(enrollments.count(), 3)
+        self.assertTrue(all(e.is_paid and e.status == 'active' for e in enrollments))
+        self.assertFalse(self.order.items.filter(enrollment__isnull=True).exists())
+        for course in self.courses:
+            course.refresh_from_db()
+            self.assertEqual(course.total_enrollments, 1)
+
+    def test_order_totals_follow_items(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.subtotal, Decimal('300.00'))
+        self.assertEqual(self.order.total, Decimal('330.00'))
+
+    def test_webhook_is_idempotent(self):
+        event = {
+            'type': 'payment.succeeded',
+            'data': {'id': 'pay_2', 'amount': 10000, 'metadata': {'order_id': self.order.pk}},
+        }
+        self.assertEqual(process_payment_event(event), 'processed')
+        self.assertEqual(process_payment_event(event), 'duplicate')
+        self.assertEqual(ProcessedPaymentEvent.objects.filter(payment_id='pay_2').count(), 1)
+        self.assertEqual(Enrollment.objects.filter(student=self.user).count(), 3)
+
+    def test_direct_course_payment(self):
+        course = Course.objects.create(title='Direct', description='d', price=Decimal('50.00'))
+        event = {
+            'type': 'payment.succeeded',
+            'data': {'id': 'pay_3', 'amount': 5750, 'metadata': {
+                'payment_type': 'direct_course_payment',
+                'user_id': self.user.pk, 'course_id': course.pk,
+            }},
+        }
+        self.assertEqual(process_payment_event(event), 'processed')
+        enrollment = Enrollment.objects.get(student=self.user, course=course)
+        self.assertEqual(enrollment.payment_amount, Decimal('57.50'))
+        self.assertEqual(enrollment.transaction_id, 'pay_3')
+
+
+class PaymentEventQueueTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='queued', password='testpass123')
+        self.course = Course.objects.create(title='Queued', description='d', price=Decimal('10.00'))
+
+    def _event(self, payment_id):
+        return {
+            'type': 'payment.succeeded',
+            'data': {'id': payment_id, 'metadata': {
+                'payment_type': 'direct_course_payment',
+                'user_id': self.user.pk, 'course_id': self.course.pk,
+            }},
+        }
+
+    def test_webhook_queues_and_worker_applies(self):
+        response = self.client.post(
+            reverse('store:moyasar-webhook'), data=json.dumps(self._event('pay_q')),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PaymentEvent.objects.get().status, 'pending')
+        self.assertFalse(Enrollment.objects.filter(student=self.user).exists())
+
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(PaymentEvent.objects.get().result, 'processed')
+        self.assertTrue(Enrollment.objects.filter(student=self.user, course=self.course).exists())
+
+    @override_settings(PAYMENT_EVENT_MAX_ATTEMPTS=2, PAYMENT_EVENT_BACKOFF_SECONDS=0)
+    def test_failures_retry_in_order_then_dead_letter(self):
+        first = enqueue_event(self._event('pay_o'))
+        second = enqueue_event(self._event('pay_o'))
+        with mock.patch('store.event_queue.process_payment_event', side_effect=RuntimeError('boom')):
+            self.assertEqual(process_pending(), 1)  # the second waits behind the first
+            first.refresh_from_db()
+            self.assertEqual((first.status, first.attempts), ('pending', 1))
+            process_pending()
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'dead')
+        self.assertIn('boom', first.last_error)
+
+        self.assertEqual(process_pending(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'done')
+
+        self.assertEqual(requeue_dead(), 1)
+        process_pending()
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.result), ('done', 'duplicate'))
@@ -60,6 +60,7 @@ urlpatterns = [
         path('moyasar/course/<int:course_id>/create/', views.moyasar_create_course_payment, name='moyasar-create-course'),
         path('moyasar/callback/', views.moyasar_callback, name='moyasar-callback'),
         path('moyasar/webhook/', views.moyasar_webhook, name='moyasar-webhook'),
+        path('events/dead/', views.payment_event_dead_letters, name='payment-event-dead-letters'),
         
         # Transactions
         path('transactions/summary/', 
@@ -29,7 +29,9 @@ class CartDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
+        cart, created = Cart.objects.prefetch_related('items__course').get_or_create(
+            user=self.request.user
+        )
         return cart
 
 
@@ -443,45 +445,51 @@ def moyasar_callback(request):
 @csrf_exempt
 @require_POST
 def moyasar_webhook(request):
-    """Webhook to receive payment status updates from Moyasar."""
+    """
+    Webhook to receive payment status updates from Moyasar.
+    The event is queued and acknowledged; store.event_queue applies it.
+    """
+    from .event_queue import enqueue_event
+
     try:
         event = json.loads(request.body.decode('utf-8'))
-        
-        # Handle payment success
-        if event.get('type') == 'payment.succeeded':
-            payment_data = event.get('data', {})
-            metadata = payment_data.get('metadata', {})
-            
-            # Check if this is a direct course payment
-            if metadata.get('payment_type') == 'direct_course_payment':
-                user_id = metadata.get('user_id')
-                course_id = metadata.get('course_id')
-                
-                if user_id and course_id:
-                    try:
-                        user = User.objects.get(id=user_id)
-                        course = Course.objects.get(id=course_id)
-                        
-                        # Enroll user in course
-                        from courses.models import Enrollment
-                        enrollment, created = Enrollment.objects.get_or_create(
-                            student=user,
-                            course=course,
-                            defaults={
-                                'status': 'active',
-                                'enrolled_at': timezone.now()
-                            }
-                        )
-                        
-                        if created:
-                            print(f"User {user.username} enrolled in course {course.title}")
-                        else:
-                            print(f"User {user.username} already enrolled in course {course.title}")
-                            
-                    except (User.DoesNotExist, Course.DoesNotExist) as e:
-                        print(f"Error enrolling user: {e}")
-        
-        return HttpResponse(status=200)
-    except Exception as e:
+    except (UnicodeDecodeError, ValueError) as e:
         print(f"Webhook error: {e}")
         return HttpResponse(status=400)
+    if not isinstance(event, dict):
+        return HttpResponse(status=400)
+
+    enqueue_event(event)
+    return HttpResponse(status=200)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAdminUser])
+def payment_event_dead_letters(request):
+    """
+    Dead-lettered payment events (GET) and requeueing them (POST with
+    optional ``ids``; all dead events when omitted).
+    """
+    from .event_queue import requeue_dead
+    from .models import PaymentEvent
+
+    if request.method == 'POST':
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response({'error': 'ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'requeued': requeue_dead(ids)})
+
+    events = PaymentEvent.objects.filter(status='dead').order_by('-id')[:200]
+    return Response([
+        {
+            'id': event.id,
+            'provider': event.provider,
+            'event_type': event.event_type,
+            'payment_id': event.payment_id,
+            'attempts': event.attempts,
+            'last_error': event.last_error,
+            'received_at': event.received_at,
+            'payload': event.payload,
+        }
+        for event in events
+    ])
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import DEFAULT_CHUNK_SIZE, parse_student_rows, provision_students
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create student accounts (User, Profile, Student, AccountFreeze) from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or JSON file with email, username, first_name, last_name, phone, department, password')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            help='Input format (guessed from the file contents by default)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows per bulk insert (default {DEFAULT_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                rows = parse_student_rows(f, options['format'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+
+        self.stdout.write(f'Provisioning {len(rows)} students...')
+        result = provision_students(rows, chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Created: {result["created"]}'))
+        if result['skipped']:
+            self.stdout.write(self.style.WARNING(f'Skipped (already exist): {len(result["skipped"])}'))
+        for error in result['errors']:
+            self.stdout.write(self.style.ERROR(f'  - row {error["row"]} ({error["email"]}): {error["error"]}'))
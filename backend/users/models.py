@@ -1,8 +1,9 @@
 from django.db import models
+from django.db.models.fields.files import FieldFile
 from django.contrib.auth.models import User
 import uuid
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from core.signal_registry import receiver
 from django_ckeditor_5.fields import CKEditor5Field
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
@@ -13,7 +14,58 @@ import os
 class Meta:
     app_label = 'apis_users'
 
-class Profile(models.Model):
+class TrackedFieldsMixin:
+    """
+    يحفظ القيم المحملة من قاعدة البيانات للحقول المتتبعة دون استعلام إضافي.
+
+    Values are captured when the instance is loaded (``from_db``) and reset
+    after every save, so ``get_loaded_value()`` always returns what is
+    currently stored in the database. New, unsaved instances report ``None``.
+    """
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_values = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._capture_loaded_values()
+        return instance
+
+    def _capture_loaded_values(self, fields=None):
+        # An empty list (save/refresh of untracked fields only) captures nothing
+        for field in self.tracked_fields if fields is None else fields:
+            # Deferred fields are not in __dict__; reading them would query
+            if field in self.__dict__:
+                value = self.__dict__[field]
+                # A FieldFile is updated in place by .save(); keep its name
+                self._loaded_values[field] = value.name if isinstance(value, FieldFile) else value
+
+    def get_loaded_value(self, field):
+        return self._loaded_values.get(field)
+
+    def has_changed(self, field):
+        return field in self._loaded_values and self._loaded_values[field] != getattr(self, field)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._capture_loaded_values(
+            [f for f in self.tracked_fields if fields is None or f in fields]
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._capture_loaded_values(
+            [f for f in self.tracked_fields if update_fields is None or f in update_fields]
+        )
+
+
+class Profile(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('status', 'image_profile')
+
     name = models.CharField(max_length=2000, blank=True, null=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     email = models.CharField(max_length=2000, blank=True, null=True)
@@ -256,22 +308,6 @@ def update_user_profile(sender, instance, created, **kwargs):
             logger.error(f"Error updating profile for user {instance.username}: {str(e)}")
 
 
-# متغير لتخزين الحالة القديمة قبل الحفظ
-_old_profile_status = {}
-
-@receiver(pre_save, sender=Profile)
-def store_old_profile_status(sender, instance, **kwargs):
-    """
-    تخزين الحالة القديمة للبروفايل قبل الحفظ
-    """
-    if instance.pk:
-        try:
-            old_instance = Profile.objects.get(pk=instance.pk)
-            _old_profile_status[instance.pk] = old_instance.status
-        except Profile.DoesNotExist:
-            _old_profile_status[instance.pk] = None
-
-
 @receiver(post_save, sender=Profile)
 def create_student_or_instructor_profile(sender, instance, created, **kwargs):
     """
@@ -307,12 +343,12 @@ def create_student_or_instructor_profile(sender, instance, created, **kwargs):
         
         # عند تحديث Profile (تغيير الحالة)
         else:
-            # الحصول على الحالة القديمة من المتغير المؤقت
-            old_status = _old_profile_status.get(instance.pk, None)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'status' not in update_fields:
+                return
             
-            # تنظيف المتغير المؤقت
-            if instance.pk in _old_profile_status:
-                del _old_profile_status[instance.pk]
+            # الحالة المحملة من قاعدة البيانات (تُحدَّث بعد انتهاء الحفظ)
+            old_status = instance.get_loaded_value('status')
             
             # إذا تغيرت الحالة
             if old_status and old_status != instance.status:
@@ -370,8 +406,8 @@ def create_student_or_instructor_profile(sender, instance, created, **kwargs):
                     Student.objects.filter(profile=instance).delete()
                     logger.info(f"تم إنشاء/تحديث بروفايل مدرب للمستخدم: {instance.name}")
             
-            # إذا لم تتغير الحالة، تأكد من وجود البروفايل المناسب
-            elif not old_status or old_status == instance.status:
+            # إذا كانت الحالة القديمة غير معروفة، تأكد من وجود البروفايل المناسب
+            elif not old_status:
                 if instance.status == 'Student':
                     # التأكد من وجود بروفايل طالب
                     has_student = Student.objects.filter(profile=instance).exists()
@@ -0,0 +1,158 @@
+"""
+Request-scoped principal: يحل دور المستخدم ومعرفاته مرة واحدة لكل طلب.
+
+Views and serializers used to repeat ``user.profile`` / ``profile.status`` /
+``profile.get_instructor_object()`` for every permission check. A ``Principal``
+resolves each of these lazily the first time it is needed and then keeps the
+result for the rest of the request.
+"""
+from django.utils.functional import cached_property
+
+
+ENROLLED_STATUSES = ('active', 'completed')
+
+
+class Principal:
+    """الهوية المحلولة للمستخدم الحالي خلال طلب واحد"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    @cached_property
+    def profile(self):
+        if not self.is_authenticated:
+            return None
+        from .models import Profile
+        try:
+            return self.user.profile
+        except Profile.DoesNotExist:
+            return None
+
+    @cached_property
+    def role(self):
+        """Profile status ('Admin', 'Student', 'Instructor', 'Organization') or None"""
+        return self.profile.status if self.profile else None
+
+    @property
+    def is_superuser(self):
+        return self.is_authenticated and self.user.is_superuser
+
+    @property
+    def is_staff(self):
+        return self.is_authenticated and self.user.is_staff
+
+    @property
+    def is_admin(self):
+        """Same rule as ``Profile.is_admin``"""
+        return self.role == 'Admin' or self.is_superuser
+
+    @property
+    def is_instructor(self):
+        return self.role == 'Instructor'
+
+    @property
+    def is_student(self):
+        return self.role == 'Student'
+
+    @property
+    def is_teacher_or_admin(self):
+        """Same rule as ``Profile.is_teacher_or_admin``"""
+        return self.role in ('Instructor', 'Admin') or self.is_superuser
+
+    @cached_property
+    def instructor(self):
+        """Instructor object (created for admins on first use, as before)"""
+        if self.profile is None:
+            return None
+        return self.profile.get_instructor_object()
+
+    @property
+    def instructor_id(self):
+        return self.instructor.id if self.instructor else None
+
+    @cached_property
+    def student_id(self):
+        if self.profile is None or self.role != 'Student':
+            return None
+        from .models import Student
+        return Student.objects.filter(profile=self.profile).values_list('id', flat=True).first()
+
+    @cached_property
+    def enrollment_statuses(self):
+        """{course_id: enrollment status} for every enrollment of the user"""
+        if not self.is_authenticated:
+            return {}
+        from courses.models import Enrollment
+        return dict(
+            Enrollment.objects.filter(student=self.user).values_list('course_id', 'status')
+        )
+
+    @property
+    def enrolled_course_ids(self):
+        return frozenset(
+            course_id for course_id, status in self.enrollment_statuses.items()
+            if status in ENROLLED_STATUSES
+        )
+
+    def is_enrolled(self, course_id, statuses=ENROLLED_STATUSES):
+        return self.enrollment_statuses.get(course_id) in statuses
+
+    @cached_property
+    def instructor_course_ids(self):
+        """IDs of the courses the user teaches"""
+        if self.instructor_id is None:
+            return frozenset()
+        from courses.models import Course
+        return frozenset(
+            Course.objects.filter(instructors__id=self.instructor_id).values_list('id', flat=True)
+        )
+
+    def teaches(self, course_id):
+        return course_id in self.instructor_course_ids
+
+    def can_manage_course(self, course_id):
+        """Admin/staff, or an instructor assigned to the course"""
+        if self.is_admin or self.is_staff:
+            return True
+        return self.is_instructor and self.teaches(course_id)
+
+
+def get_principal(request):
+    """
+    Return the principal for ``request``.
+
+    ``PrincipalMiddleware`` attaches one to every request; this helper also
+    works for requests built without the middleware (tests, internal calls)
+    and for DRF requests, whose user is only known after authentication.
+    """
+    if request is None:
+        return Principal(None)
+    user = getattr(request, 'user', None)
+    principal = getattr(request, '_principal', None)
+    if principal is None or principal.user is not user:
+        principal = Principal(user)
+        try:
+            request._principal = principal
+        except AttributeError:
+            pass
+    return principal
+
+
+class RequestPrincipal:
+    """
+    Lazy handle attached as ``request.principal`` by ``PrincipalMiddleware``.
+
+    Attribute access is forwarded to ``get_principal(request)`` so that DRF
+    views see the user authenticated by DRF (JWT), not the anonymous user
+    known when the middleware ran.
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(get_principal(self._request), name)
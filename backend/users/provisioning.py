@@ -0,0 +1,188 @@
+"""
+إنشاء حسابات الطلاب بالجملة (Bulk student provisioning).
+
+Creating a ``User`` normally fires ``create_user_profile``,
+``create_account_freeze`` and ``update_user_profile``, and the ``Profile``
+post_save then creates the ``Student`` row, which costs several queries per
+user. ``provision_students`` builds the same ``User`` / ``Profile`` /
+``Student`` / ``AccountFreeze`` rows directly with ``bulk_create`` in chunks,
+so importing a whole school takes a handful of queries per chunk.
+"""
+import csv
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import Profile, Student, AccountFreeze
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+# Same default the create_student_or_instructor_profile signal uses
+DEFAULT_DEPARTMENT = 'عام'
+# PBKDF2 hashing releases the GIL, so a few threads speed up large imports
+PASSWORD_HASH_WORKERS = 4
+
+ROW_FIELDS = ('email', 'username', 'first_name', 'last_name', 'phone', 'department', 'password')
+
+
+def parse_student_rows(data, fmt=None):
+    """
+    Parse CSV or JSON student data into a list of dicts.
+
+    ``data`` may be ``str``/``bytes`` or a file object. When ``fmt`` is not
+    given it is guessed from the first non-blank character.
+    """
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt is None:
+        fmt = 'json' if data.lstrip()[:1] in ('[', '{') else 'csv'
+
+    if fmt == 'json':
+        rows = json.loads(data)
+        if isinstance(rows, dict):
+            rows = rows.get('students', [])
+        if not isinstance(rows, list):
+            raise ValueError("JSON input must be a list of students or {'students': [...]}")
+    elif fmt == 'csv':
+        rows = list(csv.DictReader(io.StringIO(data)))
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    return [
+        {key: (str(row.get(key) or '').strip()) for key in ROW_FIELDS}
+        for row in rows if isinstance(row, dict)
+    ]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _validate_rows(rows):
+    """Split rows into valid rows and errors; usernames default to the email."""
+    valid, errors = [], []
+    seen_usernames, seen_emails = set(), set()
+    for index, row in enumerate(rows, start=1):
+        email = row.get('email', '')
+        username = row.get('username') or email
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append({'row': index, 'email': email, 'error': 'invalid email'})
+            continue
+        if username in seen_usernames or email.lower() in seen_emails:
+            errors.append({'row': index, 'email': email, 'error': 'duplicate in input'})
+            continue
+        seen_usernames.add(username)
+        seen_emails.add(email.lower())
+        valid.append(dict(row, username=username, _row=index))
+    return valid, errors
+
+
+def _hash_passwords(rows):
+    """Hash row passwords; rows without a password get an unusable one."""
+    with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS) as pool:
+        return list(pool.map(lambda row: make_password(row.get('password') or None), rows))
+
+
+def _fetch_missing_pks(objects, model, field):
+    """
+    Set the ids ``bulk_create`` could not return (backends without
+    RETURNING), looked up by the unique ``field``.
+    """
+    if all(obj.pk is not None for obj in objects):
+        return
+    ids = dict(model.objects.filter(
+        **{f'{field}__in': [getattr(obj, field) for obj in objects]}
+    ).values_list(field, 'pk'))
+    for obj in objects:
+        obj.pk = ids[getattr(obj, field)]
+
+
+@transaction.atomic
+def _provision_chunk(rows):
+    users = []
+    for row, password in zip(rows, _hash_passwords(rows)):
+        users.append(User(
+            username=row['username'],
+            email=row['email'],
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            password=password,
+        ))
+    users = User.objects.bulk_create(users)
+    _fetch_missing_pks(users, User, 'username')
+
+    # Same values the create_user_profile signal would store
+    profiles = Profile.objects.bulk_create([
+        Profile(
+            user=user,
+            name=user.get_full_name() or user.username,
+            email=user.email,
+            phone=row.get('phone') or None,
+            status='Student',
+        )
+        for user, row in zip(users, rows)
+    ])
+    _fetch_missing_pks(profiles, Profile, 'user_id')
+    Student.objects.bulk_create([
+        Student(profile=profile, department=row.get('department') or DEFAULT_DEPARTMENT)
+        for profile, row in zip(profiles, rows)
+    ])
+    AccountFreeze.objects.bulk_create([
+        AccountFreeze(user=user, is_frozen=False, frozen_by_admin=False)
+        for user in users
+    ])
+    return users
+
+
+def provision_students(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Create student accounts in bulk, bypassing the per-row signal chain.
+
+    Rows whose username or email already exists are skipped. Each chunk is
+    committed in its own transaction. Returns a summary dict with
+    ``created``, ``skipped`` and ``errors``.
+    """
+    valid, errors = _validate_rows(rows)
+    created = 0
+    skipped = []
+
+    for chunk in _chunks(valid, chunk_size):
+        usernames = [row['username'] for row in chunk]
+        emails = [row['email'].lower() for row in chunk]
+        existing = User.objects.filter(username__in=usernames).values_list('username', flat=True)
+        existing_usernames = set(existing)
+        existing_emails = set(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails).values_list('email_lower', flat=True)
+        )
+        new_rows = []
+        for row in chunk:
+            if row['username'] in existing_usernames or row['email'].lower() in existing_emails:
+                skipped.append({'row': row['_row'], 'email': row['email'], 'error': 'already exists'})
+            else:
+                new_rows.append(row)
+        if not new_rows:
+            continue
+        try:
+            created += len(_provision_chunk(new_rows))
+        except Exception as e:
+            logger.error(f"Error provisioning students chunk: {str(e)}")
+            errors.extend(
+                {'row': row['_row'], 'email': row['email'], 'error': str(e)} for row in new_rows
+            )
+
+    return {'created': created, 'skipped': skipped, 'errors': errors}
@@ -10,6 +10,7 @@ from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 import re
+from core.image_variants import image_srcset
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -40,12 +41,13 @@ class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.CharField(source='user.id', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
+    image_profile_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Profile
         fields = [
             'id', 'name', 'user', 'user_id', 'user_email', 'email', 'phone', 'status',
-            'image_profile', 'shortBio', 'detail', 'github', 'youtube', 'twitter',
+            'image_profile', 'image_profile_srcset', 'shortBio', 'detail', 'github', 'youtube', 'twitter',
             'facebook', 'instagram', 'linkedin', 'created_at'
         ]
         read_only_fields = ['id', 'user', 'user_id', 'user_email', 'created_at']
@@ -53,6 +55,9 @@ class ProfileSerializer(serializers.ModelSerializer):
     def get_created_at(self, obj):
         return obj.user.date_joined if obj.user else None
 
+    def get_image_profile_srcset(self, obj):
+        return image_srcset(obj.image_profile, self.context.get('request'))
+
 
 class StudentSerializer(serializers.ModelSerializer):
     profile = ProfileSerializer(read_only=True)
@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.test import TestCase, RequestFactory
+from django.contrib.auth import get_user_model
+
+from courses.models import Course, Enrollment
+from .models import Instructor, Profile, Student
+from .principal import Principal, get_principal
+from .provisioning import parse_student_rows, provision_students
+
+User = get_user_model()
+
+
+class PrincipalTest(TestCase):
+    """Test cases for the request-scoped principal"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.student = User.objects.create_user(username='student', password='testpass123')
+        self.teacher = User.objects.create_user(username='teacher', password='testpass123')
+        self.teacher.profile.status = 'Instructor'
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title='Test Course', description='Test', price=10)
+        self.course.instructors.add(Instructor.objects.get(profile=self.teacher.profile))
+        Enrollment.objects.create(student=self.student, course=self.course, status='active')
+
+    def test_student_resolution(self):
+        principal = Principal(User.objects.get(pk=self.student.pk))
+        self.assertTrue(principal.is_student)
+        self.assertIsNotNone(principal.student_id)
+        self.assertTrue(principal.is_enrolled(self.course.id))
+        self.assertFalse(principal.can_manage_course(self.course.id))
+
+    def test_instructor_resolved_once(self):
+        principal = Principal(User.objects.get(pk=self.teacher.pk))
+        with self.assertNumQueries(3):
+            # profile, instructor, instructor courses
+            self.assertTrue(principal.can_manage_course(self.course.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(principal.can_manage_course(self.course.id))
+            self.assertEqual(principal.instructor_id, principal.instructor.id)
+
+    def test_get_principal_follows_request_user(self):
+        request = self.factory.get('/')
+        request.user = self.student
+        first = get_principal(request)
+        self.assertIs(first, get_principal(request))
+        request.user = self.teacher
+        self.assertTrue(get_principal(request).is_instructor)
+
+
+class BulkProvisioningTest(TestCase):
+    """Test cases for bulk student provisioning"""
+
+    CSV = (
+        "email,first_name,last_name,password\n"
+        "a@example.com,Ali,Ahmed,secret123\n"
+        "b@example.com,,,\n"
+        "not-an-email,X,Y,\n"
+        "a@example.com,Dup,Row,\n"
+    )
+
+    def test_provision_matches_signal_path(self):
+        result = provision_students(parse_student_rows(self.CSV), chunk_size=1)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(len(result['errors']), 2)
+
+        user = User.objects.get(username='a@example.com')
+        self.assertTrue(user.check_password('secret123'))
+        self.assertEqual(user.profile.name, 'Ali Ahmed')
+        self.assertEqual(user.profile.status, 'Student')
+        self.assertEqual(Student.objects.get(profile=user.profile).department, 'عام')
+        self.assertFalse(user.account_freeze.is_frozen)
+
+        other = User.objects.get(username='b@example.com')
+        self.assertFalse(other.has_usable_password())
+        self.assertEqual(other.profile.name, 'b@example.com')
+
+    def test_existing_users_are_skipped(self):
+        User.objects.create_user(username='a@example.com', email='a@example.com')
+        result = provision_students(parse_student_rows(self.CSV))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(len(result['skipped']), 1)
+        self.assertEqual(Profile.objects.filter(user__username='a@example.com').count(), 1)
+
+    def test_existing_email_is_matched_case_insensitively(self):
+        User.objects.create_user(username='ali', email='A@Example.com')
+        result = provision_students(parse_student_rows(self.CSV))
+        self.assertEqual((result['created'], len(result['skipped'])), (1, 1))
+        self.assertFalse(User.objects.filter(username='a@example.com').exists())
+
+    def test_backends_without_returned_ids(self):
+        from django.db import connection
+
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            result = provision_students(parse_student_rows(self.CSV))
+        self.assertEqual(result['created'], 2)
+        user = User.objects.get(username='b@example.com')
+        self.assertTrue(Student.objects.filter(profile=user.profile).exists())
+
+
+class ProfileStatusTrackingTest(TestCase):
+    """Test cases for Profile status tracking and role transitions"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tracked', password='testpass123')
+
+    def test_loaded_status_captured_without_query(self):
+        profile = Profile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.get_loaded_value('status'), 'Student')
+            profile.status = 'Instructor'
+            self.assertTrue(profile.has_changed('status'))
+
+    def test_status_change_moves_role_profile(self):
+        profile = Profile.objects.get(user=self.user)
+        profile.status = 'Instructor'
+        profile.save()
+        self.assertTrue(Instructor.objects.filter(profile=profile).exists())
+        self.assertFalse(Student.objects.filter(profile=profile).exists())
+        self.assertFalse(profile.has_changed('status'))
+
+    def test_partial_save_keeps_unsaved_status_change(self):
+        profile = Profile.objects.get(user=self.user)
+        profile.status = 'Instructor'
+        profile.save(update_fields=['email'])
+        profile.refresh_from_db(fields=['name'])
+        self.assertTrue(profile.has_changed('status'))
+        self.assertEqual(profile.get_loaded_value('status'), 'Student')
+
+        profile.save()
+        self.assertTrue(Instructor.objects.filter(profile=profile).exists())
+
+    def test_unchanged_save_skips_role_hook(self):
+        profile = Profile.objects.get(user=self.user)
+        # UPDATE only: no pre_save re-read and no role lookups
+        with self.assertNumQueries(1):
+            profile.save()
+
+
+class SignalRegistryTest(TestCase):
+    """Test cases for sender-scoped receivers and dispatch profiling"""
+
+    def test_receiver_requires_sender(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from django.db.models.signals import post_save
+        from core.signal_registry import receiver
+        with self.assertRaises(ImproperlyConfigured):
+            receiver(post_save)
+
+    def test_dispatch_is_profiled(self):
+        from django.test import override_settings
+        from core.signal_registry import collect_stats, get_bindings, reset_stats
+        self.assertIn(
+            ('post_save', 'store.signals.update_order_totals', 'store.Order'), get_bindings()
+        )
+        reset_stats()
+        with override_settings(SIGNAL_PROFILING=True):
+            User.objects.create_user(username='profiled')
+        receivers = {row['receiver'] for row in collect_stats(include_published=False)}
+        self.assertIn('users.models.create_user_profile', receivers)
@@ -65,6 +65,7 @@ urlpatterns = [
     # User Management
     path('users/<int:user_id>/activate/', views.UserActivationView.as_view(), name='user-activate'),
     path('users/<int:user_id>/role/', views.UserRoleView.as_view(), name='user-role'),
+    path('users/bulk-provision/', views.BulkStudentProvisionView.as_view(), name='user-bulk-provision'),
     path('profile/picture/', views.ProfilePictureUploadView.as_view(), name='profile-picture-upload'),
     path('search/', views.UserSearchView.as_view(), name='user-search'),
     
@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from django.contrib.auth.models import User, Group
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,9 +22,10 @@ from django.core.exceptions import ValidationError
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
 from .models import Profile, Student, Organization, Instructor, AccountFreeze
+from .provisioning import parse_student_rows, provision_students
 from courses.models import Enrollment, Course
 from assessment.models import FlashcardProductEnrollment, QuestionBankProductEnrollment
 from .serializers import (
@@ -250,6 +252,34 @@ class UserRoleView(APIView):
             )
 
 
+class BulkStudentProvisionView(APIView):
+    """إنشاء حسابات الطلاب بالجملة من ملف CSV أو JSON"""
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                rows = parse_student_rows(upload, request.data.get('format') or None)
+            else:
+                rows = parse_student_rows(json.dumps(request.data.get('students', [])), 'json')
+        except ValueError as e:
+            return Response(
+                {"detail": f"Invalid input: {e}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not rows:
+            return Response(
+                {"detail": "No students provided."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = provision_students(rows)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+
+
 class ProfilePictureUploadView(APIView):
     """رفع صورة الملف الشخصي"""
     permission_classes = [permissions.IsAuthenticated]